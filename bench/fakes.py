@@ -0,0 +1,345 @@
+"""In-process stand-ins for the gateway, Discord REST and Postgres used by the benchmarks."""
+import asyncio
+import itertools
+import random
+import time
+from collections import Counter
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from typing import Any, Dict, Optional
+
+from utils import metrics
+from utils.database import ALL_TYPES_ENABLED, QUERIES, Database
+
+_ids = itertools.count(10 ** 17)
+
+
+def next_id() -> int:
+    return next(_ids)
+
+
+class FakeConnection:
+    """Pool connection that answers the registered queries from the dicts of a ``FakeDatabase``.
+
+    Statements are looked up by their SQL, so ``Database`` runs unchanged on top of it; every
+    statement counts as one query and optionally sleeps ``latency`` seconds to imitate a round
+    trip to Postgres.
+    """
+
+    def __init__(self, db: "FakeDatabase"):
+        self.db = db
+        self.names = {statement.sql: statement.name for statement in QUERIES.values()}
+
+    async def _call(self, sql: str, args: tuple):
+        name = self.names.get(sql) or sql.split()[0].lower()
+        self.db.queries[name] += 1
+        if self.db.latency:
+            await asyncio.sleep(self.db.latency)
+        handler = getattr(self, name, None)
+        if handler is None:
+            raise NotImplementedError(f"FakeConnection does not answer {name}")
+        return handler(*args)
+
+    async def fetch(self, sql: str, *args):
+        return await self._call(sql, args)
+
+    async def fetchrow(self, sql: str, *args):
+        return await self._call(sql, args)
+
+    async def execute(self, sql: str, *args) -> str:
+        return await self._call(sql, args)
+
+    async def executemany(self, sql: str, args) -> None:
+        for item in args:
+            await self._call(sql, item)
+
+    async def copy_records_to_table(self, table: str, records, columns) -> str:
+        self.db.queries[f"copy_{table}"] += 1
+        setattr(self.db, table, getattr(self.db, table) + len(records))
+        return f"COPY {len(records)}"
+
+    @asynccontextmanager
+    async def transaction(self):
+        yield
+
+    def create(self) -> str:
+        return "CREATE TABLE"
+
+    def get_guild_settings(self, guild_ids):
+        return [{"guild_id": guild_id, "retention_days": None, "redact_after_days": None, **self.db.settings[guild_id]}
+                for guild_id in guild_ids if guild_id in self.db.settings]
+
+    def get_guild_routes(self, guild_ids):
+        return [{"guild_id": guild_id, "target": target, "channel_id": channel_id}
+                for guild_id in guild_ids for target, channel_id in self.db.routes.get(guild_id, {}).items()]
+
+    def get_guild_ignores(self, guild_ids):
+        return [{"guild_id": guild_id, "kind": kind, "target_id": target_id}
+                for guild_id in guild_ids for kind, target_id in self.db.ignores.get(guild_id, ())]
+
+    def get_guild_watch_terms(self, guild_ids):
+        return [{"guild_id": guild_id, "term": term, "is_regex": is_regex}
+                for guild_id in guild_ids for term, is_regex in sorted(self.db.watch_terms.get(guild_id, {}).items())]
+
+    def _settings(self, guild_id) -> Dict[str, Any]:
+        return self.db.settings.setdefault(
+            guild_id, {"log_channel_id": None, "logging_enabled": False, "log_types": None, "language": "en"}
+        )
+
+    def set_log_channel(self, guild_id, channel_id) -> str:
+        self._settings(guild_id)["log_channel_id"] = channel_id
+        return "INSERT 0 1"
+
+    def set_logging_enabled(self, guild_id, enabled) -> str:
+        settings = self._settings(guild_id)
+        settings["logging_enabled"] = enabled
+        if settings["log_types"] is None:
+            settings["log_types"] = ALL_TYPES_ENABLED
+        return "INSERT 0 1"
+
+    def set_log_types(self, guild_id, log_types) -> str:
+        if guild_id not in self.db.settings:
+            return "UPDATE 0"
+        self.db.settings[guild_id]["log_types"] = log_types
+        return "UPDATE 1"
+
+    def set_language(self, guild_id, language) -> str:
+        self._settings(guild_id)["language"] = language
+        return "INSERT 0 1"
+
+    def set_route(self, guild_id, target, channel_id) -> str:
+        self.db.routes.setdefault(guild_id, {})[target] = channel_id
+        return "INSERT 0 1"
+
+    def remove_route(self, guild_id, target) -> str:
+        return f"DELETE {int(self.db.routes.get(guild_id, {}).pop(target, None) is not None)}"
+
+    def add_watch_term(self, guild_id, term, is_regex) -> str:
+        self.db.watch_terms.setdefault(guild_id, {})[term] = is_regex
+        return "INSERT 0 1"
+
+    def remove_watch_term(self, guild_id, term) -> str:
+        return f"DELETE {int(self.db.watch_terms.get(guild_id, {}).pop(term, None) is not None)}"
+
+    def add_ignore(self, guild_id, kind, target_id) -> str:
+        self.db.ignores.setdefault(guild_id, set()).add((kind, target_id))
+        return "INSERT 0 1"
+
+    def clear_ignores(self, guild_id, kind) -> str:
+        ignores = self.db.ignores.get(guild_id, set())
+        cleared = {item for item in ignores if item[0] == kind}
+        ignores -= cleared
+        return f"DELETE {len(cleared)}"
+
+    def remove_ignore(self, guild_id, kind, target_id) -> str:
+        ignores = self.db.ignores.get(guild_id, set())
+        if (kind, target_id) not in ignores:
+            return "DELETE 0"
+        ignores.discard((kind, target_id))
+        return "DELETE 1"
+
+    def add_voice_stats(self, guild_id, member_id, total_seconds, sessions, last_left_at) -> str:
+        totals = self.db.voice_stats.setdefault((guild_id, member_id), [0, 0])
+        totals[0] += total_seconds
+        totals[1] += sessions
+        return "INSERT 0 1"
+
+    def get_voice_summary(self, guild_id):
+        totals = [totals for (guild, _), totals in self.db.voice_stats.items() if guild == guild_id]
+        return {"total_seconds": sum(total[0] for total in totals), "sessions": sum(total[1] for total in totals),
+                "members": len(totals)}
+
+    def get_voice_top(self, guild_id, limit):
+        rows = [{"member_id": member_id, "total_seconds": totals[0], "sessions": totals[1]}
+                for (guild, member_id), totals in self.db.voice_stats.items() if guild == guild_id]
+        return sorted(rows, key=lambda row: -row["total_seconds"])[:limit]
+
+
+class FakePool:
+    def __init__(self, connection: FakeConnection):
+        self.connection = connection
+
+    @asynccontextmanager
+    async def acquire(self):
+        yield self.connection
+
+    async def close(self) -> None:
+        pass
+
+
+class FakeDatabase(Database):
+    """The real ``utils.database.Database`` running on a ``FakePool`` backed by dicts.
+
+    Caching, single-flight loads and the batched warm-up are the production code; only
+    Postgres is replaced. ``queries`` counts the statements that reached the fake pool.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        super().__init__()
+        self.latency = latency
+        self.settings: Dict[int, Dict[str, Any]] = {}
+        self.routes: Dict[int, Dict[str, int]] = {}
+        self.ignores: Dict[int, set] = {}
+        self.watch_terms: Dict[int, Dict[str, bool]] = {}
+        self.voice_stats: Dict[tuple, list] = {}
+        self.queries: Counter = Counter()
+        self.voice_sessions = 0
+        self.log_events = 0
+        self.pool = FakePool(FakeConnection(self))
+
+    def add_guild(self, guild_id: int, log_channel_id: int, language: str = "en",
+                  log_types: str = ALL_TYPES_ENABLED) -> None:
+        self.settings[guild_id] = {
+            "log_channel_id": log_channel_id,
+            "logging_enabled": True,
+            "log_types": log_types,
+            "language": language,
+        }
+
+
+class FakeChannel:
+    """A text channel whose ``send`` behaves like a rate-limited REST endpoint.
+
+    Each channel owns a token bucket of ``burst`` messages refilled over
+    ``per`` seconds, which is how Discord limits message creation. When
+    the bucket is empty the send is answered with a simulated 429 and, like
+    disnake's HTTP client, sleeps for ``retry_after`` before retrying.
+    """
+
+    def __init__(self, channel_id: int, guild=None, latency: float = 0.0,
+                 burst: int = 5, per: float = 5.0, name: str = "logs"):
+        self.id = channel_id
+        self.guild = guild
+        self.name = name
+        self.mention = f"<#{channel_id}>"
+        self.latency = latency
+        self.burst = burst
+        self.per = per
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.sent = 0
+        self.rate_limited = 0
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        if self.burst:
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.burst / self.per)
+        self.updated = now
+
+    async def send(self, *args, **kwargs):
+        while True:
+            self._refill()
+            if not self.burst or self.tokens >= 1:
+                break
+            self.rate_limited += 1
+            metrics.rate_limited.inc("bucket")
+            await asyncio.sleep((1 - self.tokens) * self.per / self.burst)
+        if self.burst:
+            self.tokens -= 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        self.sent += 1
+        return SimpleNamespace(id=next_id(), channel=self, **kwargs)
+
+    def __str__(self) -> str:
+        return self.name
+
+
+class FakeBot:
+    """Just enough of ``commands.InteractionBot`` for the cogs to run."""
+
+    def __init__(self, db=None, fetch_latency: float = 0.0):
+        self.db = db
+        self.channels: Dict[int, FakeChannel] = {}
+        self.guilds = []
+        self.fetch_latency = fetch_latency
+        self.loop = asyncio.get_running_loop()
+        self.user = SimpleNamespace(id=next_id(), name="logger", bot=True, mention="<@0>")
+
+    def get_channel(self, channel_id: int):
+        return self.channels.get(channel_id)
+
+    async def fetch_channel(self, channel_id: int):
+        if self.fetch_latency:
+            await asyncio.sleep(self.fetch_latency)
+        return self.channels[channel_id]
+
+    def get_guild(self, guild_id: int):
+        return next((guild for guild in self.guilds if guild.id == guild_id), None)
+
+
+def make_guild(name: str = "bench", object_id: Optional[int] = None) -> SimpleNamespace:
+    guild = SimpleNamespace(id=object_id or next_id(), name=name, icon=None, members=[], text_channels=[],
+                            voice_channels=[], roles=[])
+    guild.get_channel = lambda channel_id: next(
+        (c for c in guild.text_channels + guild.voice_channels if c.id == channel_id), None)
+    guild.get_member = lambda member_id: next((m for m in guild.members if m.id == member_id), None)
+    return guild
+
+
+def make_role(guild, name: str = "role", object_id: Optional[int] = None) -> SimpleNamespace:
+    role_id = object_id or next_id()
+    role = SimpleNamespace(id=role_id, name=name, mention=f"<@&{role_id}>", guild=guild)
+    guild.roles.append(role)
+    return role
+
+
+def make_text_channel(guild, name: str = "general", object_id: Optional[int] = None) -> FakeChannel:
+    channel = FakeChannel(object_id or next_id(), guild=guild, name=name)
+    channel.category_id = None
+    guild.text_channels.append(channel)
+    return channel
+
+
+def make_voice_channel(guild, name: str = "voice", object_id: Optional[int] = None) -> SimpleNamespace:
+    channel_id = object_id or next_id()
+    channel = SimpleNamespace(id=channel_id, name=name, mention=f"<#{channel_id}>", guild=guild,
+                              category_id=None, members=[])
+    guild.voice_channels.append(channel)
+    return channel
+
+
+def make_member(guild, bot: bool = False, roles=(), object_id: Optional[int] = None) -> SimpleNamespace:
+    member_id = object_id or next_id()
+    name = f"user{member_id % 100000}"
+    member = SimpleNamespace(
+        id=member_id, name=name, display_name=name, nick=None, bot=bot, guild=guild,
+        mention=f"<@{member_id}>", roles=list(roles), avatar=None, display_avatar=None,
+        pending=False, current_timeout=None, communication_disabled_until=None,
+        joined_at=datetime.now(), created_at=datetime.now() - timedelta(days=365),
+    )
+    guild.members.append(member)
+    return member
+
+
+def make_message(guild, channel, author, content: str = "hello world",
+                 object_id: Optional[int] = None) -> SimpleNamespace:
+    message_id = object_id or next_id()
+    return SimpleNamespace(
+        id=message_id, guild=guild, channel=channel, author=author, content=content,
+        mentions=[], role_mentions=[], mention_everyone=False, attachments=[],
+        created_at=datetime.now(), edited_at=None,
+        jump_url=f"https://discord.com/channels/{guild.id}/{channel.id}/{message_id}",
+    )
+
+
+def make_voice_state(channel=None, self_mute: bool = False, self_deaf: bool = False) -> SimpleNamespace:
+    return SimpleNamespace(channel=channel, self_mute=self_mute, self_deaf=self_deaf,
+                           mute=False, deaf=False, self_stream=False, self_video=False)
+
+
+def make_reaction(message, emoji: str = "👍") -> SimpleNamespace:
+    return SimpleNamespace(emoji=emoji, message=message, count=1)
+
+
+def make_automod_execution(guild, channel, member, content: str = "bad words") -> SimpleNamespace:
+    action = SimpleNamespace(type=SimpleNamespace(name="block_message"),
+                             metadata=SimpleNamespace(duration=None))
+    return SimpleNamespace(guild=guild, channel=channel, member=member, content=content,
+                           rule_name="bench rule", rule_id=next_id(), actions=[action])
+
+
+def random_text(rng: random.Random, words: int = 8) -> str:
+    vocabulary = ("lorem", "ipsum", "dolor", "sit", "amet", "raid", "hello", "gg", "lol", "voice")
+    return " ".join(rng.choice(vocabulary) for _ in range(words))
@@ -0,0 +1,243 @@
+"""Replay a recording made by ``utils.recorder.EventRecorder`` into the ``Listeners`` cog.
+
+Every anonymized guild, channel, member and role in the recording is
+materialised as a fake object the first time it is referenced, message
+bodies are regenerated at their recorded length, and events are dispatched
+at their recorded offsets divided by ``--speed``::
+
+    python -m bench.replay logs/events-20260101-120000.jsonl.gz --speed 10
+    python -m bench.replay incident.jsonl.gz --speed 0 --profile replay.prof
+"""
+import argparse
+import asyncio
+import cProfile
+import json
+import time
+from collections import defaultdict
+from datetime import datetime
+from types import SimpleNamespace
+from typing import Dict, List
+
+from bench.fakes import (
+    FakeBot, FakeDatabase, make_automod_execution, make_guild, make_member, make_message, make_reaction,
+    make_role, make_text_channel, make_voice_channel, make_voice_state,
+)
+from bench.run import percentile, print_report
+from cogs.listeners import Listeners
+from utils.recorder import FLAG_DEAF, FLAG_MUTE, read_recording
+
+
+class ReplayWorld:
+    """Creates fake objects on demand for the anonymized ids of a recording."""
+
+    def __init__(self, bot: FakeBot, db: FakeDatabase, send_latency: float, burst: int, per: float):
+        self.bot = bot
+        self.db = db
+        self.send_latency = send_latency
+        self.burst = burst
+        self.per = per
+        self.guilds: Dict[int, SimpleNamespace] = {}
+        self.channels: Dict[int, object] = {}
+        self.members: Dict[tuple, SimpleNamespace] = {}
+        self.roles: Dict[int, SimpleNamespace] = {}
+
+    def guild(self, guild_id):
+        guild = self.guilds.get(guild_id)
+        if guild is None:
+            guild = self.guilds[guild_id] = make_guild(f"guild-{len(self.guilds)}", object_id=guild_id)
+            log_channel = make_text_channel(guild, "logs")
+            log_channel.latency, log_channel.burst, log_channel.per = self.send_latency, self.burst, self.per
+            log_channel.tokens = float(self.burst)
+            guild.log_channel = log_channel
+            self.bot.channels[log_channel.id] = log_channel
+            self.bot.guilds.append(guild)
+            self.db.add_guild(guild.id, log_channel.id)
+        return guild
+
+    def text_channel(self, guild, channel_id):
+        channel = self.channels.get(channel_id)
+        if channel is None:
+            channel = self.channels[channel_id] = make_text_channel(guild, f"text-{len(self.channels)}",
+                                                                    object_id=channel_id)
+        return channel
+
+    def voice_channel(self, guild, channel_id):
+        if channel_id is None:
+            return None
+        channel = self.channels.get(channel_id)
+        if channel is None:
+            channel = self.channels[channel_id] = make_voice_channel(guild, f"voice-{len(self.channels)}",
+                                                                     object_id=channel_id)
+        return channel
+
+    def role(self, guild, role_id):
+        role = self.roles.get(role_id)
+        if role is None:
+            role = self.roles[role_id] = make_role(guild, f"role-{len(self.roles)}", object_id=role_id)
+        return role
+
+    def member(self, guild, user_id, bot=False):
+        key = (guild.id, user_id)
+        member = self.members.get(key)
+        if member is None:
+            member = self.members[key] = make_member(guild, bot=bool(bot), object_id=user_id)
+        return member
+
+    def message(self, record):
+        guild = self.guild(record["g"])
+        channel = self.text_channel(guild, record["c"])
+        author = self.member(guild, record["u"], record.get("b"))
+        message = make_message(guild, channel, author, "x" * record.get("n", 0), object_id=record.get("m"))
+        message.mentions = [self.member(guild, user_id) for user_id in record.get("mu", ())]
+        message.role_mentions = [self.role(guild, role_id) for role_id in record.get("mr", ())]
+        return message
+
+    def build(self, record):
+        """Return ``(handler name, args)`` for one recorded event."""
+        event = record["e"]
+        guild = self.guild(record["g"]) if record.get("g") is not None else None
+
+        if event in ("message", "message_delete"):
+            return f"on_{event}", (self.message(record),)
+        if event == "message_edit":
+            after = self.message(record)
+            before = make_message(guild, after.channel, after.author, "x" * record.get("n0", 0), object_id=after.id)
+            return "on_message_edit", (before, after)
+        if event == "bulk_message_delete":
+            first = self.message(record)
+            return "on_bulk_message_delete", ([first] * record.get("k", 1),)
+        if event in ("member_join", "member_remove"):
+            return f"on_{event}", (self.member(guild, record["u"], record.get("b")),)
+        if event == "member_update":
+            member = self.member(guild, record["u"], record.get("b"))
+            before = SimpleNamespace(**vars(member))
+            before.roles = [self.role(guild, role_id) for role_id in record.get("r0", ())]
+            member.roles = [self.role(guild, role_id) for role_id in record.get("r1", ())]
+            if record.get("d"):
+                before.display_name = member.display_name + "~"
+            return "on_member_update", (before, member)
+        if event in ("member_ban", "member_unban"):
+            return f"on_{event}", (guild, self.member(guild, record["u"], record.get("b")))
+        if event == "voice_state_update":
+            member = self.member(guild, record["u"], record.get("b"))
+            states = []
+            for channel_key, flags_key in (("c0", "f0"), ("c1", "f1")):
+                flags = record.get(flags_key, 0)
+                states.append(make_voice_state(self.voice_channel(guild, record.get(channel_key)),
+                                               self_mute=bool(flags & FLAG_MUTE), self_deaf=bool(flags & FLAG_DEAF)))
+            return "on_voice_state_update", (member, *states)
+        if event in ("reaction_add", "reaction_remove"):
+            message = self.message(record)
+            return f"on_{event}", (make_reaction(message, record.get("em", "👍")),
+                                   self.member(guild, record.get("r"), record.get("rb")))
+        if event == "reaction_clear":
+            message = self.message(record)
+            return "on_reaction_clear", (message, [make_reaction(message)] * record.get("k", 1))
+        if event == "typing":
+            channel = self.text_channel(guild, record["c"])
+            return "on_typing", (channel, self.member(guild, record["u"], record.get("b")), datetime.now())
+        if event in ("guild_channel_create", "guild_channel_delete"):
+            return f"on_{event}", (self.text_channel(guild, record["c"]),)
+        if event == "guild_channel_update":
+            channel = self.text_channel(guild, record["c"])
+            return "on_guild_channel_update", (channel, channel)
+        if event in ("thread_create", "thread_delete"):
+            thread = SimpleNamespace(id=record["c"], name=f"thread-{record['c'] % 10000}", guild=guild, parent=None)
+            return f"on_{event}", (thread,)
+        if event == "automod_action":
+            channel = self.text_channel(guild, record["c"]) if record.get("c") is not None else None
+            execution = make_automod_execution(guild, channel, self.member(guild, record["u"]), "x" * record.get("n", 0))
+            return "on_automod_action", (execution,)
+        return None
+
+
+async def replay(args) -> Dict:
+    db = FakeDatabase(latency=args.db_latency)
+    bot = FakeBot(db, fetch_latency=args.fetch_latency)
+    world = ReplayWorld(bot, db, args.send_latency, args.burst, args.per)
+    cog = Listeners(bot)
+
+    events = []
+    for record in read_recording(args.recording):
+        built = world.build(record)
+        if built is not None:
+            events.append((record["t"] / 1000, record["e"], getattr(cog, built[0]), built[1]))
+
+    latencies: Dict[str, List[float]] = defaultdict(list)
+
+    async def fire(name, handler, payload):
+        started = time.perf_counter()
+        await handler(*payload)
+        latencies[name].append(time.perf_counter() - started)
+
+    profiler = cProfile.Profile() if args.profile else None
+    if profiler:
+        profiler.enable()
+
+    # Started alongside the first events like ``on_ready``, so early events wait for their guild's chunk.
+    warmup = None if args.cold else asyncio.create_task(db.warm_guild_configs([guild.id for guild in bot.guilds]))
+    tasks = []
+    started = time.perf_counter()
+    origin = events[0][0] if events else 0
+    for offset, name, handler, payload in events:
+        if args.speed:
+            delay = started + (offset - origin) / args.speed - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(fire(name, handler, payload)))
+    await asyncio.gather(*tasks, *([warmup] if warmup else []))
+    elapsed = time.perf_counter() - started
+
+    if profiler:
+        profiler.disable()
+        profiler.dump_stats(args.profile)
+
+    count = len(events) or 1
+    report = {
+        "events": len(events),
+        "elapsed_s": elapsed,
+        "events_per_s": len(events) / elapsed if elapsed else 0.0,
+        "db_queries_per_event": sum(db.queries.values()) / count,
+        "db_queries": dict(db.queries),
+        "sent": sum(guild.log_channel.sent for guild in world.guilds.values()),
+        "rate_limited_429": sum(guild.log_channel.rate_limited for guild in world.guilds.values()),
+        "latency_ms": {},
+    }
+    all_samples = [sample for samples in latencies.values() for sample in samples]
+    for name, samples in [("all", all_samples)] + sorted(latencies.items()):
+        if samples:
+            ordered = sorted(samples)
+            report["latency_ms"][name] = {
+                "n": len(ordered),
+                "p50": percentile(ordered, 0.50) * 1000,
+                "p95": percentile(ordered, 0.95) * 1000,
+                "p99": percentile(ordered, 0.99) * 1000,
+            }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a recorded gateway event stream offline")
+    parser.add_argument("recording", help="file written by the event recorder (.jsonl.gz)")
+    parser.add_argument("--speed", type=float, default=1.0,
+                        help="replay speed multiplier (1 = real time, 0 = as fast as possible)")
+    parser.add_argument("--db-latency", type=float, default=0.0, help="seconds per fake DB query")
+    parser.add_argument("--cold", action="store_true",
+                        help="skip the startup config warm-up, so every guild loads on its first event")
+    parser.add_argument("--send-latency", type=float, default=0.0, help="seconds per fake channel.send")
+    parser.add_argument("--fetch-latency", type=float, default=0.0, help="seconds per fake fetch_channel")
+    parser.add_argument("--burst", type=int, default=5, help="sends per log channel per --per seconds")
+    parser.add_argument("--per", type=float, default=5.0)
+    parser.add_argument("--profile", help="write cProfile stats of the replay to this file")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    report = asyncio.run(replay(args))
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,298 @@
+"""Offline throughput benchmark for ``cogs/listeners.py``.
+
+Drives the ``Listeners`` handlers with synthetic gateway objects against
+``FakeDatabase`` and rate-limited ``FakeChannel`` log channels, so it needs
+neither Discord nor Postgres::
+
+    python -m bench.run --events 5000 --guilds 20 --rate 0 --db-latency 0.002
+    python -m bench.run --events 2000 --rate 500 --allocations --json
+    python -m bench.run --events 5000 --burst 5 --per 5 --route-categories
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Tuple
+
+from bench.fakes import (
+    ALL_TYPES_ENABLED, FakeBot, FakeChannel, FakeDatabase, make_automod_execution, make_guild, make_member,
+    make_message, make_reaction, make_role, make_text_channel, make_voice_channel, make_voice_state, next_id,
+    random_text,
+)
+from cogs.listeners import Listeners
+from utils.guild_config import LOG_CATEGORIES
+
+DEFAULT_MIX = {
+    "message": 40,
+    "message_edit": 8,
+    "message_delete": 6,
+    "reaction_add": 15,
+    "reaction_remove": 5,
+    "voice": 12,
+    "member_join": 4,
+    "member_remove": 3,
+    "member_update": 5,
+    "automod_action": 2,
+}
+
+
+class World:
+    """A handful of synthetic guilds with members, channels and roles."""
+
+    def __init__(self, bot: FakeBot, db: FakeDatabase, guilds: int, members: int, rng: random.Random,
+                 send_latency: float, burst: int, per: float, route_categories: bool = False,
+                 log_types: str = ALL_TYPES_ENABLED):
+        self.rng = rng
+        self.guilds = []
+        for index in range(guilds):
+            guild = make_guild(f"guild-{index}")
+            log_channel = make_text_channel(guild, "logs")
+            log_channel.latency, log_channel.burst, log_channel.per = send_latency, burst, per
+            log_channel.tokens = float(burst)
+            bot.channels[log_channel.id] = log_channel
+            db.add_guild(guild.id, log_channel.id, log_types=log_types)
+            guild.log_channels = [log_channel]
+            if route_categories:
+                # One channel per category, each with its own rate-limit bucket.
+                for category in LOG_CATEGORIES[1:]:
+                    channel = FakeChannel(next_id(), guild=guild, latency=send_latency, burst=burst, per=per,
+                                          name=f"logs-{category}")
+                    bot.channels[channel.id] = channel
+                    db.routes.setdefault(guild.id, {})[category] = channel.id
+                    guild.log_channels.append(channel)
+            for name in ("general", "memes", "bot-spam"):
+                make_text_channel(guild, name)
+            make_voice_channel(guild, "lobby")
+            make_voice_channel(guild, "gaming")
+            roles = [make_role(guild, f"role-{n}") for n in range(5)]
+            for _ in range(members):
+                make_member(guild, roles=rng.sample(roles, 2))
+            bot.guilds.append(guild)
+            self.guilds.append(guild)
+
+    def pick(self):
+        guild = self.rng.choice(self.guilds)
+        channel = self.rng.choice(guild.text_channels[1:])
+        member = self.rng.choice(guild.members)
+        return guild, channel, member
+
+    def message(self):
+        guild, channel, member = self.pick()
+        return make_message(guild, channel, member, random_text(self.rng))
+
+
+def build_generators(world: World) -> Dict[str, Callable[[], Tuple[str, tuple]]]:
+    rng = world.rng
+
+    def message():
+        return "on_message", (world.message(),)
+
+    def message_edit():
+        before = world.message()
+        after = make_message(before.guild, before.channel, before.author, random_text(rng))
+        return "on_message_edit", (before, after)
+
+    def message_delete():
+        return "on_message_delete", (world.message(),)
+
+    def reaction_add():
+        message = world.message()
+        return "on_reaction_add", (make_reaction(message), rng.choice(message.guild.members))
+
+    def reaction_remove():
+        message = world.message()
+        return "on_reaction_remove", (make_reaction(message), rng.choice(message.guild.members))
+
+    def voice():
+        guild, _, member = world.pick()
+        lobby, gaming = guild.voice_channels
+        before, after = rng.choice((
+            (make_voice_state(None), make_voice_state(lobby)),
+            (make_voice_state(lobby), make_voice_state(None)),
+            (make_voice_state(lobby), make_voice_state(gaming)),
+            (make_voice_state(lobby), make_voice_state(lobby, self_mute=True)),
+            (make_voice_state(gaming, self_deaf=True), make_voice_state(gaming)),
+        ))
+        return "on_voice_state_update", (member, before, after)
+
+    def member_join():
+        guild = rng.choice(world.guilds)
+        return "on_member_join", (make_member(guild),)
+
+    def member_remove():
+        guild, _, member = world.pick()
+        return "on_member_remove", (member,)
+
+    def member_update():
+        guild, _, before = world.pick()
+        after = make_member(guild, roles=before.roles[:1] + rng.sample(guild.roles, 1))
+        after.id, after.mention = before.id, before.mention
+        if rng.random() < 0.5:
+            after.nick = after.display_name = before.display_name + "*"
+        guild.members.pop()
+        return "on_member_update", (before, after)
+
+    def automod_action():
+        guild, channel, member = world.pick()
+        return "on_automod_action", (make_automod_execution(guild, channel, member),)
+
+    return {
+        "message": message, "message_edit": message_edit, "message_delete": message_delete,
+        "reaction_add": reaction_add, "reaction_remove": reaction_remove, "voice": voice,
+        "member_join": member_join, "member_remove": member_remove, "member_update": member_update,
+        "automod_action": automod_action,
+    }
+
+
+def parse_mix(value: str) -> Dict[str, int]:
+    if not value:
+        return dict(DEFAULT_MIX)
+    mix = {}
+    for item in value.split(","):
+        name, weight = item.split(":")
+        mix[name.strip()] = int(weight)
+    return mix
+
+
+def percentile(ordered: List[float], fraction: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+async def run_benchmark(args) -> Dict:
+    rng = random.Random(args.seed)
+    db = FakeDatabase(latency=args.db_latency)
+    bot = FakeBot(db, fetch_latency=args.fetch_latency)
+    world = World(bot, db, args.guilds, args.members, rng, args.send_latency, args.burst, args.per,
+                  args.route_categories, args.log_types)
+
+    cog = Listeners(bot)
+
+    generators = build_generators(world)
+    mix = parse_mix(args.mix)
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    events = []
+    for name in rng.choices(names, weights=weights, k=args.events):
+        handler_name, payload = generators[name]()
+        events.append((name, getattr(cog, handler_name), payload))
+
+    latencies: Dict[str, List[float]] = {name: [] for name in names}
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def fire(name, handler, payload):
+        try:
+            started = time.perf_counter()
+            await handler(*payload)
+            latencies[name].append(time.perf_counter() - started)
+        finally:
+            semaphore.release()
+
+    if args.allocations:
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+
+    interval = 1 / args.rate if args.rate else 0
+    # Started alongside the first events like ``on_ready``, so early events wait for their guild's chunk.
+    warmup = None if args.cold else asyncio.create_task(db.warm_guild_configs([guild.id for guild in bot.guilds]))
+    tasks = []
+    started = time.perf_counter()
+    for index, (name, handler, payload) in enumerate(events):
+        if interval:
+            delay = started + index * interval - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        await semaphore.acquire()
+        tasks.append(asyncio.create_task(fire(name, handler, payload)))
+    await asyncio.gather(*tasks, *([warmup] if warmup else []))
+    elapsed = time.perf_counter() - started
+
+    report = {
+        "events": args.events,
+        "elapsed_s": elapsed,
+        "events_per_s": args.events / elapsed if elapsed else 0.0,
+        "db_queries_per_event": sum(db.queries.values()) / args.events,
+        "db_queries": dict(db.queries),
+        "sent": sum(channel.sent for guild in world.guilds for channel in guild.log_channels),
+        "rate_limited_429": sum(channel.rate_limited for guild in world.guilds for channel in guild.log_channels),
+        "latency_ms": {},
+    }
+
+    if args.allocations:
+        after = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        stats = after.compare_to(before, "filename")
+        report["allocations"] = {
+            "peak_kib": peak / 1024,
+            "net_kib_per_event": sum(stat.size_diff for stat in stats) / 1024 / args.events,
+            "net_blocks_per_event": sum(stat.count_diff for stat in stats) / args.events,
+        }
+
+    for name, samples in [("all", [s for values in latencies.values() for s in values])] + list(latencies.items()):
+        if not samples:
+            continue
+        ordered = sorted(samples)
+        report["latency_ms"][name] = {
+            "n": len(ordered),
+            "p50": percentile(ordered, 0.50) * 1000,
+            "p95": percentile(ordered, 0.95) * 1000,
+            "p99": percentile(ordered, 0.99) * 1000,
+        }
+    return report
+
+
+def print_report(report: Dict) -> None:
+    print(f"events            {report['events']}")
+    print(f"elapsed           {report['elapsed_s']:.3f} s")
+    print(f"throughput        {report['events_per_s']:.1f} events/s")
+    print(f"db queries/event  {report['db_queries_per_event']:.2f}  {report['db_queries']}")
+    print(f"embeds sent       {report['sent']}  (simulated 429s: {report['rate_limited_429']})")
+    if "allocations" in report:
+        allocations = report["allocations"]
+        print(f"allocations       peak {allocations['peak_kib']:.1f} KiB, "
+              f"net {allocations['net_kib_per_event']:.3f} KiB / "
+              f"{allocations['net_blocks_per_event']:.2f} blocks per event")
+    print()
+    print(f"{'event':<18}{'n':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name, stats in report["latency_ms"].items():
+        print(f"{name:<18}{stats['n']:>7}{stats['p50']:>10.2f}{stats['p95']:>10.2f}{stats['p99']:>10.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Listeners cog without Discord or Postgres")
+    parser.add_argument("--events", type=int, default=5000, help="number of events to dispatch")
+    parser.add_argument("--rate", type=float, default=0, help="events per second (0 = as fast as possible)")
+    parser.add_argument("--concurrency", type=int, default=256, help="max handlers in flight")
+    parser.add_argument("--guilds", type=int, default=10)
+    parser.add_argument("--members", type=int, default=50, help="members per guild")
+    parser.add_argument("--mix", default="", help="weights, e.g. message:50,voice:10,reaction_add:40")
+    parser.add_argument("--db-latency", type=float, default=0.0, help="seconds per fake DB query")
+    parser.add_argument("--cold", action="store_true",
+                        help="skip the startup config warm-up, so every guild loads on its first event")
+    parser.add_argument("--send-latency", type=float, default=0.0, help="seconds per fake channel.send")
+    parser.add_argument("--fetch-latency", type=float, default=0.0, help="seconds per fake fetch_channel")
+    parser.add_argument("--burst", type=int, default=0,
+                        help="sends allowed per log channel per --per seconds before 429s (0 = unlimited)")
+    parser.add_argument("--per", type=float, default=5.0)
+    parser.add_argument("--route-categories", action="store_true",
+                        help="route every category but 'message' to its own log channel")
+    parser.add_argument("--log-types", default=ALL_TYPES_ENABLED,
+                        help="log_types of every guild, e.g. message:1,voice:digest,reaction_add:archive")
+    parser.add_argument("--allocations", action="store_true", help="track allocations with tracemalloc")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    report = asyncio.run(run_benchmark(args))
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+
+if __name__ == "__main__":
+    main()
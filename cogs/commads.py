@@ -1,21 +1,41 @@
+import contextlib
+import io
 import logging
+from typing import Optional
+
 from disnake.ext import commands
 import disnake
 
-from utils.database import Database
-from utils.view import BotSettingsView
-from config import messages, bot_settings
+from utils.archive import parse_date
+from utils.database import QUERIES, format_query_stats
+from utils.export import COMPRESSIONS, FORMATS, export_chunks, file_name
+from utils.guild_config import DELIVERY_MODES, LOG_CATEGORIES
+from utils.tracing import tracer
+from utils.view import LogSearchView, dispatch, settings_panel
+from utils.voice_sessions import format_duration
+from utils.watchlist import validate_term
+from config import messages, archive as archive_settings, export as export_settings, \
+    watchlist as watchlist_settings
+
+ROUTE_TARGETS = LOG_CATEGORIES + tuple(messages['en']['log_titles'])
 
 
 class Commands(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.db = Database()
+        self.db = bot.db
+        self.exporting = set()
+        # Running export tasks; the loop only keeps weak references to tasks.
+        self._exports = set()
 
     async def cog_load(self):
         await self.db.connect()
         logging.info("Database connected successfully")
 
+    def cog_unload(self):
+        for task in self._exports:
+            task.cancel()
+
     @commands.slash_command(name="ping", description="Check bot latency")
     async def ping(self, inter):
         lang = await self.db.get_language(inter.guild.id)
@@ -27,34 +47,340 @@ class Commands(commands.Cog):
 
     @commands.slash_command(name="settings", description="Show bot settings")
     async def settings(self, inter: disnake.ApplicationCommandInteraction):
+        config = await self.db.get_guild_config(inter.guild.id)
+        embed, components = settings_panel(self.bot, inter.guild, config)
+        await inter.response.send_message(embed=embed, components=components, ephemeral=True)
+
+    @commands.Cog.listener("on_message_interaction")
+    async def on_settings_interaction(self, inter: disnake.MessageInteraction):
+        # Settings components are stateless, so this one listener serves every panel ever sent, across restarts.
+        await dispatch(self.db, inter)
+
+    @commands.slash_command(name="voicestats", description="Show voice activity statistics for this server")
+    async def voicestats(self, inter: disnake.ApplicationCommandInteraction):
+        lang = await self.db.get_language(inter.guild.id) or "en"
+        stats = await self.db.get_voice_stats(inter.guild.id)
+
+        embed = disnake.Embed(title=messages[lang]['voice_stats']['title'], color=0x2b2d31)
+        if not stats['sessions']:
+            embed.description = messages[lang]['voice_stats']['empty']
+        else:
+            embed.add_field(
+                name=messages[lang]['voice_stats']['total'],
+                value=format_duration(stats['total_seconds']),
+                inline=True
+            )
+            embed.add_field(name=messages[lang]['voice_stats']['sessions'], value=stats['sessions'], inline=True)
+            embed.add_field(name=messages[lang]['voice_stats']['members'], value=stats['members'], inline=True)
+            embed.add_field(
+                name=messages[lang]['voice_stats']['top'],
+                value="\n".join(
+                    f"{place}. <@{row['member_id']}> — {format_duration(row['total_seconds'])} ({row['sessions']})"
+                    for place, row in enumerate(stats['top'], start=1)
+                ),
+                inline=False
+            )
+        await inter.response.send_message(embed=embed, ephemeral=True)
+
+    @commands.slash_command(
+        name="timings",
+        description="Show per-stage logging pipeline timings",
+        default_member_permissions=disnake.Permissions(administrator=True)
+    )
+    async def timings(self, inter: disnake.ApplicationCommandInteraction):
         lang = await self.db.get_language(inter.guild.id) or "en"
-        view = BotSettingsView(self.bot, self.db, inter.guild)
+
+        if not tracer.enabled:
+            description = messages[lang]['tracing']['disabled']
+        elif not tracer.summary():
+            description = messages[lang]['tracing']['empty']
+        else:
+            description = f"```\n{tracer.format_summary()}\n```"
 
         embed = disnake.Embed(
-            title=messages[lang]['settings']['title'],
-            description=messages[lang]['settings']['description'],
+            title=messages[lang]['tracing']['title'],
+            description=description,
             color=0x2b2d31
         )
-        embed.add_field(
-            name=messages[lang]['settings']['developer'],
-            value=f"`{bot_settings['bot_author']}`",
-            inline=True
+        await inter.response.send_message(embed=embed, ephemeral=True)
+
+    @commands.slash_command(
+        name="dbstats",
+        description="Show call counts, total time and errors per database query",
+        default_member_permissions=disnake.Permissions(administrator=True)
+    )
+    async def dbstats(self, inter: disnake.ApplicationCommandInteraction):
+        lang = await self.db.get_language(inter.guild.id) or "en"
+
+        if not any(statement.calls for statement in QUERIES.values()):
+            description = messages[lang]['db_stats']['empty']
+        else:
+            description = f"```\n{format_query_stats()}\n```"
+
+        embed = disnake.Embed(
+            title=messages[lang]['db_stats']['title'],
+            description=description,
+            color=0x2b2d31
+        )
+        await inter.response.send_message(embed=embed, ephemeral=True)
+
+    @commands.slash_command(
+        name="routing",
+        description="Send log categories or single events to their own channels",
+        default_member_permissions=disnake.Permissions(manage_guild=True)
+    )
+    async def routing(self, inter: disnake.ApplicationCommandInteraction):
+        pass
+
+    @routing.sub_command(name="set", description="Send a category or event to a channel")
+    async def routing_set(self, inter: disnake.ApplicationCommandInteraction, target: str,
+                          channel: disnake.TextChannel):
+        lang = await self.db.get_language(inter.guild.id) or "en"
+        if target not in ROUTE_TARGETS:
+            await inter.response.send_message(
+                messages[lang]['routing']['invalid_target'].format(target=target), ephemeral=True
+            )
+            return
+
+        await self.db.set_route(inter.guild.id, target, channel.id)
+        await inter.response.send_message(
+            messages[lang]['routing']['set'].format(target=f"`{target}`", channel=channel.mention),
+            ephemeral=True
         )
+
+    @routing.sub_command(name="remove", description="Send a category or event back to the default channel")
+    async def routing_remove(self, inter: disnake.ApplicationCommandInteraction, target: str):
+        lang = await self.db.get_language(inter.guild.id) or "en"
+        key = 'removed' if await self.db.remove_route(inter.guild.id, target) else 'not_routed'
+        await inter.response.send_message(
+            messages[lang]['routing'][key].format(target=f"`{target}`"), ephemeral=True
+        )
+
+    @routing.sub_command(name="mode", description="Choose how a category or event is delivered")
+    async def routing_mode(self, inter: disnake.ApplicationCommandInteraction, target: str,
+                           mode: str = commands.Param(choices=list(DELIVERY_MODES))):
+        lang = await self.db.get_language(inter.guild.id) or "en"
+        if target not in ROUTE_TARGETS:
+            await inter.response.send_message(
+                messages[lang]['routing']['invalid_target'].format(target=target), ephemeral=True
+            )
+            return
+
+        key = 'mode_set' if await self.db.set_delivery_mode(inter.guild.id, target, mode) else 'not_configured'
+        await inter.response.send_message(
+            messages[lang]['routing'][key].format(target=f"`{target}`", mode=messages[lang]['delivery_modes'][mode]),
+            ephemeral=True
+        )
+
+    @routing.sub_command(name="list", description="Show where each category and event is sent")
+    async def routing_list(self, inter: disnake.ApplicationCommandInteraction):
+        config = await self.db.get_guild_config(inter.guild.id)
+        lang = config.language
+
+        embed = disnake.Embed(title=messages[lang]['routing']['title'], color=0x2b2d31)
         embed.add_field(
-            name=messages[lang]['settings']['version'],
-            value=bot_settings['bot_version'],
-            inline=True
+            name=messages[lang]['routing']['default'],
+            value=f"<#{config.log_channel_id}>" if config.log_channel_id else
+            messages[lang]['logging']['channel_not_set'],
+            inline=False
         )
-        embed.set_footer(text=messages[lang]['settings']['footer'])
-        embed.set_author(
-            icon_url=inter.guild.icon.url if inter.guild.icon else None,
-            name=inter.guild.name
+        if config.routes:
+            embed.description = "\n".join(
+                f"`{target}` → <#{channel_id}>" for target, channel_id in sorted(config.routes.items())
+            )
+        else:
+            embed.description = messages[lang]['routing']['empty']
+        modes = {target: mode for target, mode in config.modes.items() if mode in ("digest", "archive")}
+        if modes:
+            embed.add_field(
+                name=messages[lang]['routing']['modes'],
+                value="\n".join(f"`{target}`: {messages[lang]['delivery_modes'][mode]}"
+                                for target, mode in sorted(modes.items())),
+                inline=False
+            )
+        await inter.response.send_message(embed=embed, ephemeral=True)
+
+    @commands.slash_command(
+        name="watchlist",
+        description="Alert on messages containing watched words or patterns",
+        default_member_permissions=disnake.Permissions(manage_guild=True)
+    )
+    async def watchlist(self, inter: disnake.ApplicationCommandInteraction):
+        pass
+
+    @watchlist.sub_command(name="add", description="Watch for a word, or a regular expression")
+    async def watchlist_add(self, inter: disnake.ApplicationCommandInteraction, term: str, regex: bool = False):
+        config = await self.db.get_guild_config(inter.guild.id)
+        text = messages[config.language]['watchlist']
+        error = validate_term(term, regex)
+        if error == "length":
+            limit = watchlist_settings['max_regex_length' if regex else 'max_term_length']
+            await inter.response.send_message(text['too_long'].format(limit=limit), ephemeral=True)
+            return
+        if error == "nested":
+            await inter.response.send_message(text['nested'].format(term=f"`{term}`"), ephemeral=True)
+            return
+        if error:
+            await inter.response.send_message(text['invalid'].format(term=f"`{term}`", error=error), ephemeral=True)
+            return
+        if len(config.watch_terms) >= watchlist_settings['max_terms']:
+            await inter.response.send_message(
+                text['too_many'].format(limit=watchlist_settings['max_terms']), ephemeral=True
+            )
+            return
+
+        await self.db.add_watch_term(inter.guild.id, term, regex)
+        await inter.response.send_message(text['added'].format(term=f"`{term}`"), ephemeral=True)
+
+    @watchlist.sub_command(name="remove", description="Stop watching for a word or pattern")
+    async def watchlist_remove(self, inter: disnake.ApplicationCommandInteraction, term: str):
+        lang = await self.db.get_language(inter.guild.id) or "en"
+        key = 'removed' if await self.db.remove_watch_term(inter.guild.id, term) else 'not_found'
+        await inter.response.send_message(messages[lang]['watchlist'][key].format(term=f"`{term}`"), ephemeral=True)
+
+    @watchlist.sub_command(name="list", description="Show the watched words and patterns")
+    async def watchlist_list(self, inter: disnake.ApplicationCommandInteraction):
+        config = await self.db.get_guild_config(inter.guild.id)
+        text = messages[config.language]['watchlist']
+        lines = [f"`{term}` ({text['regex']})" if is_regex else f"`{term}`" for term, is_regex in config.watch_terms]
+        description = "\n".join(lines) or text['empty']
+        if len(description) > 4000:
+            description = description[:4000].rsplit("\n", 1)[0] + "\n…"
+        embed = disnake.Embed(title=f"{text['title']} ({len(lines)})", description=description, color=0x2b2d31)
+        await inter.response.send_message(embed=embed, ephemeral=True)
+
+    @watchlist_remove.autocomplete("term")
+    async def watch_term_autocomplete(self, inter: disnake.ApplicationCommandInteraction, value: str):
+        config = await self.db.get_guild_config(inter.guild.id)
+        return [term for term, _ in config.watch_terms if value.lower() in term.lower()][:25]
+
+    @commands.slash_command(
+        name="logs",
+        description="Browse the archived log history",
+        default_member_permissions=disnake.Permissions(manage_guild=True)
+    )
+    async def logs(self, inter: disnake.ApplicationCommandInteraction):
+        pass
+
+    async def parse_range(self, inter: disnake.ApplicationCommandInteraction, lang: str, since: Optional[str],
+                          until: Optional[str]) -> Optional[dict]:
+        """Parse the since/until options, answering the interaction with an error if one is invalid."""
+        dates = {}
+        for name, value in (("since", since), ("until", until)):
+            try:
+                dates[name] = parse_date(value)
+            except ValueError:
+                await inter.response.send_message(
+                    messages[lang]['archive']['invalid_date'].format(value=value), ephemeral=True
+                )
+                return None
+        return dates
+
+    @logs.sub_command(name="search", description="Search archived events by user, channel, event, time and text")
+    async def logs_search(self, inter: disnake.ApplicationCommandInteraction, user: disnake.User = None,
+                          channel: disnake.abc.GuildChannel = None, event: str = None, text: str = None,
+                          since: str = None, until: str = None):
+        lang = await self.db.get_language(inter.guild.id) or "en"
+        if not archive_settings['enabled']:
+            await inter.response.send_message(messages[lang]['archive']['disabled'], ephemeral=True)
+            return
+
+        dates = await self.parse_range(inter, lang, since, until)
+        if dates is None:
+            return
+
+        filters = {
+            "user_id": user.id if user else None,
+            "channel_id": channel.id if channel else None,
+            "event": event,
+            "since": dates["since"],
+            "text": text,
+        }
+        view = LogSearchView(self.db, inter.author.id, inter.guild.id, lang, filters, until=dates["until"])
+        await inter.response.send_message(embed=await view.load(), view=view, ephemeral=True)
+
+    @logs.sub_command(name="export", description="Download this server's archived events as compressed files")
+    async def logs_export(self, inter: disnake.ApplicationCommandInteraction, since: str = None, until: str = None,
+                          fmt: str = commands.Param(export_settings['format'], name="format", choices=list(FORMATS)),
+                          compression: str = commands.Param(export_settings['compression'],
+                                                            choices=list(COMPRESSIONS))):
+        lang = await self.db.get_language(inter.guild.id) or "en"
+        text = messages[lang]['archive']
+        if not archive_settings['enabled']:
+            await inter.response.send_message(text['disabled'], ephemeral=True)
+            return
+        if inter.guild.id in self.exporting:
+            await inter.response.send_message(text['export_running'], ephemeral=True)
+            return
+        dates = await self.parse_range(inter, lang, since, until)
+        if dates is None:
+            return
+
+        # Big exports outlast the interaction's 15 minute followup window, so files go to the user's DMs.
+        await inter.response.defer(ephemeral=True)
+        try:
+            dm = await inter.author.create_dm()
+            await dm.send(text['export_started'].format(guild=inter.guild.name))
+        except disnake.HTTPException:
+            await inter.followup.send(text['export_dm_closed'], ephemeral=True)
+            return
+        self.exporting.add(inter.guild.id)
+        task = self.bot.loop.create_task(
+            self.send_export(dm, inter.guild.id, dates["since"], dates["until"], fmt, compression, text)
         )
-        embed.set_thumbnail(
-            url=self.bot.user.avatar.url if self.bot.user.avatar else None
+        self._exports.add(task)
+        task.add_done_callback(self._exports.discard)
+        await inter.followup.send(text['export_queued'], ephemeral=True)
+
+    async def send_export(self, dm, guild_id, since, until, fmt, compression, text):
+        """Upload an export to ``dm`` part by part; runs as its own task, detached from the interaction."""
+        parts = 0
+        try:
+            # Each part is uploaded as soon as it is complete, so at most one part is held in memory.
+            buffer = io.BytesIO()
+            async with contextlib.aclosing(self.db.iter_log_events(guild_id, since, until)) as rows, \
+                    contextlib.aclosing(export_chunks(rows, fmt, compression, export_settings['part_size'])) as chunks:
+                async for part, chunk, last in chunks:
+                    buffer.write(chunk)
+                    if last:
+                        buffer.seek(0)
+                        await dm.send(file=disnake.File(buffer, filename=file_name(guild_id, fmt, compression, part)))
+                        buffer = io.BytesIO()
+                        parts += 1
+            await dm.send(text['exported'].format(parts=parts))
+        except Exception as e:
+            logging.error(f"Export for guild {guild_id} failed: {e}")
+            try:
+                await dm.send(text['export_failed'])
+            except disnake.HTTPException:
+                pass
+        finally:
+            self.exporting.discard(guild_id)
+
+    @logs.sub_command(name="retention", description="Set how long this server's archived events are kept")
+    async def logs_retention(self, inter: disnake.ApplicationCommandInteraction,
+                             days: commands.Range[int, 1, 3650] = None,
+                             redact_after: commands.Range[int, 0, 3650] = None):
+        lang = await self.db.get_language(inter.guild.id) or "en"
+        # An option left empty falls back to the bot-wide default.
+        await self.db.set_retention(inter.guild.id, days, redact_after)
+
+        text = messages[lang]['archive']
+        redact_days = archive_settings['redact_after_days'] if redact_after is None else redact_after
+        await inter.response.send_message(
+            text['retention_set'].format(
+                days=archive_settings['retention_days'] if days is None else days,
+                redact=text['redact_never'] if not redact_days else text['redact_after'].format(days=redact_days)
+            ),
+            ephemeral=True
         )
 
-        await inter.response.send_message(view=view, embed=embed, ephemeral=True)
+    @routing_set.autocomplete("target")
+    @routing_remove.autocomplete("target")
+    @routing_mode.autocomplete("target")
+    @logs_search.autocomplete("event")
+    async def route_target_autocomplete(self, inter: disnake.ApplicationCommandInteraction, value: str):
+        return [target for target in ROUTE_TARGETS if value.lower() in target][:25]
 
 
 def setup(bot):
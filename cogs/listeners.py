@@ -1,13 +1,30 @@
 import logging
 import os
+import time
 from datetime import datetime
 from logging.handlers import RotatingFileHandler
 
 import disnake
-from disnake.ext import commands
-
-from config import messages, log_colors
-from utils.database import Database
+from disnake.ext import commands, tasks
+
+from config import messages, log_colors, metrics as metrics_settings, tracing as tracing_settings, \
+    recorder as recorder_settings, voice_sessions as voice_settings, archive as archive_settings, \
+    digest as digest_settings, anomaly as anomaly_settings, spam as spam_settings, \
+    ghost_pings as ghost_ping_settings
+from utils import metrics
+from utils.anomaly import ALERTS as SPIKE_ALERTS, AnomalyDetector
+from utils.archive import EventArchive
+from utils.audit_log import AuditLogCorrelator
+from utils.digest import DigestBuffer
+from utils.diff import CHANNEL_FIELDS, GUILD_FIELDS, MEMBER_FIELDS, diff_attributes, diff_roles, \
+    render_changes, render_role_changes
+from utils.ghost_pings import GhostPingBuffer
+from utils.invites import InviteTracker
+from utils.recorder import EventRecorder
+from utils.retention import RetentionJob
+from utils.spam import DuplicateTracker
+from utils.tracing import tracer
+from utils.voice_sessions import VoiceSessionTracker, format_duration
 
 os.makedirs('./logs', exist_ok=True)
 listener_log = logging.getLogger("listener_events")
@@ -29,30 +46,255 @@ listener_log.propagate = False
 class Listeners(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.db = Database()
+        self.db = bot.db
+        self.metrics_server = metrics.MetricsServer() if metrics_settings['enabled'] else None
+        self.recorder = EventRecorder() if recorder_settings['enabled'] else None
+        self.voice_sessions = VoiceSessionTracker()
+        self.invites = InviteTracker()
+        self.audit_log = AuditLogCorrelator()
+        self.archive = EventArchive() if archive_settings['enabled'] else None
+        self.retention = RetentionJob(self.archive) if self.archive else None
+        self.digest = DigestBuffer()
+        self.anomalies = AnomalyDetector() if anomaly_settings['enabled'] else None
+        self.spam = DuplicateTracker() if spam_settings['enabled'] else None
+        self.ghost_pings = GhostPingBuffer() if ghost_ping_settings['enabled'] else None
 
     async def cog_load(self):
         await self.db.connect()
         logging.info("Database connected successfully")
+        if self.metrics_server:
+            await self.metrics_server.start()
+        if tracer.enabled:
+            self.log_timing_summary.start()
+        if self.recorder:
+            self.recorder.attach(self.bot)
+        self.voice_sessions.load_snapshot()
+        self.persist_voice_sessions.start()
+        self.post_digests.start()
+        if self.anomalies:
+            self.check_spikes.start()
+        if self.spam:
+            self.check_spam_bursts.start()
+        if self.archive:
+            self.flush_archive.start()
+            self.maintain_archive.start()
+
+    def cog_unload(self):
+        if self.metrics_server:
+            self.bot.loop.create_task(self.metrics_server.stop())
+        if self.recorder:
+            self.bot.loop.create_task(self.recorder.detach(self.bot))
+        self.log_timing_summary.cancel()
+        self.persist_voice_sessions.cancel()
+        self.post_digests.cancel()
+        self.check_spikes.cancel()
+        self.check_spam_bursts.cancel()
+        self.bot.loop.create_task(self.save_voice_sessions())
+        if self.archive:
+            self.flush_archive.cancel()
+            self.maintain_archive.cancel()
+            self.bot.loop.create_task(self.archive.flush(self.db))
+
+    @tasks.loop(seconds=tracing_settings['summary_interval'])
+    async def log_timing_summary(self):
+        if tracer.summary():
+            listener_log.info("Pipeline timings (ms):\n%s", tracer.format_summary())
+
+    @tasks.loop(seconds=voice_settings['snapshot_interval'])
+    async def persist_voice_sessions(self):
+        await self.save_voice_sessions()
+
+    @tasks.loop(seconds=digest_settings['interval'])
+    async def post_digests(self):
+        for guild_id, channel_id, events in self.digest.drain():
+            try:
+                await self.send_digest(guild_id, channel_id, events)
+            except Exception as e:
+                listener_log.error("Failed to post digest for guild %s: %s", guild_id, e)
+
+    async def send_digest(self, guild_id, channel_id, events):
+        channel = await self.get_channel(channel_id)
+        if channel is None:
+            for entry in events.values():
+                metrics.events_dropped.inc(entry.log_type, "no_channel", amount=entry.count)
+            return
+
+        lang = await self.get_lang(guild_id)
+        embed = disnake.Embed(
+            title=messages[lang]['digest']['title'].format(minutes=round(digest_settings['interval'] / 60)),
+            description=self.digest.render(events, messages[lang]['log_titles']),
+            color=log_colors["info"],
+            timestamp=datetime.now()
+        )
+        metrics.outbound_queue_depth.inc("channel_send")
+        try:
+            await channel.send(embed=embed)
+        finally:
+            metrics.outbound_queue_depth.dec("channel_send")
+
+    @tasks.loop(seconds=anomaly_settings['window'] / anomaly_settings['buckets'])
+    async def check_spikes(self):
+        for guild_id, spike in self.anomalies.expire():
+            guild = self.bot.get_guild(guild_id)
+            if guild is None:
+                continue
+            try:
+                await self.send_spike_summary(guild, spike)
+            except Exception as e:
+                listener_log.error("Failed to post spike summary for guild %s: %s", guild_id, e)
+
+    async def watch_rate(self, guild, title_key):
+        """Count an event towards spike detection and send the alert when a spike starts.
+
+        Returns True while the category of ``title_key`` is spiking in ``guild``; ``send_log_embed``
+        then folds its events into the spike summary, so callers can skip expensive lookups.
+        """
+        if self.anomalies is None or guild is None:
+            return False
+        spike = self.anomalies.record(guild.id, title_key)
+        if spike is None:
+            return False
+        if not spike.alerted:
+            spike.alerted = True
+            window = self.anomalies.windows[(guild.id, title_key)]
+            lang = await self.get_lang(guild.id)
+            await self.send_log_embed(
+                guild,
+                spike.category,
+                'spike_start',
+                messages[lang]['anomaly']['start'].format(
+                    event=messages[lang]['log_titles'].get(title_key, title_key),
+                    count=window.total,
+                    window=round(anomaly_settings['window']),
+                    usual=round(window.baseline * self.anomalies.buckets, 1)
+                ),
+                "alert"
+            )
+        return True
+
+    async def send_spike_summary(self, guild, spike):
+        lang = await self.get_lang(guild.id)
+        duration = format_duration(time.time() - spike.started)
+        lines = [
+            messages[lang]['anomaly']['end'].format(
+                event=messages[lang]['log_titles'].get(event, event), count=count, duration=duration
+            )
+            for event, count in sorted(spike.counts.items(), key=lambda item: -item[1])
+        ]
+        if spike.users:
+            lines.append(messages[lang]['anomaly']['users'].format(
+                users=", ".join(f"<@{user_id}>" for user_id in spike.users)
+            ))
+        await self.send_log_embed(guild, spike.category, 'spike_end', "\n".join(lines), "warning")
+
+    @tasks.loop(seconds=spam_settings['window'] / 3)
+    async def check_spam_bursts(self):
+        for burst in self.spam.expire():
+            guild = self.bot.get_guild(burst.guild_id)
+            if guild is None:
+                continue
+            try:
+                if burst.confirmed:
+                    await self.send_spam_burst(guild, burst)
+                else:
+                    for message in burst.held:
+                        await self.log_new_message(message)
+            except Exception as e:
+                listener_log.error("Failed to log spam burst for guild %s: %s", burst.guild_id, e)
+
+    async def send_spam_burst(self, guild, burst):
+        # The first copy was logged when it was posted.
+        metrics.events_suppressed.inc('message', "spam", amount=burst.count - 1)
+        lang = await self.get_lang(guild.id)
+        await self.send_log_embed(
+            guild,
+            'message',
+            'spam_burst',
+            messages[lang]['spam']['burst'].format(
+                user=f"<@{burst.user_id}>",
+                user_id=burst.user_id,
+                count=burst.count,
+                duration=format_duration(burst.last - burst.started),
+                channels=", ".join(f"<#{channel_id}> ({count})" for channel_id, count in burst.channels.items()),
+                content=burst.preview
+            ),
+            "alert",
+            user=disnake.Object(burst.user_id), content=burst.preview
+        )
+
+    @tasks.loop(seconds=archive_settings['flush_interval'])
+    async def flush_archive(self):
+        await self.archive.flush(self.db)
+
+    @tasks.loop(seconds=archive_settings['maintenance_interval'])
+    async def maintain_archive(self):
+        try:
+            await self.retention.run(self.db)
+        except Exception as e:
+            listener_log.error("Archive maintenance failed: %s", e)
+
+    async def save_voice_sessions(self):
+        await self.voice_sessions.flush(self.db)
+        try:
+            await self.voice_sessions.snapshot()
+        except OSError as e:
+            listener_log.error("Failed to snapshot voice sessions: %s", e)
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        await self.db.warm_guild_configs([guild.id for guild in self.bot.guilds])
+        self.voice_sessions.reconcile(self.bot.guilds)
+        await self.invites.warm(self.bot.guilds)
+
+    @commands.Cog.listener()
+    async def on_shard_ready(self, shard_id):
+        await self.db.warm_guild_configs([guild.id for guild in self.bot.guilds if guild.shard_id == shard_id])
+
+    @commands.Cog.listener()
+    async def on_guild_join(self, guild):
+        await self.db.warm_guild_configs([guild.id])
+        await self.invites.warm([guild])
+
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild):
+        self.invites.forget(guild.id)
+        self.audit_log.forget(guild.id)
+        self.digest.forget(guild.id)
+        if self.spam:
+            self.spam.forget(guild.id)
+        if self.anomalies:
+            self.anomalies.forget(guild.id)
+
+    @commands.Cog.listener()
+    async def on_audit_log_entry_create(self, entry):
+        self.audit_log.add(entry)
+
+    async def get_config(self, guild):
+        return await self.db.get_guild_config(guild.id)
 
     async def get_lang(self, guild_id):
         return await self.db.get_language(guild_id) or "en"
 
-    async def get_log_channel_id(self, guild):
+    async def get_log_channel_id(self, guild, log_type=None, title_key=None):
         if guild is None:
             return None
-        row = await self.db.get_log_settings(guild.id)
-        return row.get("log_channel_id") if row else None
+        config = await self.get_config(guild)
+        return config.destination(log_type, title_key) if log_type else config.log_channel_id
 
-    async def get_log_channel(self, guild):
-        log_channel_id = await self.get_log_channel_id(guild)
-        if not log_channel_id:
-            return None
+    async def get_log_channel(self, guild, log_type=None, title_key=None):
+        with tracer.span("listeners.get_log_channel"):
+            log_channel_id = await self.get_log_channel_id(guild, log_type, title_key)
+            if not log_channel_id:
+                return None
+            return await self.get_channel(log_channel_id)
 
-        channel = self.bot.get_channel(log_channel_id)
+    async def get_channel(self, channel_id):
+        channel = self.bot.get_channel(channel_id)
+        metrics.cache_lookups.inc("log_channel", "hit" if channel is not None else "miss")
         if channel is None:
             try:
-                channel = await self.bot.fetch_channel(log_channel_id)
+                with tracer.span("discord.fetch_channel"):
+                    channel = await self.bot.fetch_channel(channel_id)
             except Exception as e:
                 listener_log.error("Failed to fetch log channel: %s", e)
                 return None
@@ -61,66 +303,160 @@ class Listeners(commands.Cog):
     async def is_logging_enabled(self, guild):
         if guild is None:
             return False
-        row = await self.db.get_log_settings(guild.id)
-        return bool(row.get("logging_enabled", True)) if row else True
+        return (await self.get_config(guild)).logging_enabled
 
     async def is_log_type_enabled(self, guild, log_type):
         if guild is None:
             return False
+        return (await self.get_config(guild)).is_type_enabled(log_type)
 
-        row = await self.db.get_log_settings(guild.id)
-        if not row or "log_types" not in row or not row["log_types"]:
+    async def is_ignored(self, guild, log_type, channel=None, user=None):
+        """Check the guild's ignore rules before a listener formats anything (no I/O once the config is cached)."""
+        if guild is None:
+            return False
+        if (await self.get_config(guild)).ignores(channel, user):
+            metrics.events_suppressed.inc(log_type, "ignored")
             return True
+        return False
+
+    async def get_moderator(self, guild, log_type, actions, target_id, fetch=True):
+        """Describe who caused an event, looking the audit log up only if the event will be logged."""
+        if not await self.is_log_type_enabled(guild, log_type):
+            return ""
+        return self.audit_log.describe(await self.audit_log.find(guild, actions, target_id, fetch=fetch))
+
+    async def send_log_embed(self, guild, log_type, title_key, description, color="info", channel=None, user=None,
+                             content=None):
+        """Deliver a log embed to the channel ``log_type``/``title_key`` is routed to.
+
+        ``channel`` and ``user`` are where the event happened and who caused it; events
+        matching the guild's ignore rules are dropped. Logged events are also archived
+        (with those ids and ``content``, the raw text of the message involved, if any)
+        when the archive is enabled. Events in ``digest`` mode are only
+        counted for the next summary, and ``archive`` mode events stop after archiving.
+        During an activity spike, the spiking event is only counted for the spike summary.
+        """
+        started = time.perf_counter()
+        if guild is None:
+            metrics.events_suppressed.inc(log_type, "logging_disabled")
+            return
+        config = await self.get_config(guild)
+        if not config.logging_enabled:
+            metrics.events_suppressed.inc(log_type, "logging_disabled")
+            return
+        if not config.is_type_enabled(log_type):
+            metrics.events_suppressed.inc(log_type, "type_disabled")
+            return
+        if config.ignores(channel, user):
+            metrics.events_suppressed.inc(log_type, "ignored")
+            return
+        mode = config.delivery_mode(log_type, title_key)
+        if mode == "off":
+            metrics.events_suppressed.inc(log_type, "type_disabled")
+            return
 
-        types = {k: v == "1" for pair in row["log_types"].split(",")
-                 for k, v in [pair.split(":")]}
-        return types.get(log_type, True)
-
-    async def send_log_embed(self, guild, log_type, title_key, description, color="info"):
-        if not await self.is_logging_enabled(guild) or not await self.is_log_type_enabled(guild, log_type):
+        if self.archive:
+            self.archive.add(guild.id, log_type, title_key, getattr(user, "id", None), getattr(channel, "id", None),
+                             content or None)
+            if self.archive.batch_ready:
+                self.bot.loop.create_task(self.archive.flush(self.db))
+
+        if self.anomalies and title_key not in SPIKE_ALERTS:
+            spike = self.anomalies.active(guild.id, log_type)
+            if spike is not None:
+                spike.add(title_key, getattr(user, "id", None))
+                metrics.events_suppressed.inc(log_type, "spike")
+                return
+        if mode == "archive":
+            metrics.events_suppressed.inc(log_type, "archive_only")
+            return
+        if mode == "digest":
+            destination = config.destination(log_type, title_key)
+            if not destination:
+                metrics.events_dropped.inc(log_type, "no_channel")
+                return
+            self.digest.add(guild.id, destination, log_type, title_key, getattr(user, "id", None),
+                            getattr(channel, "id", None))
             return
 
-        channel = await self.get_log_channel(guild)
-        if not channel:
+        log_channel = await self.get_log_channel(guild, log_type, title_key)
+        if not log_channel:
+            metrics.events_dropped.inc(log_type, "no_channel")
             return
 
-        lang = await self.get_lang(guild.id)
-        title = messages[lang]['log_titles'].get(title_key, title_key.replace('_', ' ').title())
+        lang = config.language
+        rendering = time.perf_counter()
+        metrics.send_log_embed_seconds.observe(rendering - started, "db")
 
-        embed = disnake.Embed(
-            title=title,
-            description=description,
-            color=log_colors[color],
-            timestamp=datetime.now()
-        )
+        with tracer.span("embed.render"):
+            title = messages[lang]['log_titles'].get(title_key, title_key.replace('_', ' ').title())
 
-        await channel.send(embed=embed)
+            embed = disnake.Embed(
+                title=title,
+                description=description,
+                color=log_colors[color],
+                timestamp=datetime.now()
+            )
+        sending = time.perf_counter()
+        metrics.send_log_embed_seconds.observe(sending - rendering, "render")
+
+        metrics.outbound_queue_depth.inc("channel_send")
+        try:
+            with tracer.span("discord.send"):
+                await log_channel.send(embed=embed)
+        except Exception:
+            metrics.events_dropped.inc(log_type, "send_failed")
+            raise
+        finally:
+            metrics.outbound_queue_depth.dec("channel_send")
+            metrics.send_log_embed_seconds.observe(time.perf_counter() - sending, "rest")
+        metrics.events_delivered.inc(log_type)
 
     @commands.Cog.listener()
+    @metrics.count_event
     async def on_member_update(self, before, after):
-        changes = []
-
-        if before.display_name != after.display_name:
-            changes.append(f"Ник: {before.display_name} → {after.display_name}")
-
-        if before.roles != after.roles:
-            added = [r.name for r in after.roles if r not in before.roles]
-            removed = [r.name for r in before.roles if r not in after.roles]
-            if added: changes.append(f"Добавлены роли: {', '.join(added)}")
-            if removed: changes.append(f"Удалены роли: {', '.join(removed)}")
-
-        if not changes:
+        changes = diff_attributes(before, after, MEMBER_FIELDS)
+        added, removed = diff_roles(before, after)
+        if not changes and not added and not removed:
             return
 
+        changed = {field.attr for field, _, _ in changes}
+        color = "info"
+        if not changed:
+            title_key = "role_grant" if not removed else "role_revoke" if not added else "user_update"
+        elif changed == {"nick"} and not added and not removed:
+            title_key = "nickname_change"
+        elif changed == {"current_timeout"} and not added and not removed:
+            timed_out = after.current_timeout is not None
+            title_key = "user_timeout" if timed_out else "user_timeout_remove"
+            color = "warning" if timed_out else "success"
+        else:
+            title_key = "user_update"
+
+        # Avatar and screening changes are made by the member and never have an audit log entry.
+        actions = (disnake.AuditLogAction.member_update,) if changed & {"nick", "current_timeout"} else ()
+        if added or removed:
+            actions += (disnake.AuditLogAction.member_role_update,)
+        moderator = await self.get_moderator(after.guild, "user", actions, after.id) if actions else ""
+
+        lang = await self.get_lang(after.guild.id)
+        lines = [f"**{messages[lang]['member_update']['member']}:** {after.mention} (`{after.id}`)"]
+        if changes:
+            lines.append(render_changes(changes, lang))
+        if added or removed:
+            lines.append(render_role_changes(added, removed, lang))
+
         await self.send_log_embed(
             after.guild,
             "user",
-            "user_update",
-            f"**Участник:** {after.mention}\n" + "\n".join(changes),
-            "info"
+            title_key,
+            "\n".join(lines) + moderator,
+            color,
+            user=after
         )
 
     @commands.Cog.listener()
+    @metrics.count_event
     async def on_voice_state_update(self, member, before, after):
         if getattr(member, "bot", False):
             return
@@ -128,30 +464,42 @@ class Listeners(commands.Cog):
         lang = await self.get_lang(member.guild.id)
 
         if before.channel is None and after.channel is not None:
+            self.voice_sessions.join(member.guild.id, member.id, after.channel.id)
             await self.send_log_embed(
                 member.guild,
                 'voice',
                 'voice_join',
                 f"{member.mention} (`{member.id}`) joined {after.channel.mention} (`{after.channel.id}`)",
-                "success"
+                "success",
+                channel=after.channel, user=member
             )
         elif before.channel is not None and after.channel is None:
+            duration = self.voice_sessions.leave(member.guild.id, member.id)
+            session = f"\n**Session:** {format_duration(duration)}" if duration is not None else ""
             await self.send_log_embed(
                 member.guild,
                 'voice',
                 'voice_leave',
-                f"{member.mention} (`{member.id}`) left {before.channel.mention} (`{before.channel.id}`)",
-                "error"
+                f"{member.mention} (`{member.id}`) left {before.channel.mention} (`{before.channel.id}`)" + session,
+                "error",
+                channel=before.channel, user=member
             )
         elif before.channel != after.channel:
+            duration = self.voice_sessions.move(member.guild.id, member.id, after.channel.id)
+            spent = f" after {format_duration(duration)}" if duration is not None else ""
             await self.send_log_embed(
                 member.guild,
                 'voice',
                 'voice_move',
-                f"{member.mention} (`{member.id}`) moved from {before.channel.mention} to {after.channel.mention}",
-                "info"
+                f"{member.mention} (`{member.id}`) moved from {before.channel.mention} to {after.channel.mention}"
+                + spent,
+                "info",
+                channel=after.channel, user=member
             )
 
+        if self.voice_sessions.batch_ready:
+            self.bot.loop.create_task(self.voice_sessions.flush(self.db))
+
         if before.self_mute != after.self_mute:
             action = "muted" if after.self_mute else "unmuted"
             await self.send_log_embed(
@@ -159,7 +507,8 @@ class Listeners(commands.Cog):
                 'voice',
                 f'voice_mute_{"on" if after.self_mute else "off"}',
                 f"{member.mention} (`{member.id}`) {action} microphone",
-                "warning" if after.self_mute else "success"
+                "warning" if after.self_mute else "success",
+                channel=after.channel, user=member
             )
 
         if before.self_deaf != after.self_deaf:
@@ -169,14 +518,83 @@ class Listeners(commands.Cog):
                 'voice',
                 f'voice_deaf_{"on" if after.self_deaf else "off"}',
                 f"{member.mention} (`{member.id}`) {action}",
-                "warning" if after.self_deaf else "success"
+                "warning" if after.self_deaf else "success",
+                channel=after.channel, user=member
             )
 
+    @staticmethod
+    def mention_sets(message):
+        """User ids (other than the author), role ids and @everyone/@here a message pings."""
+        users = [user.id for user in message.mentions if user.id != message.author.id]
+        return users, [role.id for role in message.role_mentions], message.mention_everyone
+
+    async def log_ghost_ping(self, message, mentions, action, content):
+        lang = await self.get_lang(message.guild.id)
+        text = messages[lang]['ghost_ping']
+        pinged = [f"<@{user_id}>" for user_id in mentions.users] + [f"<@&{role_id}>" for role_id in mentions.roles]
+        if mentions.everyone:
+            pinged.append("@everyone/@here")
+        await self.send_log_embed(
+            message.guild,
+            'message',
+            'ghost_ping',
+            text[action].format(age=format_duration(time.time() - mentions.at)) + "\n"
+            f"**Channel:** {message.channel.mention} (`{message.channel.id}`)\n"
+            f"**Author:** {message.author.mention} (`{message.author.id}`)\n"
+            + text['mentioned'].format(mentions=", ".join(pinged)) + "\n"
+            f"**Content:** {content}",
+            "alert",
+            channel=message.channel, user=message.author, content=content
+        )
+
+    async def log_watchlist_match(self, message, content, previous=None):
+        """Log ``message`` as a watchlist match if ``content`` hits the guild's watchlist; True if it did.
+
+        The whole watchlist is one compiled pattern, so this is a single regex search. With
+        ``previous``, only a match that was not already in the previous content counts.
+        """
+        if message.guild is None or not content:
+            return False
+        watchlist = (await self.get_config(message.guild)).watchlist
+        if watchlist is None:
+            return False
+        match = watchlist.search(content)
+        if match is None or (previous and watchlist.search(previous)):
+            return False
+
+        await self.send_log_embed(
+            message.guild,
+            'message',
+            'watchlist_match',
+            f"**Channel:** {message.channel.mention} (`{message.channel.id}`)\n"
+            f"**Author:** {message.author.mention} (`{message.author.id}`)\n"
+            f"**Match:** `{match.group(0)}`\n"
+            f"**Message:** [Jump]({message.jump_url})\n"
+            f"**Content:** {content}",
+            "alert",
+            channel=message.channel, user=message.author, content=content
+        )
+        return True
+
     @commands.Cog.listener()
+    @metrics.count_event
     async def on_message(self, message):
         if getattr(message.author, "bot", False):
             return
+        if await self.is_ignored(message.guild, 'message', message.channel, message.author):
+            return
+        if self.ghost_pings and message.guild is not None:
+            self.ghost_pings.add(message.id, *self.mention_sets(message))
+        # Watched terms are alerted on every time, even inside a spam burst.
+        if await self.log_watchlist_match(message, message.content):
+            return
+        if self.spam and message.guild is not None and self.spam.check(
+                message.guild.id, message.author.id, message.channel.id, message.content, message):
+            # Repeats are held; check_spam_bursts reports them as one spam_burst or logs them once the run is over.
+            return
+        await self.log_new_message(message)
 
+    async def log_new_message(self, message):
         await self.send_log_embed(
             message.guild,
             'message',
@@ -184,13 +602,25 @@ class Listeners(commands.Cog):
             f"**Channel:** {message.channel.mention} (`{message.channel.id}`)\n"
             f"**Author:** {message.author.mention} (`{message.author.id}`)\n"
             f"**Content:** {message.content}",
-            "success"
+            "success",
+            channel=message.channel, user=message.author, content=message.content
         )
 
     @commands.Cog.listener()
+    @metrics.count_event
     async def on_message_edit(self, before, after):
         if getattr(before.author, "bot", False):
             return
+        if await self.is_ignored(before.guild, 'message', before.channel, before.author):
+            return
+        if self.ghost_pings and after.guild is not None:
+            removed = self.ghost_pings.edited(after.id, *self.mention_sets(after))
+            if removed:
+                await self.log_ghost_ping(after, removed, 'edited', before.content)
+                return
+        # A watched term edited into a message is reported like one sent with it.
+        if await self.log_watchlist_match(after, after.content, before.content):
+            return
 
         await self.send_log_embed(
             before.guild,
@@ -200,13 +630,25 @@ class Listeners(commands.Cog):
             f"**Author:** {before.author.mention} (`{before.author.id}`)\n"
             f"**Before:** {before.content}\n"
             f"**After:** {after.content}",
-            "warning"
+            "warning",
+            channel=before.channel, user=before.author, content=after.content
         )
 
     @commands.Cog.listener()
+    @metrics.count_event
     async def on_message_delete(self, message):
         if getattr(message.author, "bot", False):
             return
+        if await self.is_ignored(message.guild, 'message', message.channel, message.author):
+            return
+        mentions = self.ghost_pings.deleted(message.id) if self.ghost_pings and message.guild else None
+        # A moderator removing a message with a mention is not a ghost ping. Their repeat deletes only bump
+        # the count of one aggregated entry, so the audit log is fetched before an author is flagged.
+        if mentions and not await self.audit_log.find(
+                message.guild, disnake.AuditLogAction.message_delete, message.author.id,
+                channel_id=message.channel.id):
+            await self.log_ghost_ping(message, mentions, 'deleted', message.content)
+            return
 
         await self.send_log_embed(
             message.guild,
@@ -215,13 +657,21 @@ class Listeners(commands.Cog):
             f"**Channel:** {message.channel.mention} (`{message.channel.id}`)\n"
             f"**Author:** {message.author.mention} (`{message.author.id}`)\n"
             f"**Content:** {message.content}",
-            "error"
+            "error",
+            channel=message.channel, user=message.author, content=message.content
         )
 
     @commands.Cog.listener()
+    @metrics.count_event
     async def on_bulk_message_delete(self, messages):
+        if self.ghost_pings:
+            # Purges are moderation, not ghost pings.
+            self.ghost_pings.forget(message.id for message in messages)
         if not messages or getattr(messages[0].author, "bot", False):
             return
+        if await self.is_ignored(messages[0].guild, 'message', messages[0].channel):
+            return
+        await self.watch_rate(messages[0].guild, 'message_bulk_delete')
 
         await self.send_log_embed(
             messages[0].guild,
@@ -229,62 +679,90 @@ class Listeners(commands.Cog):
             'message_bulk_delete',
             f"**Channel:** {messages[0].channel.mention} (`{messages[0].channel.id}`)\n"
             f"**Count:** {len(messages)}",
-            "error"
+            "error",
+            channel=messages[0].channel
         )
 
     @commands.Cog.listener()
+    @metrics.count_event
     async def on_member_join(self, member):
         if member.bot:
             return
+
+        invite = ""
+        if await self.watch_rate(member.guild, "user_join"):
+            # Attributing hundreds of raid joins to invites would hammer the invites endpoint.
+            self.invites.forget(member.guild.id)
+        elif await self.is_logging_enabled(member.guild) and await self.is_log_type_enabled(member.guild, "user"):
+            invite = self.invites.describe(await self.invites.used_invites(member.guild))
+        else:
+            self.invites.forget(member.guild.id)
+
         await self.send_log_embed(
             member.guild,
             "user",
             "user_join",
-            f"**member:** {member.mention}\n**guild:** {member.guild.name}",
-            "success"
+            f"**member:** {member.mention}\n**guild:** {member.guild.name}" + invite,
+            "success",
+            user=member
         )
 
     @commands.Cog.listener()
+    @metrics.count_event
     async def on_member_remove(self, member):
         if member.bot:
             return
+        # Most leaves are not kicks, so only entries already pushed are checked; nothing is fetched or awaited.
+        moderator = await self.get_moderator(
+            member.guild, "user", disnake.AuditLogAction.kick, member.id, fetch=False
+        )
         await self.send_log_embed(
             member.guild,
             "user",
             "user_leave",
-            f"**member:** {member.mention}\n**guild:** {member.guild.name}",
-            "error"
+            f"**member:** {member.mention}\n**guild:** {member.guild.name}" + moderator,
+            "error",
+            user=member
         )
 
     @commands.Cog.listener()
+    @metrics.count_event
     async def on_member_ban(self, guild, user):
         if getattr(user, "bot", False):
             return
 
+        moderator = ""
+        if not await self.watch_rate(guild, 'user_ban'):
+            moderator = await self.get_moderator(guild, 'user', disnake.AuditLogAction.ban, user.id)
         await self.send_log_embed(
             guild,
             'user',
             'user_ban',
             f"**User:** {getattr(user, 'mention', user)} (`{getattr(user, 'id', 'N/A')}`)\n"
-            f"**Server:** {guild.name} (`{guild.id}`)",
-            "error"
+            f"**Server:** {guild.name} (`{guild.id}`)" + moderator,
+            "error",
+            user=user
         )
 
     @commands.Cog.listener()
+    @metrics.count_event
     async def on_member_unban(self, guild, user):
         if getattr(user, "bot", False):
             return
 
+        moderator = await self.get_moderator(guild, 'user', disnake.AuditLogAction.unban, user.id)
         await self.send_log_embed(
             guild,
             'user',
             'user_unban',
             f"**User:** {getattr(user, 'mention', user)} (`{getattr(user, 'id', 'N/A')}`)\n"
-            f"**Server:** {guild.name} (`{guild.id}`)",
-            "success"
+            f"**Server:** {guild.name} (`{guild.id}`)" + moderator,
+            "success",
+            user=user
         )
 
     @commands.Cog.listener()
+    @metrics.count_event
     async def on_member_timeout(self, member, until):
         if getattr(member, "bot", False):
             return
@@ -296,10 +774,12 @@ class Listeners(commands.Cog):
             f"**User:** {member.mention} (`{member.id}`)\n"
             f"**Server:** {member.guild.name} (`{member.guild.id}`)\n"
             f"**Until:** {until.strftime('%d.%m.%Y %H:%M:%S') if until else 'None'}",
-            "warning"
+            "warning",
+            user=member
         )
 
     @commands.Cog.listener()
+    @metrics.count_event
     async def on_member_timeout_remove(self, member):
         if getattr(member, "bot", False):
             return
@@ -310,46 +790,71 @@ class Listeners(commands.Cog):
             'user_timeout_remove',
             f"**User:** {member.mention} (`{member.id}`)\n"
             f"**Server:** {member.guild.name} (`{member.guild.id}`)",
-            "success"
+            "success",
+            user=member
         )
 
     # Серверные события
     @commands.Cog.listener()
+    @metrics.count_event
     async def on_guild_channel_create(self, channel):
+        moderator = await self.get_moderator(
+            channel.guild, 'server', disnake.AuditLogAction.channel_create, channel.id
+        )
         await self.send_log_embed(
             channel.guild,
             'server',
             'channel_create',
             f"**Channel:** {channel.mention} (`{channel.id}`)\n"
-            f"**Server:** {channel.guild.name} (`{channel.guild.id}`)",
+            f"**Server:** {channel.guild.name} (`{channel.guild.id}`)" + moderator,
             "success"
         )
 
     @commands.Cog.listener()
+    @metrics.count_event
     async def on_guild_channel_delete(self, channel):
+        moderator = ""
+        if not await self.watch_rate(channel.guild, 'channel_delete'):
+            moderator = await self.get_moderator(
+                channel.guild, 'server', disnake.AuditLogAction.channel_delete, channel.id
+            )
         await self.send_log_embed(
             channel.guild,
             'server',
             'channel_delete',
             f"**Channel:** {channel.mention if hasattr(channel, 'mention') else channel.name} (`{channel.id}`)\n"
-            f"**Server:** {channel.guild.name} (`{channel.guild.id}`)",
+            f"**Server:** {channel.guild.name} (`{channel.guild.id}`)" + moderator,
             "error"
         )
 
     @commands.Cog.listener()
+    @metrics.count_event
     async def on_guild_channel_update(self, before, after):
+        changes = diff_attributes(before, after, CHANNEL_FIELDS)
+        if not changes:
+            metrics.events_suppressed.inc('server', "no_change")
+            return
+
+        lang = await self.get_lang(after.guild.id)
+        moderator = await self.get_moderator(
+            after.guild, 'server',
+            (disnake.AuditLogAction.channel_update, disnake.AuditLogAction.overwrite_create,
+             disnake.AuditLogAction.overwrite_update, disnake.AuditLogAction.overwrite_delete),
+            after.id
+        )
         await self.send_log_embed(
             after.guild,
             'server',
             'channel_update',
             f"**Channel:** {after.mention} (`{after.id}`)\n"
             f"**Server:** {after.guild.name} (`{after.guild.id}`)\n"
-            f"**Changes:** {before} → {after}",
+            + render_changes(changes, lang) + moderator,
             "warning"
         )
 
     # Треды
     @commands.Cog.listener()
+    @metrics.count_event
     async def on_thread_create(self, thread):
         await self.send_log_embed(
             thread.guild,
@@ -362,30 +867,44 @@ class Listeners(commands.Cog):
         )
 
     @commands.Cog.listener()
+    @metrics.count_event
     async def on_thread_delete(self, thread):
+        moderator = await self.get_moderator(
+            thread.guild, 'server', disnake.AuditLogAction.thread_delete, thread.id
+        )
         await self.send_log_embed(
             thread.guild,
             'server',
             'thread_delete',
             f"**Thread:** {thread.name} (`{thread.id}`)\n"
             f"**Parent:** {thread.parent.mention if thread.parent else 'N/A'}\n"
-            f"**Server:** {thread.guild.name} (`{thread.guild.id}`)",
+            f"**Server:** {thread.guild.name} (`{thread.guild.id}`)" + moderator,
             "error"
         )
 
     @commands.Cog.listener()
+    @metrics.count_event
     async def on_guild_update(self, before, after):
+        changes = diff_attributes(before, after, GUILD_FIELDS)
+        if not changes:
+            metrics.events_suppressed.inc('server', "no_change")
+            return
+
+        lang = await self.get_lang(after.id)
+        moderator = await self.get_moderator(after, 'server', disnake.AuditLogAction.guild_update, after.id)
         await self.send_log_embed(
             after,
             'server',
             'guild_update',
             f"**Server:** {after.name} (`{after.id}`)\n"
-            f"**Changes:** {before} → {after}",
+            + render_changes(changes, lang) + moderator,
             "warning"
         )
 
     @commands.Cog.listener()
+    @metrics.count_event
     async def on_invite_create(self, invite):
+        self.invites.add(invite)
         guild = getattr(invite.channel, 'guild', None)
         if guild:
             await self.send_log_embed(
@@ -399,7 +918,9 @@ class Listeners(commands.Cog):
             )
 
     @commands.Cog.listener()
+    @metrics.count_event
     async def on_invite_delete(self, invite):
+        self.invites.remove(invite)
         guild = getattr(invite.channel, 'guild', None)
         if guild:
             await self.send_log_embed(
@@ -412,6 +933,7 @@ class Listeners(commands.Cog):
             )
 
     @commands.Cog.listener()
+    @metrics.count_event
     async def on_guild_emojis_update(self, guild, before, after):
         await self.send_log_embed(
             guild,
@@ -424,6 +946,7 @@ class Listeners(commands.Cog):
         )
 
     @commands.Cog.listener()
+    @metrics.count_event
     async def on_guild_stickers_update(self, guild, before, after):
         await self.send_log_embed(
             guild,
@@ -436,9 +959,12 @@ class Listeners(commands.Cog):
         )
 
     @commands.Cog.listener()
+    @metrics.count_event
     async def on_reaction_add(self, reaction, user):
         if getattr(user, "bot", False):
             return
+        if await self.is_ignored(reaction.message.guild, 'message', reaction.message.channel, user):
+            return
 
         await self.send_log_embed(
             reaction.message.guild,
@@ -448,13 +974,17 @@ class Listeners(commands.Cog):
             f"**Channel:** {reaction.message.channel.mention} (`{reaction.message.channel.id}`)\n"
             f"**Message:** [Jump]({reaction.message.jump_url}) (`{reaction.message.id}`)\n"
             f"**User:** {user.mention} (`{user.id}`)",
-            "success"
+            "success",
+            channel=reaction.message.channel, user=user
         )
 
     @commands.Cog.listener()
+    @metrics.count_event
     async def on_reaction_remove(self, reaction, user):
         if getattr(user, "bot", False):
             return
+        if await self.is_ignored(reaction.message.guild, 'message', reaction.message.channel, user):
+            return
 
         await self.send_log_embed(
             reaction.message.guild,
@@ -464,13 +994,17 @@ class Listeners(commands.Cog):
             f"**Channel:** {reaction.message.channel.mention} (`{reaction.message.channel.id}`)\n"
             f"**Message:** [Jump]({reaction.message.jump_url}) (`{reaction.message.id}`)\n"
             f"**User:** {user.mention} (`{user.id}`)",
-            "error"
+            "error",
+            channel=reaction.message.channel, user=user
         )
 
     @commands.Cog.listener()
+    @metrics.count_event
     async def on_reaction_clear(self, message, reactions):
         if getattr(message.author, "bot", False):
             return
+        if await self.is_ignored(message.guild, 'message', message.channel):
+            return
 
         await self.send_log_embed(
             message.guild,
@@ -479,13 +1013,17 @@ class Listeners(commands.Cog):
             f"**Channel:** {message.channel.mention} (`{message.channel.id}`)\n"
             f"**Message:** [Jump]({message.jump_url}) (`{message.id}`)\n"
             f"**Count:** {len(reactions)}",
-            "warning"
+            "warning",
+            channel=message.channel
         )
 
     @commands.Cog.listener()
+    @metrics.count_event
     async def on_reaction_clear_emoji(self, reaction):
         if getattr(reaction.message.author, "bot", False):
             return
+        if await self.is_ignored(reaction.message.guild, 'message', reaction.message.channel):
+            return
 
         await self.send_log_embed(
             reaction.message.guild,
@@ -494,26 +1032,33 @@ class Listeners(commands.Cog):
             f"**Emoji:** {reaction.emoji}\n"
             f"**Channel:** {reaction.message.channel.mention} (`{reaction.message.channel.id}`)\n"
             f"**Message:** [Jump]({reaction.message.jump_url}) (`{reaction.message.id}`)",
-            "warning"
+            "warning",
+            channel=reaction.message.channel
         )
 
     @commands.Cog.listener()
+    @metrics.count_event
     async def on_typing(self, channel, user, when):
         if getattr(user, "bot", False):
             return
 
         if hasattr(channel, 'guild'):
+            if await self.is_ignored(channel.guild, 'message', channel, user):
+                return
+
             await self.send_log_embed(
                 channel.guild,
                 'message',
                 'typing',
                 f"**User:** {user.mention} (`{user.id}`)\n"
                 f"**Channel:** {channel.mention} (`{channel.id}`)",
-                "info"
+                "info",
+                channel=channel, user=user
             )
 
     # Авто-модерация
     @commands.Cog.listener()
+    @metrics.count_event
     async def on_automod_rule_create(self, rule):
         lang = await self.get_lang(rule.guild.id)
         await self.send_log_embed(
@@ -531,6 +1076,7 @@ class Listeners(commands.Cog):
         )
 
     @commands.Cog.listener()
+    @metrics.count_event
     async def on_automod_rule_update(self, rule):
         lang = await self.get_lang(rule.guild.id)
         await self.send_log_embed(
@@ -548,6 +1094,7 @@ class Listeners(commands.Cog):
         )
 
     @commands.Cog.listener()
+    @metrics.count_event
     async def on_automod_rule_delete(self, rule):
         lang = await self.get_lang(rule.guild.id)
         await self.send_log_embed(
@@ -563,6 +1110,7 @@ class Listeners(commands.Cog):
         )
 
     @commands.Cog.listener()
+    @metrics.count_event
     async def on_automod_action(self, execution):
         lang = await self.get_lang(execution.guild.id)
 
@@ -584,7 +1132,8 @@ class Listeners(commands.Cog):
                 content=execution.content or 'None',
                 actions=action_str
             ),
-            "moderation"
+            "moderation",
+            channel=execution.channel, user=execution.member, content=execution.content
         )
 
 def setup(bot):
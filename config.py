@@ -15,7 +15,109 @@ database = {
     "password": os.getenv("DB_PASSWORD"),
     "database": os.getenv("DB_NAME"),
     "host": os.getenv("DB_HOST"),
-    "port": int(os.getenv("DB_PORT")),
+    "port": int(os.getenv("DB_PORT", 5432)),
+}
+
+metrics = {
+    "enabled": os.getenv("METRICS_ENABLED", "false").lower() == "true",
+    "host": os.getenv("METRICS_HOST", "0.0.0.0"),
+    "port": int(os.getenv("METRICS_PORT", 9100)),
+}
+
+tracing = {
+    "enabled": os.getenv("TRACING_ENABLED", "false").lower() == "true",
+    "buffer_size": int(os.getenv("TRACING_BUFFER_SIZE", 1024)),
+    "summary_interval": int(os.getenv("TRACING_SUMMARY_INTERVAL", 300)),
+}
+
+recorder = {
+    "enabled": os.getenv("RECORDER_ENABLED", "false").lower() == "true",
+    "path": os.getenv("RECORDER_PATH", "./logs/events-{timestamp}.jsonl.gz"),
+    "flush_every": int(os.getenv("RECORDER_FLUSH_EVERY", 500)),
+}
+
+voice_sessions = {
+    "snapshot_path": os.getenv("VOICE_SNAPSHOT_PATH", "./data/voice_sessions.json"),
+    "snapshot_interval": int(os.getenv("VOICE_SNAPSHOT_INTERVAL", 60)),
+    "batch_size": int(os.getenv("VOICE_BATCH_SIZE", 100)),
+    "max_pending": int(os.getenv("VOICE_MAX_PENDING", 50000)),
+}
+
+invites = {
+    "warmup_concurrency": int(os.getenv("INVITE_WARMUP_CONCURRENCY", 5)),
+    "debounce": float(os.getenv("INVITE_DEBOUNCE", 1.5)),
+}
+
+audit_log = {
+    "cache_size": int(os.getenv("AUDIT_LOG_CACHE_SIZE", 100)),
+    "window": float(os.getenv("AUDIT_LOG_WINDOW", 15)),
+    "delay": float(os.getenv("AUDIT_LOG_DELAY", 1.0)),
+    "fetch_limit": int(os.getenv("AUDIT_LOG_FETCH_LIMIT", 25)),
+    "negative_ttl": float(os.getenv("AUDIT_LOG_NEGATIVE_TTL", 10)),
+}
+
+guild_config = {
+    "warmup_chunk_size": int(os.getenv("GUILD_CONFIG_WARMUP_CHUNK_SIZE", 500)),
+}
+
+archive = {
+    "enabled": os.getenv("ARCHIVE_ENABLED", "false").lower() == "true",
+    "batch_size": int(os.getenv("ARCHIVE_BATCH_SIZE", 500)),
+    "flush_interval": float(os.getenv("ARCHIVE_FLUSH_INTERVAL", 2)),
+    "max_pending": int(os.getenv("ARCHIVE_MAX_PENDING", 50000)),
+    "search_page_size": int(os.getenv("ARCHIVE_SEARCH_PAGE_SIZE", 10)),
+    "retention_days": int(os.getenv("ARCHIVE_RETENTION_DAYS", 90)),
+    "redact_after_days": int(os.getenv("ARCHIVE_REDACT_AFTER_DAYS", 30)),
+    "maintenance_interval": int(os.getenv("ARCHIVE_MAINTENANCE_INTERVAL", 3600)),
+    "maintenance_batch_size": int(os.getenv("ARCHIVE_MAINTENANCE_BATCH_SIZE", 5000)),
+    "maintenance_max_backlog": int(os.getenv("ARCHIVE_MAINTENANCE_MAX_BACKLOG", 1000)),
+}
+
+digest = {
+    "interval": int(os.getenv("DIGEST_INTERVAL", 900)),
+    "top": int(os.getenv("DIGEST_TOP", 3)),
+}
+
+anomaly = {
+    "enabled": os.getenv("ANOMALY_ENABLED", "true").lower() == "true",
+    "window": float(os.getenv("ANOMALY_WINDOW", 60)),
+    "buckets": int(os.getenv("ANOMALY_BUCKETS", 12)),
+    "join_threshold": int(os.getenv("ANOMALY_JOIN_THRESHOLD", 10)),
+    "ban_threshold": int(os.getenv("ANOMALY_BAN_THRESHOLD", 5)),
+    "bulk_delete_threshold": int(os.getenv("ANOMALY_BULK_DELETE_THRESHOLD", 5)),
+    "channel_delete_threshold": int(os.getenv("ANOMALY_CHANNEL_DELETE_THRESHOLD", 3)),
+    "baseline_multiplier": float(os.getenv("ANOMALY_BASELINE_MULTIPLIER", 4)),
+    "baseline_alpha": float(os.getenv("ANOMALY_BASELINE_ALPHA", 0.01)),
+    "max_listed_users": int(os.getenv("ANOMALY_MAX_LISTED_USERS", 50)),
+}
+
+spam = {
+    "enabled": os.getenv("SPAM_ENABLED", "true").lower() == "true",
+    "duplicates": int(os.getenv("SPAM_DUPLICATES", 4)),
+    "window": float(os.getenv("SPAM_WINDOW", 30)),
+    "history": int(os.getenv("SPAM_HISTORY", 16)),
+    "max_users": int(os.getenv("SPAM_MAX_USERS", 50000)),
+    "preview_length": int(os.getenv("SPAM_PREVIEW_LENGTH", 200)),
+}
+
+ghost_pings = {
+    "enabled": os.getenv("GHOST_PING_ENABLED", "true").lower() == "true",
+    "window": float(os.getenv("GHOST_PING_WINDOW", 120)),
+    "max_messages": int(os.getenv("GHOST_PING_MAX_MESSAGES", 100000)),
+}
+
+watchlist = {
+    "max_terms": int(os.getenv("WATCHLIST_MAX_TERMS", 5000)),
+    "max_term_length": int(os.getenv("WATCHLIST_MAX_TERM_LENGTH", 200)),
+    "max_regex_length": int(os.getenv("WATCHLIST_MAX_REGEX_LENGTH", 100)),
+    "cache_size": int(os.getenv("WATCHLIST_CACHE_SIZE", 1024)),
+}
+
+export = {
+    "format": os.getenv("EXPORT_FORMAT", "jsonl"),
+    "compression": os.getenv("EXPORT_COMPRESSION", "gzip"),
+    "batch_rows": int(os.getenv("EXPORT_BATCH_ROWS", 500)),
+    "part_size": int(os.getenv("EXPORT_PART_SIZE", 8 * 1024 * 1024)),
 }
 
 messages = {
@@ -118,6 +220,8 @@ messages = {
             'select_channel': 'Выберите канал для логов',
             'detailed_title': 'Детальные настройки',
             'detailed_description': 'Включите/выключите определенные типы логов',
+            'unsaved_changes': 'Есть несохраненные изменения. Нажмите «Сохранить», чтобы применить их.',
+            'types_saved': 'Типы логов сохранены',
             'automod': {
                 'rule_created': 'Создано правило авто-модерации: {rule} (ID: {id})\nТип: {trigger}\nДействия: {actions}\nСоздатель: {creator}',
                 'rule_updated': 'Обновлено правило авто-модерации: {rule} (ID: {id})\nТип: {trigger}\nДействия: {actions}\nОбновил: {updater}',
@@ -174,9 +278,16 @@ messages = {
             'reaction_remove': 'Удалена реакция',
             'reaction_clear': 'Очищены реакции',
             'reaction_clear_emoji': 'Очищена одна реакция',
+            'typing': 'Печатает сообщение',
+            'spike_start': '🚨 Всплеск активности',
+            'spike_end': 'Всплеск активности закончился',
+            'watchlist_match': '🔎 Совпадение со списком наблюдения',
+            'spam_burst': '📢 Повторяющийся спам',
+            'ghost_ping': '👻 Призрачный пинг',
             'role_grant': 'Роль выдана',
             'role_revoke': 'Роль отозвана',
             'nickname_change': 'Изменён никнейм',
+            'user_update': 'Участник обновлён',
             'automod_rule_create': 'Создано правило авто-модерации',
             'automod_rule_update': 'Обновлено правило авто-модерации',
             'automod_rule_delete': 'Удалено правило авто-модерации',
@@ -186,6 +297,143 @@ messages = {
             'automod_link': 'Заблокирована ссылка',
             'automod_caps': 'Обнаружен капс'
         },
+        'fields': {
+            'name': 'Название',
+            'topic': 'Тема',
+            'nsfw': 'NSFW',
+            'slowmode_delay': 'Медленный режим',
+            'category': 'Категория',
+            'overwrites': 'Права доступа',
+            'bitrate': 'Битрейт',
+            'user_limit': 'Лимит участников',
+            'rtc_region': 'Регион',
+            'video_quality_mode': 'Качество видео',
+            'default_auto_archive_duration': 'Автоархивация',
+            'description': 'Описание',
+            'owner': 'Владелец',
+            'icon': 'Иконка',
+            'banner': 'Баннер',
+            'splash': 'Фон приглашения',
+            'verification_level': 'Уровень проверки',
+            'explicit_content_filter': 'Фильтр контента',
+            'default_notifications': 'Уведомления по умолчанию',
+            'mfa_level': 'Двухфакторная аутентификация',
+            'afk_channel': 'AFK-канал',
+            'afk_timeout': 'AFK-таймаут',
+            'system_channel': 'Системный канал',
+            'rules_channel': 'Канал правил',
+            'public_updates_channel': 'Канал обновлений',
+            'vanity_url_code': 'Персональная ссылка',
+            'preferred_locale': 'Язык сервера',
+            'premium_progress_bar_enabled': 'Полоса бустов',
+            'nick': 'Никнейм',
+            'display_avatar': 'Аватар',
+            'pending': 'Ожидает проверки',
+            'current_timeout': 'Тайм-аут до'
+        },
+        'member_update': {
+            'member': 'Участник',
+            'roles_added': 'Добавлены роли',
+            'roles_removed': 'Удалены роли'
+        },
+        'voice_stats': {
+            'title': 'Статистика голосовых каналов',
+            'total': 'Всего в голосе',
+            'sessions': 'Сессий',
+            'members': 'Участников',
+            'top': 'Больше всего времени в голосе',
+            'empty': 'Пока нет завершённых голосовых сессий'
+        },
+        'ignore': {
+            'title': 'Исключения',
+            'description': 'Сообщения, реакции и набор текста в этих каналах и от этих участников не логируются',
+            'channels': 'Каналы',
+            'categories': 'Категории',
+            'roles': 'Роли',
+            'users': 'Пользователи',
+            'bots': 'Боты',
+            'none': 'Нет',
+            'select_channels': 'Игнорировать каналы',
+            'select_categories': 'Игнорировать категории',
+            'select_roles': 'Игнорировать роли',
+            'select_users': 'Игнорировать пользователей',
+            'bots_ignored': 'Боты игнорируются',
+            'bots_logged': 'Боты логируются'
+        },
+        'routing': {
+            'title': 'Маршрутизация логов',
+            'default': 'Канал по умолчанию',
+            'set': '{target} теперь отправляется в {channel}',
+            'removed': '{target} снова отправляется в канал по умолчанию',
+            'not_routed': 'Для {target} нет отдельного канала',
+            'invalid_target': 'Неизвестная категория или событие: {target}',
+            'empty': 'Все события отправляются в канал по умолчанию',
+            'modes': 'Режимы доставки',
+            'mode_set': '{target}: режим доставки {mode}',
+            'not_configured': 'Сначала настройте логирование через /settings'
+        },
+        'spam': {
+            'burst': '**Автор:** {user} (`{user_id}`)\n**Сообщений:** {count} за {duration}\n'
+                     '**Каналы:** {channels}\n**Содержание:** {content}'
+        },
+        'ghost_ping': {
+            'deleted': 'Сообщение с упоминанием удалено через {age}',
+            'edited': 'Упоминание убрано правкой через {age}',
+            'mentioned': '**Упомянуты:** {mentions}'
+        },
+        'watchlist': {
+            'title': 'Список наблюдения',
+            'added': '{term} добавлено в список наблюдения',
+            'removed': '{term} удалено из списка наблюдения',
+            'not_found': '{term} нет в списке наблюдения',
+            'invalid': 'Некорректное выражение {term}: {error}',
+            'too_long': 'Выражение должно быть не длиннее {limit} символов',
+            'nested': 'Выражение {term} повторяет группу, которая уже содержит повторение, и может '
+                      'проверяться очень долго. Уберите вложенный квантификатор, например `(a+)+` → `a+`',
+            'too_many': 'В списке уже {limit} выражений',
+            'empty': 'Список наблюдения пуст',
+            'regex': 'регулярное выражение'
+        },
+        'delivery_modes': {
+            'realtime': 'сразу',
+            'digest': 'сводка',
+            'archive': 'только архив',
+            'off': 'выключено'
+        },
+        'digest': {
+            'title': 'Сводка за {minutes} мин'
+        },
+        'anomaly': {
+            'start': '**{event}:** {count} за последние {window} с (обычно около {usual}).\n'
+                     'Дальнейшие события будут собраны в одну сводку, пока всплеск не закончится.',
+            'end': '**{event}:** {count} за {duration}',
+            'users': '**Участники:** {users}'
+        },
+        'tracing': {
+            'title': 'Тайминги обработки (мс)',
+            'disabled': 'Трассировка выключена (TRACING_ENABLED=false)',
+            'empty': 'Пока нет замеров'
+        },
+        'db_stats': {
+            'title': 'Статистика запросов к базе данных',
+            'empty': 'Запросов пока не было'
+        },
+        'archive': {
+            'title': 'История логов',
+            'disabled': 'Архив логов отключен (ARCHIVE_ENABLED)',
+            'empty': 'Ничего не найдено',
+            'invalid_date': 'Неверная дата: `{value}`. Используйте формат ГГГГ-ММ-ДД или ГГГГ-ММ-ДД ЧЧ:ММ',
+            'page': 'Страница {page}',
+            'retention_set': 'События архива хранятся {days} дн., текст сообщений {redact}',
+            'redact_after': 'удаляется через {days} дн.',
+            'redact_never': 'не удаляется',
+            'exported': 'Экспорт завершен, файлов: {parts}',
+            'export_failed': 'Экспорт не удался, подробности в логах бота',
+            'export_running': 'Экспорт для этого сервера уже выполняется',
+            'export_started': 'Экспорт архива сервера **{guild}** начат, файлы придут сюда',
+            'export_queued': 'Экспорт начат, файлы придут в личные сообщения',
+            'export_dm_closed': 'Не удалось написать вам в личные сообщения. Откройте их, чтобы получить экспорт'
+        },
         'errors': {
             'missing_permissions': 'У вас недостаточно прав для выполнения этой команды',
             'bot_missing_permissions': 'У бота недостаточно прав для выполнения этой команды',
@@ -297,6 +545,8 @@ messages = {
             'select_channel': 'Select log channel',
             'detailed_title': '⚙ Detailed Settings',
             'detailed_description': 'Enable/disable specific log types',
+            'unsaved_changes': 'You have unsaved changes. Press "Save" to apply them.',
+            'types_saved': 'Log types saved',
             'automod': {
                 'rule_created': 'Automod rule created: {rule} (ID: {id})\nTrigger: {trigger}\nActions: {actions}\nCreator: {creator}',
                 'rule_updated': 'Automod rule updated: {rule} (ID: {id})\nTrigger: {trigger}\nActions: {actions}\nUpdated by: {updater}',
@@ -353,9 +603,16 @@ messages = {
             'reaction_remove': 'Reaction removed',
             'reaction_clear': 'Reactions cleared',
             'reaction_clear_emoji': 'Reaction emoji cleared',
+            'typing': 'Typing',
+            'spike_start': '🚨 Activity spike',
+            'spike_end': 'Activity spike over',
+            'watchlist_match': '🔎 Watchlist match',
+            'spam_burst': '📢 Spam burst',
+            'ghost_ping': '👻 Ghost ping',
             'role_grant': 'Role granted',
             'role_revoke': 'Role revoked',
             'nickname_change': 'Nickname changed',
+            'user_update': 'Member updated',
             'automod_rule_create': 'Automod rule created',
             'automod_rule_update': 'Automod rule updated',
             'automod_rule_delete': 'Automod rule deleted',
@@ -365,6 +622,143 @@ messages = {
             'automod_link': 'Link blocked',
             'automod_caps': 'Excessive caps detected'
         },
+        'fields': {
+            'name': 'Name',
+            'topic': 'Topic',
+            'nsfw': 'NSFW',
+            'slowmode_delay': 'Slowmode',
+            'category': 'Category',
+            'overwrites': 'Permission overwrites',
+            'bitrate': 'Bitrate',
+            'user_limit': 'User limit',
+            'rtc_region': 'Region',
+            'video_quality_mode': 'Video quality',
+            'default_auto_archive_duration': 'Auto-archive',
+            'description': 'Description',
+            'owner': 'Owner',
+            'icon': 'Icon',
+            'banner': 'Banner',
+            'splash': 'Invite splash',
+            'verification_level': 'Verification level',
+            'explicit_content_filter': 'Content filter',
+            'default_notifications': 'Default notifications',
+            'mfa_level': 'Two-factor requirement',
+            'afk_channel': 'AFK channel',
+            'afk_timeout': 'AFK timeout',
+            'system_channel': 'System channel',
+            'rules_channel': 'Rules channel',
+            'public_updates_channel': 'Updates channel',
+            'vanity_url_code': 'Vanity URL',
+            'preferred_locale': 'Server locale',
+            'premium_progress_bar_enabled': 'Boost progress bar',
+            'nick': 'Nickname',
+            'display_avatar': 'Avatar',
+            'pending': 'Pending verification',
+            'current_timeout': 'Timed out until'
+        },
+        'member_update': {
+            'member': 'Member',
+            'roles_added': 'Roles added',
+            'roles_removed': 'Roles removed'
+        },
+        'voice_stats': {
+            'title': 'Voice statistics',
+            'total': 'Total voice time',
+            'sessions': 'Sessions',
+            'members': 'Members',
+            'top': 'Most time in voice',
+            'empty': 'No completed voice sessions yet'
+        },
+        'ignore': {
+            'title': 'Ignore lists',
+            'description': 'Messages, reactions and typing in these channels or from these members are not logged',
+            'channels': 'Channels',
+            'categories': 'Categories',
+            'roles': 'Roles',
+            'users': 'Users',
+            'bots': 'Bots',
+            'none': 'None',
+            'select_channels': 'Ignore channels',
+            'select_categories': 'Ignore categories',
+            'select_roles': 'Ignore roles',
+            'select_users': 'Ignore users',
+            'bots_ignored': 'Bots are ignored',
+            'bots_logged': 'Bots are logged'
+        },
+        'routing': {
+            'title': 'Log routing',
+            'default': 'Default channel',
+            'set': '{target} is now sent to {channel}',
+            'removed': '{target} is sent to the default channel again',
+            'not_routed': '{target} has no channel of its own',
+            'invalid_target': 'Unknown category or event: {target}',
+            'empty': 'Every event goes to the default channel',
+            'modes': 'Delivery modes',
+            'mode_set': '{target} is now delivered: {mode}',
+            'not_configured': 'Set up logging with /settings first'
+        },
+        'spam': {
+            'burst': '**Author:** {user} (`{user_id}`)\n**Messages:** {count} over {duration}\n'
+                     '**Channels:** {channels}\n**Content:** {content}'
+        },
+        'ghost_ping': {
+            'deleted': 'Message with a mention deleted after {age}',
+            'edited': 'Mention edited out after {age}',
+            'mentioned': '**Mentioned:** {mentions}'
+        },
+        'watchlist': {
+            'title': 'Watchlist',
+            'added': '{term} was added to the watchlist',
+            'removed': '{term} was removed from the watchlist',
+            'not_found': '{term} is not on the watchlist',
+            'invalid': 'Invalid pattern {term}: {error}',
+            'too_long': 'Terms can be at most {limit} characters long',
+            'nested': 'Pattern {term} repeats a group that already repeats, which can make matching very slow. '
+                      'Remove the nested quantifier, e.g. `(a+)+` → `a+`',
+            'too_many': 'The watchlist already has {limit} terms',
+            'empty': 'The watchlist is empty',
+            'regex': 'regex'
+        },
+        'delivery_modes': {
+            'realtime': 'realtime',
+            'digest': 'digest',
+            'archive': 'archive only',
+            'off': 'off'
+        },
+        'digest': {
+            'title': 'Digest for the last {minutes} min'
+        },
+        'anomaly': {
+            'start': '**{event}:** {count} in the last {window}s (usually about {usual}).\n'
+                     'Further events are summarised in one message until the spike is over.',
+            'end': '**{event}:** {count} over {duration}',
+            'users': '**Members:** {users}'
+        },
+        'tracing': {
+            'title': 'Pipeline timings (ms)',
+            'disabled': 'Tracing is disabled (TRACING_ENABLED=false)',
+            'empty': 'No samples recorded yet'
+        },
+        'db_stats': {
+            'title': 'Database query statistics',
+            'empty': 'No queries have run yet'
+        },
+        'archive': {
+            'title': 'Log history',
+            'disabled': 'The log archive is disabled (ARCHIVE_ENABLED)',
+            'empty': 'Nothing found',
+            'invalid_date': 'Invalid date: `{value}`. Use YYYY-MM-DD or YYYY-MM-DD HH:MM',
+            'page': 'Page {page}',
+            'retention_set': 'Archived events are kept for {days} days, message bodies are {redact}',
+            'redact_after': 'blanked after {days} days',
+            'redact_never': 'kept as long as the event',
+            'exported': 'Export finished: {parts} file(s)',
+            'export_failed': 'The export failed, see the bot logs for details',
+            'export_running': 'An export for this server is already running',
+            'export_started': 'Exporting the archive of **{guild}**, the files will arrive here',
+            'export_queued': 'Export started, the files will be sent to your DMs',
+            'export_dm_closed': 'I can\'t send you direct messages. Open your DMs to receive the export'
+        },
         'errors': {
             'missing_permissions': 'You don\'t have permission to use this command',
             'bot_missing_permissions': 'Bot doesn\'t have permission to execute this command',
@@ -385,5 +779,6 @@ log_colors = {
     "warning": 0xfaa61a,
     "info": 0x7289da,
     "default": 0x2f3136,
-    "moderation": 0xffd700
+    "moderation": 0xffd700,
+    "alert": 0x992d22
 }
\ No newline at end of file
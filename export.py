@@ -0,0 +1,51 @@
+import argparse
+import asyncio
+import contextlib
+import logging
+import os
+
+from config import export as export_settings
+from utils.archive import parse_date
+from utils.database import Database
+from utils.export import COMPRESSIONS, FORMATS, export_chunks, file_name
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Export a guild's archived log events to compressed files")
+    parser.add_argument("guild_id", type=int)
+    parser.add_argument("--since", type=parse_date, help="UTC start, YYYY-MM-DD[ HH:MM]")
+    parser.add_argument("--until", type=parse_date, help="UTC end (exclusive), YYYY-MM-DD[ HH:MM]")
+    parser.add_argument("--format", choices=FORMATS, default=export_settings['format'])
+    parser.add_argument("--compression", choices=COMPRESSIONS, default=export_settings['compression'])
+    parser.add_argument("--output", default=".", help="directory the files are written to")
+    parser.add_argument("--part-size", type=int, default=0,
+                        help="split into files of at most this many bytes (default: one file)")
+    return parser.parse_args()
+
+
+async def export(args: argparse.Namespace) -> None:
+    db = Database()
+    await db.connect()
+    part_size = args.part_size or None
+    output = None
+    try:
+        async with contextlib.aclosing(db.iter_log_events(args.guild_id, args.since, args.until)) as rows, \
+                contextlib.aclosing(export_chunks(rows, args.format, args.compression, part_size)) as chunks:
+            async for part, chunk, last in chunks:
+                if output is None:
+                    name = file_name(args.guild_id, args.format, args.compression, part if part_size else None)
+                    output = open(os.path.join(args.output, name), "wb")
+                output.write(chunk)
+                if last:
+                    output.close()
+                    logging.info(f"Wrote {output.name}")
+                    output = None
+    finally:
+        if output is not None:
+            output.close()
+        await db.close()
+
+
+if __name__ == '__main__':
+    logging.basicConfig(format='[%(asctime)s | %(levelname)s]: %(message)s', level=logging.INFO)
+    asyncio.run(export(parse_args()))
@@ -20,6 +20,8 @@ logging.basicConfig(handlers=(file_log, console_out),
                     level=logging.INFO)
 
 db = Database()
+# Shared by every cog so a settings change made from a command invalidates the config the listeners use.
+bot.db = db
 
 
 def main():
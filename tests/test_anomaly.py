@@ -0,0 +1,69 @@
+from utils.anomaly import THRESHOLDS, AnomalyDetector, SlidingWindow
+
+GUILD = 1
+
+
+def test_sliding_window_counts_the_last_buckets():
+    window = SlidingWindow(buckets=4, width=10, now=0)
+    window.add(3)
+    window.advance(15)
+    window.add(2)
+    assert window.total == 5
+    window.advance(39)
+    assert window.total == 5
+    window.advance(40)
+    assert window.total == 2
+    assert window.counts == [0, 2, 0, 0]
+    window.advance(1000)
+    assert window.total == 0
+
+
+def test_sliding_window_baseline_learns_from_completed_buckets():
+    window = SlidingWindow(buckets=4, width=10, now=0)
+    window.add(10)
+    window.advance(10)
+    assert 0 < window.baseline < 10
+    frozen = window.baseline
+    window.add(10)
+    window.advance(20, learn=False)
+    assert window.baseline == frozen
+
+
+def test_spike_starts_at_threshold_and_ends_when_quiet():
+    detector = AnomalyDetector(buckets=6, window=60, multiplier=4)
+    threshold = THRESHOLDS["user_ban"]
+    for _ in range(threshold - 1):
+        assert detector.record(GUILD, "user_ban", now=100) is None
+    spike = detector.record(GUILD, "user_ban", now=100)
+    assert spike is not None and spike.counts == {"user_ban": threshold - 1}
+    assert detector.active(GUILD, "user") is spike
+    assert detector.expire(now=130) == []
+    assert detector.expire(now=161) == [(GUILD, spike)]
+    assert detector.active(GUILD, "user") is None
+
+
+def test_spike_covers_its_whole_category():
+    detector = AnomalyDetector(buckets=6, window=60, multiplier=4)
+    for _ in range(THRESHOLDS["user_join"]):
+        spike = detector.record(GUILD, "user_join", now=100)
+    assert detector.record(GUILD, "user_ban", now=101) is spike
+    spike.add("user_update", 5)
+    spike.add("user_join", 6)
+    assert spike.counts["user_update"] == 1
+    assert spike.count == THRESHOLDS["user_join"] + 1
+    assert spike.users == [5, 6]
+    assert detector.active(GUILD, "message") is None
+    # Only the event that started the spike decides when it ends.
+    assert detector.expire(now=161) == [(GUILD, spike)]
+
+
+def test_busy_baseline_raises_the_limit():
+    detector = AnomalyDetector(buckets=6, window=60, multiplier=4)
+    threshold = THRESHOLDS["user_join"]
+    for second in range(10, 6010, 10):
+        for _ in range(threshold):
+            detector.record(GUILD, "user_join", now=second)
+        detector.expire(now=second + 9)
+        detector.spikes.clear()
+    window = detector.windows[(GUILD, "user_join")]
+    assert detector.limit(window, "user_join") > threshold
@@ -0,0 +1,113 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from disnake import AuditLogAction
+
+from utils.audit_log import AuditLogCorrelator
+
+GUILD = 1
+
+
+def make_guild(view_audit_log=True):
+    async def audit_logs_flatten():
+        guild.fetches += 1
+        return []
+
+    guild = SimpleNamespace(id=GUILD, fetches=0,
+                            me=SimpleNamespace(guild_permissions=SimpleNamespace(view_audit_log=view_audit_log)))
+    guild.audit_logs = lambda limit: SimpleNamespace(flatten=audit_logs_flatten)
+    return guild
+
+
+def make_entry(entry_id, action, target, extra=None):
+    return SimpleNamespace(id=entry_id, guild=SimpleNamespace(id=GUILD), action=action, target=target,
+                           extra=extra, created_at=datetime.now(timezone.utc), user=None, reason=None)
+
+
+def test_find_matches_public_target_id():
+    async def scenario():
+        correlator = AuditLogCorrelator(delay=0)
+        correlator.add(make_entry(1, AuditLogAction.kick, SimpleNamespace(id=10)))
+        correlator.add(make_entry(2, AuditLogAction.kick, None))
+        entry = await correlator.find(make_guild(), AuditLogAction.kick, 10)
+        assert entry.id == 1
+
+    asyncio.run(scenario())
+
+
+def test_find_without_fetch_only_checks_the_cache():
+    async def scenario():
+        correlator = AuditLogCorrelator(delay=60)
+        guild = make_guild()
+        entry = await asyncio.wait_for(correlator.find(guild, AuditLogAction.kick, 10, fetch=False), 1)
+        assert entry is None
+        assert guild.fetches == 0
+        assert not correlator.misses
+
+    asyncio.run(scenario())
+
+
+def test_find_remembers_fetched_misses():
+    async def scenario():
+        correlator = AuditLogCorrelator(delay=0)
+        guild = make_guild()
+        assert await correlator.find(guild, AuditLogAction.ban, 10) is None
+        assert await correlator.find(guild, AuditLogAction.ban, 10) is None
+        assert guild.fetches == 1
+        correlator.add(make_entry(3, AuditLogAction.ban, SimpleNamespace(id=10)))
+        assert (await correlator.find(guild, AuditLogAction.ban, 10)).id == 3
+
+    asyncio.run(scenario())
+
+
+def make_delete(entry_id, author_id, channel_id, count, age=0):
+    entry = make_entry(entry_id, AuditLogAction.message_delete, SimpleNamespace(id=author_id),
+                       SimpleNamespace(channel=SimpleNamespace(id=channel_id), count=count))
+    entry.created_at -= timedelta(seconds=age)
+    return entry
+
+
+def test_aggregated_delete_matches_once_its_count_goes_up():
+    async def scenario():
+        correlator = AuditLogCorrelator(delay=0, window=15)
+        correlator.add(make_delete(4, 10, 100, 1, age=60))
+        guild = make_guild()
+        guild.audit_logs = lambda limit: SimpleNamespace(flatten=fetched)
+
+        async def fetched():
+            guild.fetches += 1
+            return [make_delete(4, 10, 100, 2, age=60)]
+
+        assert correlator._match(GUILD, (AuditLogAction.message_delete,), 10, 100) is None
+        entry = await correlator.find(guild, AuditLogAction.message_delete, 10, channel_id=100)
+        assert entry.id == 4
+        assert guild.fetches == 1
+        assert await correlator.find(guild, AuditLogAction.message_delete, 10, channel_id=200) is None
+
+    asyncio.run(scenario())
+
+
+def test_unchanged_aggregated_delete_does_not_match():
+    async def scenario():
+        correlator = AuditLogCorrelator(delay=0, window=15)
+        correlator.add(make_delete(4, 10, 100, 3, age=60))
+        guild = make_guild()
+        guild.audit_logs = lambda limit: SimpleNamespace(flatten=fetched)
+
+        async def fetched():
+            return [make_delete(4, 10, 100, 3, age=60)]
+
+        assert await correlator.find(guild, AuditLogAction.message_delete, 10, channel_id=100) is None
+
+    asyncio.run(scenario())
+
+
+def test_uncached_delete_target_matches_by_channel_only():
+    correlator = AuditLogCorrelator()
+    entry = make_delete(5, 10, 100, 1)
+    entry.target = None
+    correlator.add(entry)
+    actions = (AuditLogAction.message_delete,)
+    assert correlator._match(GUILD, actions, 10, 100) is entry
+    assert correlator._match(GUILD, actions, 10) is None
@@ -0,0 +1,139 @@
+import asyncio
+from datetime import datetime, timezone
+
+from bench.fakes import FakeDatabase
+
+GUILD = 1
+
+
+def voice_session(guild_id=GUILD, member_id=10, duration=60):
+    now = datetime.now(timezone.utc)
+    return guild_id, member_id, 20, now, now, duration, True
+
+
+def make_db(latency=0.01):
+    db = FakeDatabase(latency=latency)
+    db.add_guild(GUILD, 100)
+    return db
+
+
+def test_single_flight_shares_one_query():
+    async def scenario():
+        db = make_db()
+        await db.add_voice_sessions([voice_session()])
+        first, second = await asyncio.gather(db.get_voice_stats(GUILD), db.get_voice_stats(GUILD, limit=10))
+        assert first is second
+        assert first["sessions"] == 1
+        assert db.queries["get_voice_summary"] == 1
+        assert not db._inflight
+
+    asyncio.run(scenario())
+
+
+def test_single_flight_keeps_different_arguments_apart():
+    async def scenario():
+        db = make_db()
+        await asyncio.gather(db.get_voice_stats(GUILD, 5), db.get_voice_stats(GUILD, 10))
+        assert db.queries["get_voice_summary"] == 2
+
+    asyncio.run(scenario())
+
+
+def test_single_flight_follower_retries_when_leader_is_cancelled():
+    async def scenario():
+        db = make_db()
+        leader = asyncio.create_task(db.get_voice_stats(GUILD))
+        await asyncio.sleep(0.001)
+        follower = asyncio.create_task(db.get_voice_stats(GUILD))
+        await asyncio.sleep(0.001)
+        leader.cancel()
+        stats = await follower
+        assert stats["members"] == 0
+        assert leader.cancelled()
+        assert db.queries["get_voice_summary"] == 2
+
+    asyncio.run(scenario())
+
+
+def test_invalidate_detaches_calls_in_flight():
+    async def scenario():
+        db = make_db()
+        stale = asyncio.create_task(db.get_voice_stats(guild_id=GUILD))
+        await asyncio.sleep(0.001)
+        db.invalidate(GUILD)
+        fresh = await db.get_voice_stats(GUILD)
+        assert fresh is not await stale
+        assert db.queries["get_voice_summary"] == 2
+
+    asyncio.run(scenario())
+
+
+def test_guild_config_misses_share_one_load():
+    async def scenario():
+        db = make_db()
+        configs = await asyncio.gather(*(db.get_guild_config(GUILD) for _ in range(10)))
+        assert all(config is configs[0] for config in configs)
+        assert configs[0].log_channel_id == 100
+        assert db.queries["get_guild_settings"] == 1
+        await db.get_guild_config(GUILD)
+        assert db.queries["get_guild_settings"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_guild_config_follower_loads_when_leader_is_cancelled():
+    async def scenario():
+        db = make_db()
+        leader = asyncio.create_task(db.get_guild_config(GUILD))
+        await asyncio.sleep(0.001)
+        follower = asyncio.create_task(db.get_guild_config(GUILD))
+        await asyncio.sleep(0.001)
+        leader.cancel()
+        assert (await follower).log_channel_id == 100
+        assert db.queries["get_guild_settings"] == 2
+        assert db.configs[GUILD].log_channel_id == 100
+
+    asyncio.run(scenario())
+
+
+def test_guild_config_waits_for_its_warm_up_chunk():
+    async def scenario():
+        db = make_db()
+        db.add_guild(2, 200)
+        warmup = asyncio.create_task(db.warm_guild_configs([GUILD, 2]))
+        await asyncio.sleep(0)
+        config = await db.get_guild_config(2)
+        await warmup
+        assert config.log_channel_id == 200
+        assert db.queries["get_guild_settings"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_warm_up_lets_waiters_load():
+    async def scenario():
+        db = make_db()
+        warmup = asyncio.create_task(db.warm_guild_configs([GUILD]))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(db.get_guild_config(GUILD))
+        await asyncio.sleep(0.001)
+        warmup.cancel()
+        assert (await waiter).exists
+        assert not db._loading
+
+    asyncio.run(scenario())
+
+
+def test_invalidate_during_load_reloads_for_later_callers():
+    async def scenario():
+        db = make_db()
+        stale = asyncio.create_task(db.get_guild_config(GUILD))
+        await asyncio.sleep(0.001)
+        db.settings[GUILD]["language"] = "ru"
+        db.invalidate(GUILD)
+        fresh = await db.get_guild_config(GUILD)
+        await stale
+        assert fresh.language == "ru"
+        assert db.configs[GUILD] is fresh
+
+    asyncio.run(scenario())
@@ -0,0 +1,84 @@
+import asyncio
+import csv
+import gzip
+import io
+import json
+import random
+from datetime import datetime, timezone
+
+import pytest
+
+from utils.export import COLUMNS, export_chunks, file_name
+
+
+def make_rows(count):
+    rng = random.Random(0)
+    now = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    return [
+        {"created_at": now, "guild_id": 1, "log_type": "message", "event": "message_new", "user_id": index,
+         "channel_id": 100, "content": "".join(rng.choice("abcdefghij ") for _ in range(200))}
+        for index in range(count)
+    ]
+
+
+async def aiter_rows(rows):
+    for row in rows:
+        yield row
+
+
+def collect(rows, **kwargs):
+    async def scenario():
+        parts = {}
+        async for part, chunk, last in export_chunks(aiter_rows(rows), **kwargs):
+            parts.setdefault(part, []).append((chunk, last))
+        return parts
+
+    parts = asyncio.run(scenario())
+    assert sorted(parts) == list(range(len(parts)))
+    for chunks in parts.values():
+        # Exactly one chunk closes each part, and it comes last.
+        assert [last for _, last in chunks] == [False] * (len(chunks) - 1) + [True]
+    return [b"".join(chunk for chunk, _ in chunks) for _, chunks in sorted(parts.items())]
+
+
+def test_gzip_jsonl_round_trips():
+    rows = make_rows(50)
+    [data] = collect(rows, fmt="jsonl", compression="gzip", batch_rows=7)
+    lines = gzip.decompress(data).decode("utf-8").splitlines()
+    assert [json.loads(line)["user_id"] for line in lines] == list(range(50))
+    assert set(json.loads(lines[0])) == set(COLUMNS)
+
+
+def test_parts_split_at_the_size_limit_and_decompress_alone():
+    rows = make_rows(3000)
+    part_size = 64 * 1024
+    parts = collect(rows, fmt="csv", compression="gzip", part_size=part_size, batch_rows=100)
+    assert len(parts) > 1
+    assert all(len(part) <= part_size for part in parts)
+    user_ids = []
+    for part in parts:
+        reader = csv.reader(io.StringIO(gzip.decompress(part).decode("utf-8")))
+        assert next(reader) == list(COLUMNS)
+        user_ids += [int(row[4]) for row in reader]
+    assert user_ids == list(range(3000))
+
+
+def test_zstd_parts_decompress_alone():
+    zstandard = pytest.importorskip("zstandard")
+    rows = make_rows(3000)
+    parts = collect(rows, fmt="jsonl", compression="zstd", part_size=64 * 1024, batch_rows=100)
+    assert len(parts) > 1
+    lines = []
+    for part in parts:
+        lines += zstandard.ZstdDecompressor().decompressobj().decompress(part).decode("utf-8").splitlines()
+    assert [json.loads(line)["user_id"] for line in lines] == list(range(3000))
+
+
+def test_empty_export_is_one_valid_part():
+    [data] = collect([], fmt="jsonl", compression="gzip")
+    assert gzip.decompress(data) == b""
+
+
+def test_file_names():
+    assert file_name(1, "jsonl", "gzip") == "1-events.jsonl.gz"
+    assert file_name(1, "csv", "none", 0) == "1-events-001.csv"
@@ -0,0 +1,39 @@
+from utils.ghost_pings import GhostPingBuffer
+
+
+def test_mentions_expire_after_the_window():
+    buffer = GhostPingBuffer(window=10, max_messages=100)
+    buffer.add(1, [10], [], False, now=100)
+    buffer.add(2, [10], [], False, now=100)
+    assert buffer.deleted(1, now=105).users == {10}
+    assert buffer.deleted(2, now=111) is None
+    buffer.add(3, [], [20], False, now=105)
+    buffer.add(4, [], [], True, now=120)
+    assert 3 not in buffer.messages
+    assert [message_id for _, message_id in buffer.order] == [4]
+
+
+def test_messages_without_mentions_are_not_kept():
+    buffer = GhostPingBuffer(window=10, max_messages=100)
+    buffer.add(1, [], [], False, now=100)
+    assert not buffer.messages
+    assert buffer.deleted(1, now=101) is None
+
+
+def test_buffer_drops_the_oldest_past_its_size():
+    buffer = GhostPingBuffer(window=60, max_messages=3)
+    for message_id in range(5):
+        buffer.add(message_id, [10], [], False, now=100 + message_id)
+    assert sorted(buffer.messages) == [2, 3, 4]
+    assert len(buffer.order) == 3
+    assert buffer.deleted(0, now=105) is None
+    assert buffer.deleted(4, now=105).users == {10}
+
+
+def test_edit_reports_only_removed_mentions():
+    buffer = GhostPingBuffer(window=60, max_messages=10)
+    buffer.add(1, [10, 11], [20], True, now=100)
+    removed = buffer.edited(1, [10], [20], False, now=101)
+    assert removed.users == {11} and not removed.roles and removed.everyone
+    assert buffer.edited(1, [10], [20], False, now=102) is None
+    assert buffer.edited(1, [], [], False, now=200) is None
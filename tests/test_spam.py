@@ -0,0 +1,60 @@
+from utils.spam import DuplicateTracker, content_hash
+
+GUILD, USER = 1, 10
+
+
+def make_tracker(threshold=4, window=30):
+    return DuplicateTracker(threshold=threshold, window=window, history=16, max_users=100)
+
+
+def test_hash_ignores_case_and_whitespace():
+    assert content_hash("Free  NITRO\n") == content_hash("free nitro")
+    assert content_hash("free nitro") != content_hash("free nitro!")
+
+
+def test_first_copy_is_logged_and_repeats_are_held():
+    tracker = make_tracker()
+    assert tracker.check(GUILD, USER, 100, "spam", "m1", now=100) is None
+    held = tracker.check(GUILD, USER, 100, "spam", "m2", now=101)
+    assert held is not None and not held.confirmed
+    assert tracker.check(GUILD, USER, 101, "SPAM", "m3", now=102) is held
+    assert held.held == ["m2", "m3"]
+    assert held.count == 3
+
+
+def test_threshold_confirms_the_burst_and_drops_held_copies():
+    tracker = make_tracker()
+    for second in range(4):
+        burst = tracker.check(GUILD, USER, 100 + second % 2, "spam", f"m{second}", now=100 + second)
+    assert burst.confirmed
+    assert burst.held == []
+    assert tracker.check(GUILD, USER, 100, "spam", "m4", now=104) is burst
+    assert burst.held == []
+    assert burst.count == 5
+    assert burst.channels == {100: 3, 101: 2}
+    assert burst.started == 100
+
+
+def test_unconfirmed_run_is_released_after_the_window():
+    tracker = make_tracker()
+    tracker.check(GUILD, USER, 100, "hi", "m1", now=100)
+    tracker.check(GUILD, USER, 100, "hi", "m2", now=110)
+    assert tracker.expire(now=139) == []
+    [ended] = tracker.expire(now=141)
+    assert not ended.confirmed and ended.held == ["m2"]
+    assert not tracker.bursts and not tracker.users
+
+
+def test_copies_outside_the_window_do_not_count():
+    tracker = make_tracker(threshold=3, window=30)
+    assert tracker.check(GUILD, USER, 100, "hi", now=100) is None
+    assert tracker.check(GUILD, USER, 100, "hi", now=140) is None
+    assert tracker.check(GUILD, USER, 100, "hi", now=150) is not None
+
+
+def test_users_and_guilds_are_tracked_apart():
+    tracker = make_tracker(threshold=2)
+    assert tracker.check(GUILD, USER, 100, "hi", now=100) is None
+    assert tracker.check(GUILD, USER + 1, 100, "hi", now=100) is None
+    assert tracker.check(GUILD + 1, USER, 100, "hi", now=100) is None
+    assert tracker.check(GUILD, USER, 100, "hi", now=101).confirmed
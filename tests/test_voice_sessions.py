@@ -0,0 +1,50 @@
+import asyncio
+
+from utils.voice_sessions import VoiceSessionTracker
+
+
+class FailingDatabase:
+    def __init__(self):
+        self.fail = True
+        self.stored = []
+
+    async def add_voice_sessions(self, batch):
+        if self.fail:
+            raise ConnectionError("database is down")
+        self.stored += batch
+
+
+def make_tracker(tmp_path, max_pending=5):
+    return VoiceSessionTracker(snapshot_path=str(tmp_path / "voice.json"), batch_size=2, max_pending=max_pending)
+
+
+def test_segments_are_queued_per_move_and_leave(tmp_path):
+    tracker = make_tracker(tmp_path)
+    tracker.join(1, 10, 100, now=1000)
+    assert tracker.move(1, 10, 101, now=1060) == 60
+    assert tracker.leave(1, 10, now=1090) == 90
+    segments = [(segment[2], segment[5], segment[6]) for segment in tracker.completed]
+    assert segments == [(100, 60, False), (101, 30, True)]
+    assert tracker.batch_ready
+
+
+def test_failed_flush_keeps_segments_up_to_the_cap(tmp_path):
+    async def scenario():
+        tracker = make_tracker(tmp_path, max_pending=5)
+        db = FailingDatabase()
+        for member_id in range(4):
+            tracker.join(1, member_id, 100, now=1000)
+            tracker.leave(1, member_id, now=1010)
+        await tracker.flush(db)
+        assert len(tracker.completed) == 4
+        for member_id in range(4, 7):
+            tracker.join(1, member_id, 100, now=1000)
+            tracker.leave(1, member_id, now=1010)
+        await tracker.flush(db)
+        assert [segment[1] for segment in tracker.completed] == [2, 3, 4, 5, 6]
+        db.fail = False
+        await tracker.flush(db)
+        assert not tracker.completed
+        assert len(db.stored) == 5
+
+    asyncio.run(scenario())
@@ -0,0 +1,67 @@
+import re
+
+import pytest
+
+from config import watchlist as watchlist_settings
+from utils.watchlist import _trie_pattern, compile_watchlist, validate_term
+
+
+def words(*terms):
+    return tuple((term, False) for term in terms)
+
+
+def test_trie_shares_prefixes():
+    assert _trie_pattern(["cat", "car", "cart"]).startswith("ca(")
+    pattern = re.compile(_trie_pattern(["cat", "car", "cart"]))
+    assert [pattern.fullmatch(word) is not None for word in ("cat", "car", "cart", "ca", "carts")] == \
+        [True, True, True, False, False]
+
+
+def test_words_match_whole_words_only():
+    pattern = compile_watchlist(words("cat", "car"))
+    assert pattern.search("my cat sleeps").group(0) == "cat"
+    assert pattern.search("car.") is not None
+    assert pattern.search("(cat)") is not None
+    assert pattern.search("concatenate") is None
+    assert pattern.search("cars") is None
+    assert pattern.search("cat_food") is None
+
+
+def test_words_ignore_case():
+    pattern = compile_watchlist(words("Scam", "free nitro"))
+    assert pattern.search("SCAM alert").group(0) == "SCAM"
+    assert pattern.search("get Free Nitro now") is not None
+
+
+def test_special_characters_are_literal():
+    pattern = compile_watchlist(words("c++", "a.b"))
+    assert pattern.search("I write c++ code") is not None
+    assert pattern.search("axb") is None
+
+
+def test_regex_terms_are_used_as_written():
+    pattern = compile_watchlist(words("cat") + (("disc[o0]rd\\.gg/\\w+", True),))
+    assert pattern.search("join DISC0RD.gg/abc").group(0) == "DISC0RD.gg/abc"
+    assert pattern.search("cat") is not None
+    assert compile_watchlist(()) is None
+
+
+@pytest.mark.parametrize("term", [
+    "(a+)+", "(a*)*", "(?:a|b+)*", "(\\w+\\s?)*$", "((ab)*c)+", "(x+x+)+y", "(a{2,})+", "([a-z]+)*@",
+])
+def test_nested_quantifiers_are_rejected(term):
+    assert validate_term(term, True) == "nested"
+
+
+@pytest.mark.parametrize("term", [
+    "a+b+", "(ab)+", "(a+)?", "(a+){1}", "(a?)+", "[(a+)]+", "\\(a+\\)+", "(?:https?://)+", "x{2}y*",
+])
+def test_single_quantifiers_are_allowed(term):
+    assert validate_term(term, True) is None
+
+
+def test_term_length_limits():
+    assert validate_term(" ", False) == "length"
+    assert validate_term("a" * watchlist_settings['max_term_length'], False) is None
+    assert validate_term("a" * (watchlist_settings['max_regex_length'] + 1), True) == "length"
+    assert validate_term("(", True) not in (None, "length", "nested")
@@ -0,0 +1,143 @@
+import time
+from typing import Dict, List, Optional, Tuple
+
+from config import anomaly as anomaly_settings
+
+# Events watched for spikes, their log category, and the minimum count per window that can raise an alert.
+CATEGORIES = {
+    "user_join": "user",
+    "user_ban": "user",
+    "message_bulk_delete": "message",
+    "channel_delete": "server",
+}
+THRESHOLDS = {
+    "user_join": anomaly_settings['join_threshold'],
+    "user_ban": anomaly_settings['ban_threshold'],
+    "message_bulk_delete": anomaly_settings['bulk_delete_threshold'],
+    "channel_delete": anomaly_settings['channel_delete_threshold'],
+}
+# The spike's own alerts share its category but are never folded into it.
+ALERTS = frozenset({"spike_start", "spike_end"})
+
+
+class SlidingWindow:
+    """Event count over the last ``buckets * width`` seconds in a ring of per-bucket counters.
+
+    Adding an event and reading the total are O(1); moving the window clears at most
+    ``buckets`` slots. Each completed bucket also feeds an exponential moving average
+    that serves as the rolling baseline (events per bucket).
+    """
+
+    __slots__ = ("width", "counts", "total", "position", "baseline")
+
+    def __init__(self, buckets: int, width: float, now: float):
+        self.width = width
+        self.counts = [0] * buckets
+        self.total = 0
+        self.position = int(now // width)
+        self.baseline = 0.0
+
+    def advance(self, now: float, learn: bool = True) -> None:
+        position = int(now // self.width)
+        steps = min(position - self.position, len(self.counts))
+        for step in range(1, steps + 1):
+            if learn:
+                completed = self.counts[(self.position + step - 1) % len(self.counts)]
+                self.baseline += anomaly_settings['baseline_alpha'] * (completed - self.baseline)
+            slot = (self.position + step) % len(self.counts)
+            self.total -= self.counts[slot]
+            self.counts[slot] = 0
+        if position > self.position:
+            self.position = position
+
+    def add(self, amount: int = 1) -> None:
+        self.counts[self.position % len(self.counts)] += amount
+        self.total += amount
+
+
+class Spike:
+    """A spike in one guild and category; ``counts`` tallies every event folded into it."""
+
+    __slots__ = ("event", "category", "started", "counts", "users", "alerted")
+
+    def __init__(self, event: str, started: float, count: int):
+        self.event = event
+        self.category = CATEGORIES[event]
+        self.started = started
+        self.counts: Dict[str, int] = {event: count}
+        self.users: List[int] = []
+        self.alerted = False
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts.values())
+
+    def add(self, event: str, user_id: Optional[int]) -> None:
+        self.counts[event] = self.counts.get(event, 0) + 1
+        if user_id is not None and len(self.users) < anomaly_settings['max_listed_users']:
+            self.users.append(user_id)
+
+
+class AnomalyDetector:
+    """Per-guild spike detection over join, ban, bulk delete and channel delete rates.
+
+    A spike starts when an event's count in the window reaches its threshold and
+    ``baseline_multiplier`` times its usual rate, whichever is higher. Spikes are kept
+    per category, so a join raid covers every ``user`` event until it is over. While a
+    spike is active the category's baselines are frozen, and the spike ends once the
+    count of the event that started it drops below half of that limit.
+    """
+
+    def __init__(self, buckets: int = anomaly_settings['buckets'], window: float = anomaly_settings['window'],
+                 multiplier: float = anomaly_settings['baseline_multiplier']):
+        self.buckets = buckets
+        self.width = window / buckets
+        self.multiplier = multiplier
+        self.windows: Dict[Tuple[int, str], SlidingWindow] = {}
+        # ``(guild_id, category)`` -> the category's active spike.
+        self.spikes: Dict[Tuple[int, str], Spike] = {}
+
+    def limit(self, window: SlidingWindow, event: str) -> float:
+        return max(THRESHOLDS[event], self.multiplier * window.baseline * self.buckets)
+
+    def record(self, guild_id: int, event: str, now: Optional[float] = None) -> Optional[Spike]:
+        """Count one event; returns the guild's active spike for its category, if there is one."""
+        if event not in THRESHOLDS:
+            return None
+        now = now or time.time()
+        key = (guild_id, event)
+        category = (guild_id, CATEGORIES[event])
+        spike = self.spikes.get(category)
+        window = self.windows.get(key)
+        if window is None:
+            window = self.windows[key] = SlidingWindow(self.buckets, self.width, now)
+        window.advance(now, learn=spike is None)
+        window.add()
+        if spike is None and window.total >= self.limit(window, event):
+            # The events that tripped the alert are already in the window; start the count from them.
+            spike = self.spikes[category] = Spike(event, now, window.total - 1)
+        return spike
+
+    def active(self, guild_id: int, category: str) -> Optional[Spike]:
+        return self.spikes.get((guild_id, category))
+
+    def expire(self, now: Optional[float] = None) -> List[Tuple[int, Spike]]:
+        """End quiet spikes and drop idle windows; returns the spikes that ended."""
+        now = now or time.time()
+        ended = []
+        for key, window in list(self.windows.items()):
+            spike = self.spikes.get((key[0], CATEGORIES[key[1]]))
+            window.advance(now, learn=spike is None)
+            if spike is None:
+                if not window.total and window.baseline < 0.01:
+                    del self.windows[key]
+            elif spike.event == key[1] and window.total < self.limit(window, key[1]) / 2:
+                del self.spikes[(key[0], spike.category)]
+                ended.append((key[0], spike))
+        return ended
+
+    def forget(self, guild_id: int) -> None:
+        for key in [key for key in self.windows if key[0] == guild_id]:
+            del self.windows[key]
+        for key in [key for key in self.spikes if key[0] == guild_id]:
+            del self.spikes[key]
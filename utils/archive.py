@@ -0,0 +1,62 @@
+import logging
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from config import archive as archive_settings
+from utils import metrics
+
+
+def parse_date(value: Optional[str]) -> Optional[datetime]:
+    """Parse ``YYYY-MM-DD[ HH:MM]`` given in UTC; raises ``ValueError`` on anything else."""
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value.strip())
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+class EventArchive:
+    """Logged events waiting to be written to the ``log_events`` table.
+
+    ``send_log_embed`` only appends a tuple here; rows reach Postgres in batches via
+    ``COPY``, so archiving never adds a round trip to the live logging path. Each row is
+    ``(created_at, guild_id, log_type, event, user_id, channel_id, content)``, where ``content``
+    is the raw text of the message involved, or None for events without one.
+    """
+
+    def __init__(self, batch_size: int = archive_settings['batch_size'],
+                 max_pending: int = archive_settings['max_pending']):
+        self.batch_size = batch_size
+        self.max_pending = max_pending
+        self.pending: List[tuple] = []
+
+    def add(self, guild_id: int, log_type: str, event: str, user_id: Optional[int], channel_id: Optional[int],
+            content: Optional[str]) -> None:
+        if len(self.pending) >= self.max_pending:
+            # Postgres is down or far behind; keep memory bounded and let Discord delivery go on.
+            metrics.events_dropped.inc(log_type, "archive_full")
+            return
+        self.pending.append((datetime.now(timezone.utc), guild_id, log_type, event, user_id, channel_id, content))
+        metrics.archive_backlog.set(len(self.pending))
+
+    @property
+    def backlog(self) -> int:
+        return len(self.pending)
+
+    @property
+    def batch_ready(self) -> bool:
+        return len(self.pending) >= self.batch_size
+
+    async def flush(self, db) -> None:
+        """Write buffered events to Postgres in one batch."""
+        if not self.pending:
+            return
+        batch, self.pending = self.pending, []
+        try:
+            await db.add_log_events(batch)
+        except Exception as e:
+            logging.error(f"Failed to archive {len(batch)} log events: {e}")
+            self.pending[:0] = batch[:max(0, self.max_pending - len(self.pending))]
+        else:
+            metrics.archive_written.inc(amount=len(batch))
+        finally:
+            metrics.archive_backlog.set(len(self.pending))
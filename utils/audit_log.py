@@ -0,0 +1,155 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Optional, Tuple
+
+import disnake
+
+from config import audit_log as audit_settings
+
+
+def _target_id(entry: disnake.AuditLogEntry) -> Optional[int]:
+    # ``target`` is None when a user target is not cached.
+    return getattr(entry.target, "id", None)
+
+
+def _channel_id(entry: disnake.AuditLogEntry) -> Optional[int]:
+    # Message deletes and voice moves carry their channel in ``extra``.
+    return getattr(getattr(entry.extra, "channel", None), "id", None)
+
+
+def _count(entry: disnake.AuditLogEntry) -> int:
+    return getattr(entry.extra, "count", None) or 1
+
+
+class AuditLogCorrelator:
+    """Matches gateway events to the audit log entries that caused them.
+
+    Each guild keeps a rolling cache of recent entries, fed by the
+    ``on_audit_log_entry_create`` gateway event and by REST fetches. A lookup
+    checks the cache, waits ``delay`` seconds for the entry to be pushed, and
+    only then falls back to ``guild.audit_logs()``; concurrent lookups for one
+    guild share a single in-flight fetch. Lookups with ``fetch=False`` only
+    check the cache and never wait.
+
+    Discord aggregates repeated message deletes, moves and disconnects by one
+    moderator into a single entry and only bumps ``extra.count``, without a
+    new gateway event. An entry therefore counts as recent from when it was
+    created or from when a fetch first saw its count go up. A target the fetch found no entry for
+    is remembered for ``negative_ttl`` seconds, during which lookups for it only
+    check the cache. Without View Audit Log permission neither source is
+    available, so lookups return immediately.
+    """
+
+    def __init__(self, cache_size: int = audit_settings['cache_size'], window: float = audit_settings['window'],
+                 delay: float = audit_settings['delay'], fetch_limit: int = audit_settings['fetch_limit'],
+                 negative_ttl: float = audit_settings['negative_ttl']):
+        self.cache_size = cache_size
+        self.window = window
+        self.delay = delay
+        self.fetch_limit = fetch_limit
+        self.negative_ttl = negative_ttl
+        self.entries: Dict[int, OrderedDict] = {}
+        # Entry id -> when an aggregated entry's count was last seen going up.
+        self.bumped: Dict[int, datetime] = {}
+        # ``(guild_id, target_id)`` -> when the miss expires, in expiry order.
+        self.misses: "OrderedDict[Tuple[int, int], float]" = OrderedDict()
+        self._fetching: Dict[int, asyncio.Task] = {}
+
+    def add(self, entry: disnake.AuditLogEntry) -> None:
+        entries = self.entries.setdefault(entry.guild.id, OrderedDict())
+        previous = entries.pop(entry.id, None)
+        if previous is not None and _count(entry) > _count(previous):
+            self.bumped[entry.id] = datetime.now(timezone.utc)
+        entries[entry.id] = entry
+        while len(entries) > self.cache_size:
+            self.bumped.pop(entries.popitem(last=False)[0], None)
+        self.misses.pop((entry.guild.id, _target_id(entry)), None)
+
+    def forget(self, guild_id: int) -> None:
+        for entry_id in self.entries.pop(guild_id, {}):
+            self.bumped.pop(entry_id, None)
+        for key in [key for key in self.misses if key[0] == guild_id]:
+            del self.misses[key]
+
+    def _missed(self, key: Tuple[int, int], now: float) -> bool:
+        misses = self.misses
+        while misses:
+            oldest, expires = next(iter(misses.items()))
+            if expires > now:
+                break
+            del misses[oldest]
+        return key in misses
+
+    def _miss(self, key: Tuple[int, int], now: float) -> None:
+        self.misses[key] = now + self.negative_ttl
+        self.misses.move_to_end(key)
+
+    def _match(self, guild_id: int, actions: Iterable[disnake.AuditLogAction], target_id: int,
+               channel_id: Optional[int] = None) -> Optional[disnake.AuditLogEntry]:
+        now = datetime.now(timezone.utc)
+        for entry in reversed(self.entries.get(guild_id, {}).values()):
+            if entry.action not in actions:
+                continue
+            if channel_id is not None and _channel_id(entry) != channel_id:
+                continue
+            target = _target_id(entry)
+            # An uncached target can only be matched when the channel pins the entry down.
+            if target != target_id and (target is not None or channel_id is None):
+                continue
+            if (now - self.bumped.get(entry.id, entry.created_at)).total_seconds() <= self.window:
+                return entry
+        return None
+
+    async def _fetch(self, guild: disnake.Guild) -> None:
+        try:
+            entries = await guild.audit_logs(limit=self.fetch_limit).flatten()
+        except (disnake.Forbidden, disnake.HTTPException) as e:
+            logging.warning(f"Failed to fetch audit log for guild {guild.id}: {e}")
+            return
+        finally:
+            self._fetching.pop(guild.id, None)
+        for entry in sorted(entries, key=lambda item: item.id):
+            self.add(entry)
+
+    async def find(self, guild: disnake.Guild, actions, target_id: int, fetch: bool = True,
+                   channel_id: Optional[int] = None) -> Optional[disnake.AuditLogEntry]:
+        """Return the recent entry of one of ``actions`` targeting ``target_id``, if any.
+
+        ``channel_id`` restricts the match to entries whose ``extra`` names that channel.
+        """
+        # disnake enum values are namedtuples, so check for the enum before treating ``actions`` as a collection.
+        if isinstance(actions, disnake.AuditLogAction):
+            actions = (actions,)
+        entry = self._match(guild.id, actions, target_id, channel_id)
+        me = getattr(guild, "me", None)
+        if entry is not None or not fetch or me is None or not me.guild_permissions.view_audit_log:
+            return entry
+        key = (guild.id, target_id)
+        if self._missed(key, time.monotonic()):
+            return None
+
+        await asyncio.sleep(self.delay)
+        entry = self._match(guild.id, actions, target_id, channel_id)
+        if entry is not None:
+            return entry
+
+        task = self._fetching.get(guild.id)
+        if task is None:
+            task = self._fetching[guild.id] = asyncio.get_running_loop().create_task(self._fetch(guild))
+        await asyncio.shield(task)
+        entry = self._match(guild.id, actions, target_id, channel_id)
+        if entry is None:
+            self._miss(key, time.monotonic())
+        return entry
+
+    @staticmethod
+    def describe(entry: Optional[disnake.AuditLogEntry]) -> str:
+        if entry is None or entry.user is None:
+            return ""
+        line = f"\n**Moderator:** {entry.user.mention} (`{entry.user.id}`)"
+        if entry.reason:
+            line += f"\n**Reason:** {entry.reason}"
+        return line
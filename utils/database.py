@@ -1,9 +1,292 @@
+import asyncio
+import functools
+import inspect
 import logging
-from typing import Optional, Any, Dict
+import time
+from contextlib import asynccontextmanager
+from datetime import date, datetime, timedelta, timezone
+from typing import Optional, Any, AsyncIterator, Dict, Iterable, List, Mapping, Tuple
 
 import asyncpg
 
-from config import database
+from config import database, guild_config as guild_config_settings
+from utils import metrics
+from utils.guild_config import LOG_CATEGORIES, WATCHLIST_MODES, GuildConfig, format_delivery_modes
+from utils.tracing import tracer
+
+
+class Query:
+    """A statement declared once, prepared once per pool connection, with call statistics."""
+
+    __slots__ = ("name", "sql", "calls", "errors", "total_seconds")
+
+    def __init__(self, name: str, sql: str):
+        self.name = name
+        self.sql = sql
+        self.calls = 0
+        self.errors = 0
+        self.total_seconds = 0.0
+
+
+QUERIES: Dict[str, Query] = {}
+
+
+def query(name: str, sql: str) -> Query:
+    QUERIES[name] = statement = Query(name, sql)
+    return statement
+
+
+ALL_TYPES_ENABLED = 'message:1,invite:1,server:1,voice:1,automod:1,user:1'
+
+SET_LOG_CHANNEL = query("set_log_channel", """
+    INSERT INTO bot_settings (guild_id, log_channel_id)
+    VALUES ($1, $2)
+    ON CONFLICT (guild_id) DO UPDATE SET log_channel_id = EXCLUDED.log_channel_id
+""")
+# New guilds start with every log type on; existing delivery modes are kept whichever way logging is toggled.
+SET_LOGGING_ENABLED = query("set_logging_enabled", f"""
+    INSERT INTO bot_settings (guild_id, logging_enabled, log_types)
+    VALUES ($1, $2, '{ALL_TYPES_ENABLED}')
+    ON CONFLICT (guild_id) DO UPDATE
+        SET logging_enabled = EXCLUDED.logging_enabled,
+            log_types = COALESCE(bot_settings.log_types, EXCLUDED.log_types)
+""")
+SET_LOG_TYPES = query("set_log_types", "UPDATE bot_settings SET log_types = $2 WHERE guild_id = $1")
+SET_LANGUAGE = query("set_language", """
+    INSERT INTO bot_settings (guild_id, language)
+    VALUES ($1, $2)
+    ON CONFLICT (guild_id) DO UPDATE SET language = EXCLUDED.language
+""")
+SET_RETENTION = query("set_retention", """
+    INSERT INTO bot_settings (guild_id, retention_days, redact_after_days)
+    VALUES ($1, $2, $3)
+    ON CONFLICT (guild_id) DO UPDATE
+        SET retention_days = EXCLUDED.retention_days, redact_after_days = EXCLUDED.redact_after_days
+""")
+GET_GUILD_SETTINGS = query("get_guild_settings", """
+    SELECT guild_id, log_channel_id, logging_enabled, log_types, language, retention_days, redact_after_days
+    FROM bot_settings WHERE guild_id = ANY($1::BIGINT[])
+""")
+GET_GUILD_ROUTES = query(
+    "get_guild_routes",
+    "SELECT guild_id, target, channel_id FROM log_routes WHERE guild_id = ANY($1::BIGINT[])"
+)
+GET_GUILD_IGNORES = query(
+    "get_guild_ignores",
+    "SELECT guild_id, kind, target_id FROM log_ignores WHERE guild_id = ANY($1::BIGINT[])"
+)
+GET_GUILD_WATCH_TERMS = query(
+    "get_guild_watch_terms",
+    "SELECT guild_id, term, is_regex FROM watch_terms WHERE guild_id = ANY($1::BIGINT[]) ORDER BY term"
+)
+ADD_WATCH_TERM = query("add_watch_term", """
+    INSERT INTO watch_terms (guild_id, term, is_regex)
+    VALUES ($1, $2, $3)
+    ON CONFLICT (guild_id, term) DO UPDATE SET is_regex = EXCLUDED.is_regex
+""")
+REMOVE_WATCH_TERM = query("remove_watch_term", "DELETE FROM watch_terms WHERE guild_id = $1 AND term = $2")
+SET_ROUTE = query("set_route", """
+    INSERT INTO log_routes (guild_id, target, channel_id)
+    VALUES ($1, $2, $3)
+    ON CONFLICT (guild_id, target) DO UPDATE SET channel_id = EXCLUDED.channel_id
+""")
+REMOVE_ROUTE = query("remove_route", "DELETE FROM log_routes WHERE guild_id = $1 AND target = $2")
+ADD_IGNORE = query("add_ignore", """
+    INSERT INTO log_ignores (guild_id, kind, target_id)
+    VALUES ($1, $2, $3)
+    ON CONFLICT DO NOTHING
+""")
+CLEAR_IGNORES = query("clear_ignores", "DELETE FROM log_ignores WHERE guild_id = $1 AND kind = $2")
+REMOVE_IGNORE = query(
+    "remove_ignore",
+    "DELETE FROM log_ignores WHERE guild_id = $1 AND kind = $2 AND target_id = $3"
+)
+ADD_VOICE_STATS = query("add_voice_stats", """
+    INSERT INTO voice_stats (guild_id, member_id, total_seconds, sessions, last_left_at)
+    VALUES ($1, $2, $3, $4, $5)
+    ON CONFLICT (guild_id, member_id) DO UPDATE
+        SET total_seconds = voice_stats.total_seconds + EXCLUDED.total_seconds,
+            sessions = voice_stats.sessions + EXCLUDED.sessions,
+            last_left_at = GREATEST(voice_stats.last_left_at, EXCLUDED.last_left_at)
+""")
+GET_VOICE_SUMMARY = query("get_voice_summary", """
+    SELECT COALESCE(SUM(total_seconds), 0) AS total_seconds,
+           COALESCE(SUM(sessions), 0) AS sessions,
+           COUNT(*) AS members
+    FROM voice_stats
+    WHERE guild_id = $1
+""")
+GET_VOICE_TOP = query("get_voice_top", """
+    SELECT member_id, total_seconds, sessions
+    FROM voice_stats
+    WHERE guild_id = $1
+    ORDER BY total_seconds DESC
+    LIMIT $2
+""")
+GET_RETENTION_OVERRIDES = query("get_retention_overrides", """
+    SELECT guild_id, retention_days, redact_after_days
+    FROM bot_settings
+    WHERE retention_days IS NOT NULL OR redact_after_days IS NOT NULL
+""")
+LIST_LOG_PARTITIONS = query("list_log_partitions", """
+    SELECT child.relname AS name
+    FROM pg_inherits
+    JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+    WHERE pg_inherits.inhparent = 'log_events'::regclass
+""")
+# Maintenance walks forward on (created_at, id): each batch starts after the last key of the previous one,
+# so no row is examined twice. A guild with its own retention or redaction age is handled on its own
+# through its (guild_id, created_at) range; the default pass skips those guilds.
+PURGE_GUILD_LOG_EVENTS = query("purge_guild_log_events", """
+    DELETE FROM log_events
+    WHERE (created_at, id) IN (
+        SELECT created_at, id FROM log_events
+        WHERE guild_id = $1 AND created_at < $2 AND (created_at, id) > ($3, $4)
+        ORDER BY created_at, id
+        LIMIT $5
+    )
+    RETURNING created_at, id
+""")
+PURGE_LOG_EVENTS = query("purge_log_events", """
+    DELETE FROM log_events
+    WHERE (created_at, id) IN (
+        SELECT created_at, id FROM log_events
+        WHERE guild_id <> ALL($1::BIGINT[]) AND created_at < $2 AND (created_at, id) > ($3, $4)
+        ORDER BY created_at, id
+        LIMIT $5
+    )
+    RETURNING created_at, id
+""")
+# Blanking content also empties the generated search vector.
+REDACT_GUILD_LOG_EVENTS = query("redact_guild_log_events", """
+    UPDATE log_events SET content = NULL
+    WHERE (created_at, id) IN (
+        SELECT created_at, id FROM log_events
+        WHERE guild_id = $1 AND log_type = 'message' AND content IS NOT NULL
+          AND created_at < $2 AND (created_at, id) > ($3, $4)
+        ORDER BY created_at, id
+        LIMIT $5
+    )
+    RETURNING created_at, id
+""")
+REDACT_LOG_EVENTS = query("redact_log_events", """
+    UPDATE log_events SET content = NULL
+    WHERE (created_at, id) IN (
+        SELECT created_at, id FROM log_events
+        WHERE log_type = 'message' AND content IS NOT NULL AND guild_id <> ALL($1::BIGINT[])
+          AND created_at < $2 AND (created_at, id) > ($3, $4)
+        ORDER BY created_at, id
+        LIMIT $5
+    )
+    RETURNING created_at, id
+""")
+EXPORT_LOG_EVENTS = query("export_log_events", """
+    SELECT created_at, guild_id, log_type, event, user_id, channel_id, content
+    FROM log_events
+    WHERE guild_id = $1 AND created_at >= $2 AND created_at < $3
+    ORDER BY created_at, id
+""")
+
+SEARCH_FILTERS = {
+    "user_id": "user_id = ${}",
+    "channel_id": "channel_id = ${}",
+    "event": "(event = ${0} OR log_type = ${0})",
+    "since": "created_at >= ${}",
+    "text": "search @@ websearch_to_tsquery('simple', ${})",
+}
+# asyncpg prepares a statement the first time a connection runs it and keeps it in a per-connection
+# cache keyed by its text; this is room for every registered query and search combination.
+STATEMENT_CACHE_SIZE = len(QUERIES) + 2 ** len(SEARCH_FILTERS) + 32
+
+
+def search_query(filters: Tuple[str, ...]) -> Query:
+    """The registered search statement for one combination of ``SEARCH_FILTERS``, declared on first use.
+
+    Every combination gets its own statement instead of ``$n IS NULL OR ...`` clauses, so each
+    one keeps a plan that can use the matching index. Results are keyset-paginated on
+    ``(created_at, id)``, newest first.
+    """
+    name = f"search_log_events({','.join(filters)})"
+    statement = QUERIES.get(name)
+    if statement is None:
+        conditions = ["guild_id = $1", "created_at <= $2", "(created_at, id) < ($2, $3)"]
+        conditions += [SEARCH_FILTERS[key].format(index) for index, key in enumerate(filters, start=4)]
+        statement = query(name, f"""
+            SELECT id, created_at, log_type, event, user_id, channel_id, content
+            FROM log_events
+            WHERE {' AND '.join(conditions)}
+            ORDER BY created_at DESC, id DESC
+            LIMIT ${len(filters) + 4}
+        """)
+    return statement
+
+
+def format_query_stats() -> str:
+    """Render per-query statistics as a fixed-width table, slowest in total first."""
+    used = [statement for statement in QUERIES.values() if statement.calls]
+    width = max([20] + [len(statement.name) + 2 for statement in used])
+    lines = [f"{'query':<{width}}{'calls':>8}{'total ms':>11}{'avg ms':>9}{'errors':>8}"]
+    for statement in sorted(used, key=lambda item: item.total_seconds, reverse=True):
+        lines.append(
+            f"{statement.name:<{width}}{statement.calls:>8}{statement.total_seconds * 1000:>11.1f}"
+            f"{statement.total_seconds * 1000 / statement.calls:>9.2f}{statement.errors:>8}"
+        )
+    return "\n".join(lines)
+
+
+class _LoadAbandoned(Exception):
+    """Raised to waiters of a shared load whose leader was cancelled; they load again themselves."""
+
+
+def _fail(future: asyncio.Future, error: BaseException) -> None:
+    # The leader's cancellation is its own business: waiters get an error they retry on, not a CancelledError.
+    future.set_exception(_LoadAbandoned() if isinstance(error, asyncio.CancelledError) else error)
+    future.exception()  # waiters re-raise it; nobody waiting is fine too
+
+
+def single_flight(method):
+    """Coalesce concurrent calls of a per-guild read method with equal arguments into one query.
+
+    The method takes a ``guild_id`` argument; calls in flight are kept per guild so that
+    ``invalidate`` detaches them from later callers. Every waiter gets the same result
+    object, so callers must not mutate it.
+    """
+    name = method.__name__
+    signature = inspect.signature(method)
+
+    @functools.wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        bound = signature.bind(self, *args, **kwargs)
+        bound.apply_defaults()
+        guild_id = bound.arguments["guild_id"]
+        key = (name, *list(bound.arguments.values())[1:])
+        future = self._inflight.get(guild_id, {}).get(key)
+        while future is not None:
+            metrics.db_coalesced.inc(name)
+            try:
+                return await asyncio.shield(future)
+            except _LoadAbandoned:
+                # The caller running the query was cancelled; run it again or join whoever already does.
+                future = self._inflight.get(guild_id, {}).get(key)
+
+        inflight = self._inflight.setdefault(guild_id, {})
+        future = inflight[key] = asyncio.get_running_loop().create_future()
+        try:
+            result = await method(self, *args, **kwargs)
+        except BaseException as e:
+            _fail(future, e)
+            raise
+        else:
+            future.set_result(result)
+        finally:
+            inflight = self._inflight.get(guild_id)
+            if inflight is not None and inflight.get(key) is future:
+                del inflight[key]
+                if not inflight:
+                    del self._inflight[guild_id]
+        return result
+
+    return wrapper
 
 
 class Database:
@@ -17,6 +300,11 @@ class Database:
             "port": database['port']
         }
         self.pool: Optional[asyncpg.pool.Pool] = None
+        self.configs: Dict[int, GuildConfig] = {}
+        self._loading: Dict[int, asyncio.Future] = {}
+        self._inflight: Dict[int, Dict[tuple, asyncio.Future]] = {}
+        self._connect_lock = asyncio.Lock()
+        self._partitions = set()
 
     async def __aenter__(self) -> "Database":
         """Async context manager entry point."""
@@ -29,46 +317,125 @@ class Database:
 
     async def connect(self) -> None:
         """Establish database connection pool and create tables."""
+        async with self._connect_lock:
+            if self.pool is None:
+                await self._connect()
+
+    async def _connect(self) -> None:
         try:
+            conn = await asyncpg.connect(**self.connection_params)
+            try:
+                await self.create_tables(conn)
+                await self.create_indexes(conn)
+            finally:
+                await conn.close()
             self.pool = await asyncpg.create_pool(
                 **self.connection_params,
                 min_size=5,
                 max_size=20,
-                command_timeout=60
+                command_timeout=60,
+                statement_cache_size=STATEMENT_CACHE_SIZE
             )
-            await self.create_tables()
-            await self.create_indexes()
         except Exception as e:
             logging.error(f"Database connection error: {e}")
             raise
 
-    async def create_tables(self) -> None:
+    async def create_tables(self, conn: asyncpg.Connection) -> None:
         """Create required tables if they don't exist."""
-        async with self.pool.acquire() as conn:
-            await conn.execute("""
-                CREATE TABLE IF NOT EXISTS bot_settings (
-                    guild_id        BIGINT PRIMARY KEY,
-                    log_channel_id  BIGINT NOT NULL DEFAULT 0,
-                    logging_enabled BOOLEAN DEFAULT FALSE,
-                    log_types       TEXT DEFAULT 'message:0,invite:0,server:0,voice:0,automod:0,user:0',
-                    language        TEXT DEFAULT 'en'
-                );
-            """)
+        await conn.execute("""
+            CREATE TABLE IF NOT EXISTS bot_settings (
+                guild_id        BIGINT PRIMARY KEY,
+                log_channel_id  BIGINT NOT NULL DEFAULT 0,
+                logging_enabled BOOLEAN DEFAULT FALSE,
+                log_types       TEXT DEFAULT 'message:0,invite:0,server:0,voice:0,automod:0,user:0',
+                language        TEXT DEFAULT 'en'
+            );
+
+            ALTER TABLE bot_settings
+                ADD COLUMN IF NOT EXISTS retention_days    INTEGER,
+                ADD COLUMN IF NOT EXISTS redact_after_days INTEGER;
 
-    async def create_indexes(self) -> None:
+            CREATE TABLE IF NOT EXISTS log_routes (
+                guild_id    BIGINT NOT NULL,
+                target      TEXT NOT NULL,
+                channel_id  BIGINT NOT NULL,
+                PRIMARY KEY (guild_id, target)
+            );
+
+            CREATE TABLE IF NOT EXISTS log_ignores (
+                guild_id    BIGINT NOT NULL,
+                kind        TEXT NOT NULL,
+                target_id   BIGINT NOT NULL DEFAULT 0,
+                PRIMARY KEY (guild_id, kind, target_id)
+            );
+
+            CREATE TABLE IF NOT EXISTS watch_terms (
+                guild_id    BIGINT NOT NULL,
+                term        TEXT NOT NULL,
+                is_regex    BOOLEAN NOT NULL DEFAULT FALSE,
+                PRIMARY KEY (guild_id, term)
+            );
+
+            CREATE TABLE IF NOT EXISTS voice_sessions (
+                id          BIGSERIAL PRIMARY KEY,
+                guild_id    BIGINT NOT NULL,
+                member_id   BIGINT NOT NULL,
+                channel_id  BIGINT NOT NULL,
+                joined_at   TIMESTAMPTZ NOT NULL,
+                left_at     TIMESTAMPTZ NOT NULL,
+                duration    INTEGER NOT NULL
+            );
+
+            CREATE TABLE IF NOT EXISTS voice_stats (
+                guild_id      BIGINT NOT NULL,
+                member_id     BIGINT NOT NULL,
+                total_seconds BIGINT NOT NULL DEFAULT 0,
+                sessions      INTEGER NOT NULL DEFAULT 0,
+                last_left_at  TIMESTAMPTZ,
+                PRIMARY KEY (guild_id, member_id)
+            );
+
+            CREATE TABLE IF NOT EXISTS log_events (
+                id          BIGSERIAL,
+                created_at  TIMESTAMPTZ NOT NULL,
+                guild_id    BIGINT NOT NULL,
+                log_type    TEXT NOT NULL,
+                event       TEXT NOT NULL,
+                user_id     BIGINT,
+                channel_id  BIGINT,
+                content     TEXT,
+                search      TSVECTOR GENERATED ALWAYS AS (to_tsvector('simple', COALESCE(content, ''))) STORED,
+                PRIMARY KEY (created_at, id)
+            ) PARTITION BY RANGE (created_at);
+        """)
+
+    async def create_indexes(self, conn: asyncpg.Connection) -> None:
         """Create database indexes for optimization."""
-        async with self.pool.acquire() as conn:
-            await conn.execute("""
-                DO $$
-                BEGIN
-                    IF NOT EXISTS (
-                        SELECT 1 FROM pg_indexes WHERE tablename = 'log_settings' AND indexname = 'log_settings_guild_idx'
-                    ) THEN
-                        CREATE INDEX log_settings_guild_idx ON log_settings (log_channel_id, guild_id);
-                    END IF;
-                END
-                $$;
+        await conn.execute("""
+            CREATE INDEX IF NOT EXISTS voice_sessions_guild_member_idx
+                ON voice_sessions (guild_id, member_id, left_at);
+            CREATE INDEX IF NOT EXISTS voice_stats_guild_total_idx
+                ON voice_stats (guild_id, total_seconds DESC);
+            CREATE INDEX IF NOT EXISTS log_events_guild_created_idx
+                ON log_events (guild_id, created_at DESC, id DESC);
+            CREATE INDEX IF NOT EXISTS log_events_guild_user_created_idx
+                ON log_events (guild_id, user_id, created_at);
+            CREATE INDEX IF NOT EXISTS log_events_search_idx
+                ON log_events USING GIN (search);
+            CREATE INDEX IF NOT EXISTS log_events_unredacted_idx
+                ON log_events (created_at) WHERE log_type = 'message' AND content IS NOT NULL;
+        """)
+        today = datetime.now(timezone.utc).date()
+        await self.ensure_log_partitions(conn, [today, today + timedelta(days=1)])
+
+    async def ensure_log_partitions(self, conn: asyncpg.Connection, days: Iterable[date]) -> None:
+        """Create the daily (UTC) ``log_events`` partitions for ``days`` that don't exist yet."""
+        for day in sorted(set(days) - self._partitions):
+            await conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS log_events_{day:%Y%m%d} PARTITION OF log_events
+                FOR VALUES FROM ('{day} 00:00+00') TO ('{day + timedelta(days=1)} 00:00+00')
             """)
+            self._partitions.add(day)
 
     async def close(self) -> None:
         """Close the database connection pool."""
@@ -76,110 +443,423 @@ class Database:
             await self.pool.close()
             self.pool = None
 
+    @asynccontextmanager
+    async def _acquire(self):
+        """Acquire a pool connection, recording how long the pool made us wait."""
+        started = time.perf_counter()
+        async with self.pool.acquire() as conn:
+            metrics.db_pool_acquire_seconds.observe(time.perf_counter() - started)
+            yield conn
+
+    async def _run(self, conn, statement: Query, method: str, *args):
+        """Run a registered query (prepared on first use by each connection), recording its stats."""
+        started = time.perf_counter()
+        try:
+            return await getattr(conn, method)(statement.sql, *args)
+        except Exception:
+            statement.errors += 1
+            metrics.db_query_errors.inc(statement.name)
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            statement.calls += 1
+            statement.total_seconds += elapsed
+            metrics.db_query_seconds.observe(elapsed, statement.name)
+
+    async def _execute(self, conn, statement: Query, *args) -> str:
+        """Run a registered statement that returns no rows and return its status, e.g. ``DELETE 1``."""
+        return await self._run(conn, statement, "execute", *args)
+
     async def _ensure_connection(self) -> None:
         """Ensure database connection is active."""
         if self.pool is None:
             await self.connect()
 
+    def invalidate(self, guild_id: int) -> None:
+        """Drop the cached config of a guild so the next lookup reloads it."""
+        self.configs.pop(guild_id, None)
+        # Loads already in flight read the old rows; they answer their current waiters, not later callers.
+        self._loading.pop(guild_id, None)
+        self._inflight.pop(guild_id, None)
+
+    async def get_guild_config(self, guild_id: int) -> GuildConfig:
+        """Return the compiled settings, routes and ignore rules of a guild, cached until they change.
+
+        Concurrent misses for a guild, including ones during a warm-up, share one load.
+        """
+        config = self.configs.get(guild_id)
+        metrics.cache_lookups.inc("guild_config", "hit" if config is not None else "miss")
+        if config is not None:
+            return config
+
+        # Only misses reach Postgres (or wait for a load that does), so only they are traced.
+        with tracer.span("db.get_guild_config"):
+            loading = self._loading.get(guild_id)
+            if loading is not None:
+                metrics.db_coalesced.inc("get_guild_config")
+                try:
+                    return (await asyncio.shield(loading))[guild_id]
+                except _LoadAbandoned:
+                    pass
+            else:
+                return (await self._load_guild_configs([guild_id]))[guild_id]
+        return await self.get_guild_config(guild_id)
+
+    async def warm_guild_configs(self, guild_ids: List[int],
+                                 chunk_size: int = guild_config_settings['warmup_chunk_size']) -> None:
+        """Load the configs of many guilds with three ``ANY($1)`` queries per chunk.
+
+        Every chunk is reserved up front, so an event for a guild that is not loaded yet waits for
+        its chunk instead of querying on its own. Failures are logged; those guilds load lazily later.
+        """
+        missing = [guild_id for guild_id in dict.fromkeys(guild_ids)
+                   if guild_id not in self.configs and guild_id not in self._loading]
+        chunks = [missing[index:index + chunk_size] for index in range(0, len(missing), chunk_size)]
+        reserved = [(chunk, self._reserve(chunk)) for chunk in chunks]
+        started = time.perf_counter()
+        try:
+            for chunk, future in reserved:
+                await self._load_guild_configs(chunk, future)
+        except Exception as e:
+            logging.error(f"Failed to warm guild configs: {e}")
+            for chunk, future in reserved:
+                if not future.done():
+                    self._release(chunk, future, e)
+            return
+        except BaseException as e:
+            for chunk, future in reserved:
+                if not future.done():
+                    self._release(chunk, future, e)
+            raise
+        if missing:
+            logging.info(f"Guild configs warmed for {len(missing)} guilds in {time.perf_counter() - started:.2f}s")
+
+    def _reserve(self, guild_ids: List[int]) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        for guild_id in guild_ids:
+            self._loading[guild_id] = future
+        return future
+
+    def _release(self, guild_ids: List[int], future: asyncio.Future, error: BaseException) -> None:
+        for guild_id in guild_ids:
+            if self._loading.get(guild_id) is future:
+                del self._loading[guild_id]
+        _fail(future, error)
+
+    async def _load_guild_configs(self, guild_ids: List[int],
+                                  future: Optional[asyncio.Future] = None) -> Dict[int, GuildConfig]:
+        future = future or self._reserve(guild_ids)
+        try:
+            configs = await self._fetch_guild_configs(guild_ids)
+        except BaseException as e:
+            self._release(guild_ids, future, e)
+            raise
+
+        for guild_id in guild_ids:
+            if self._loading.get(guild_id) is future:
+                del self._loading[guild_id]
+                self.configs[guild_id] = configs[guild_id]
+        future.set_result(configs)
+        return configs
+
+    async def _fetch_guild_configs(self, guild_ids: List[int]) -> Dict[int, GuildConfig]:
+        await self._ensure_connection()
+        async with self._acquire() as conn:
+            settings = await self._run(conn, GET_GUILD_SETTINGS, "fetch", guild_ids)
+            routes = await self._run(conn, GET_GUILD_ROUTES, "fetch", guild_ids)
+            ignores = await self._run(conn, GET_GUILD_IGNORES, "fetch", guild_ids)
+            watch_terms = await self._run(conn, GET_GUILD_WATCH_TERMS, "fetch", guild_ids)
+
+        rows = {row['guild_id']: dict(row) for row in settings}
+        guild_routes: Dict[int, list] = {}
+        for row in routes:
+            guild_routes.setdefault(row['guild_id'], []).append(row)
+        guild_ignores: Dict[int, list] = {}
+        for row in ignores:
+            guild_ignores.setdefault(row['guild_id'], []).append(row)
+        guild_watch_terms: Dict[int, list] = {}
+        for row in watch_terms:
+            guild_watch_terms.setdefault(row['guild_id'], []).append(row)
+        return {
+            guild_id: GuildConfig(guild_id, rows.get(guild_id), guild_routes.get(guild_id, ()),
+                                  guild_ignores.get(guild_id, ()), guild_watch_terms.get(guild_id, ()))
+            for guild_id in guild_ids
+        }
+
     async def set_log_channel(self, guild_id: int, channel_id: int) -> None:
         """Set or update the log channel for a guild."""
         await self._ensure_connection()
-        async with self.pool.acquire() as conn:
+        async with self._acquire() as conn:
             try:
-                await conn.execute(
-                    """
-                    INSERT INTO bot_settings (guild_id, log_channel_id)
-                    VALUES ($1, $2)
-                    ON CONFLICT (guild_id) DO UPDATE SET log_channel_id = EXCLUDED.log_channel_id
-                    """,
-                    guild_id, channel_id
-                )
+                await self._execute(conn, SET_LOG_CHANNEL, guild_id, channel_id)
             except Exception as e:
                 logging.error(f"Failed to set log channel: {e}")
                 raise
+        self.invalidate(guild_id)
 
     async def set_logging_enabled(self, guild_id: int, enabled: bool) -> None:
         """Enable or disable logging for a guild."""
-        if not self.pool:
-            await self.connect()
-        async with self.pool.acquire() as conn:
-            if enabled:
-                await conn.execute(
-                    """
-                    INSERT INTO bot_settings (guild_id, logging_enabled, log_types)
-                    VALUES ($1, TRUE, 'message:1,invite:1,server:1,voice:1,automod:1,user:1')
-                    ON CONFLICT (guild_id) DO UPDATE
-                        SET logging_enabled = TRUE,
-                            log_types = 'message:1,invite:1,server:1,voice:1,automod:1,user:1'
-                    """,
-                    guild_id
-                )
-            else:
-                await conn.execute(
-                    """
-                    UPDATE bot_settings
-                    SET logging_enabled = FALSE
-                    WHERE guild_id = $1
-                    """,
-                    guild_id
-                )
+        await self._ensure_connection()
+        async with self._acquire() as conn:
+            await self._execute(conn, SET_LOGGING_ENABLED, guild_id, enabled)
+        self.invalidate(guild_id)
 
     async def set_log_types(self, guild_id: int, types_str: str) -> None:
         """Update logging types for a guild."""
-        if not self.pool:
-            await self.connect()
-        async with self.pool.acquire() as conn:
-            await conn.execute(
-                """
-                UPDATE bot_settings
-                SET log_types = $2
-                WHERE guild_id = $1
-                """,
-                guild_id, types_str
-            )
+        await self._ensure_connection()
+        async with self._acquire() as conn:
+            await self._execute(conn, SET_LOG_TYPES, guild_id, types_str)
+        self.invalidate(guild_id)
 
     async def update_log_type(self, guild_id: int, log_type: str, enabled: bool) -> None:
         """Enable/disable specific log type for a guild."""
-        settings = await self.get_log_settings(guild_id)
-        if not settings:
+        await self.update_log_types(guild_id, {log_type: enabled})
+
+    async def update_log_types(self, guild_id: int, changes: Mapping[str, bool]) -> None:
+        """Enable/disable several log types for a guild with a single write.
+
+        A category that stays enabled keeps its delivery mode; one that is switched on is delivered in realtime.
+        """
+        config = await self.get_guild_config(guild_id)
+        if not config.exists:
             return
 
-        log_types = {}
-        for item in settings['log_types'].split(','):
-            if ':' in item:
-                typ, val = item.split(':')
-                log_types[typ.strip()] = val.strip()
+        modes = dict(config.modes)
+        for log_type, enabled in changes.items():
+            if not enabled:
+                modes[log_type] = "off"
+            elif modes.get(log_type, "off") == "off":
+                modes[log_type] = "realtime"
+        await self.set_log_types(guild_id, format_delivery_modes(modes))
 
-        log_types[log_type] = '1' if enabled else '0'
-        types_str = ','.join(f"{k}:{v}" for k, v in log_types.items())
-        await self.set_log_types(guild_id, types_str)
+    async def set_delivery_mode(self, guild_id: int, target: str, mode: str) -> bool:
+        """Set how a category or single event is delivered; False if the guild is not configured."""
+        config = await self.get_guild_config(guild_id)
+        if not config.exists:
+            return False
 
-    async def get_log_settings(self, guild_id: int) -> Optional[Dict[str, Any]]:
-        """Retrieve logging settings for a guild."""
-        if not self.pool:
-            await self.connect()
-        async with self.pool.acquire() as conn:
-            row = await conn.fetchrow(
-                "SELECT log_channel_id, logging_enabled, log_types FROM bot_settings WHERE guild_id = $1",
-                guild_id
-            )
-            return dict(row) if row else None
+        modes = dict(config.modes)
+        if mode == "realtime" and target not in LOG_CATEGORIES and target not in WATCHLIST_MODES:
+            # Events follow their category unless they have a mode of their own.
+            modes.pop(target, None)
+        else:
+            modes[target] = mode
+        await self.set_log_types(guild_id, format_delivery_modes(modes))
+        return True
 
     async def get_language(self, guild_id: int) -> str:
         """Get language setting for a guild (default: 'en')."""
-        if not self.pool:
-            await self.connect()
-        async with self.pool.acquire() as conn:
-            return await conn.fetchval(
-                "SELECT language FROM bot_settings WHERE guild_id = $1",
-                guild_id
-            ) or "en"
+        return (await self.get_guild_config(guild_id)).language
 
     async def set_language(self, guild_id: int, language: str) -> None:
         """Set language for a guild."""
-        async with self.pool.acquire() as conn:
-            await conn.execute('''
-                INSERT INTO bot_settings (guild_id, language)
-                VALUES ($1, $2)
-                ON CONFLICT (guild_id) DO UPDATE SET language = EXCLUDED.language
-            ''', guild_id, language)
\ No newline at end of file
+        await self._ensure_connection()
+        async with self._acquire() as conn:
+            await self._execute(conn, SET_LANGUAGE, guild_id, language)
+        self.invalidate(guild_id)
+
+    async def set_route(self, guild_id: int, target: str, channel_id: int) -> None:
+        """Send a log category or event type of a guild to its own channel."""
+        await self._ensure_connection()
+        async with self._acquire() as conn:
+            await self._execute(conn, SET_ROUTE, guild_id, target, channel_id)
+        self.invalidate(guild_id)
+
+    async def remove_route(self, guild_id: int, target: str) -> bool:
+        """Send a routed target back to the default log channel."""
+        await self._ensure_connection()
+        async with self._acquire() as conn:
+            status = await self._execute(conn, REMOVE_ROUTE, guild_id, target)
+        self.invalidate(guild_id)
+        return status != "DELETE 0"
+
+    async def add_watch_term(self, guild_id: int, term: str, is_regex: bool = False) -> None:
+        """Add a word or regex to a guild's message watchlist."""
+        await self._ensure_connection()
+        async with self._acquire() as conn:
+            await self._execute(conn, ADD_WATCH_TERM, guild_id, term, is_regex)
+        self.invalidate(guild_id)
+
+    async def remove_watch_term(self, guild_id: int, term: str) -> bool:
+        """Remove a term from a guild's watchlist."""
+        await self._ensure_connection()
+        async with self._acquire() as conn:
+            status = await self._execute(conn, REMOVE_WATCH_TERM, guild_id, term)
+        self.invalidate(guild_id)
+        return status != "DELETE 0"
+
+    async def add_ignore(self, guild_id: int, kind: str, target_id: int = 0) -> None:
+        """Exclude a channel, role or user (or, with kind 'bots', all bots) from logging."""
+        await self._ensure_connection()
+        async with self._acquire() as conn:
+            await self._execute(conn, ADD_IGNORE, guild_id, kind, target_id)
+        self.invalidate(guild_id)
+
+    async def set_ignores(self, guild_id: int, kind: str, target_ids: List[int]) -> None:
+        """Replace every ignore rule of one kind for a guild."""
+        await self._ensure_connection()
+        async with self._acquire() as conn:
+            async with conn.transaction():
+                await self._execute(conn, CLEAR_IGNORES, guild_id, kind)
+                await self._run(
+                    conn, ADD_IGNORE, "executemany", [(guild_id, kind, target_id) for target_id in set(target_ids)]
+                )
+        self.invalidate(guild_id)
+
+    async def remove_ignore(self, guild_id: int, kind: str, target_id: int = 0) -> bool:
+        """Remove an ignore rule."""
+        await self._ensure_connection()
+        async with self._acquire() as conn:
+            status = await self._execute(conn, REMOVE_IGNORE, guild_id, kind, target_id)
+        self.invalidate(guild_id)
+        return status != "DELETE 0"
+
+    async def add_voice_sessions(self, sessions: List[tuple]) -> None:
+        """Store finished voice sessions and fold them into per-member totals in one transaction.
+
+        Each item is ``(guild_id, member_id, channel_id, joined_at, left_at, duration, ended)``; every
+        segment adds to the voice time, but only those that ``ended`` the session count as one.
+        """
+        await self._ensure_connection()
+        totals: Dict[tuple, list] = {}
+        for guild_id, member_id, _, _, left_at, duration, ended in sessions:
+            total = totals.setdefault((guild_id, member_id), [0, 0, left_at])
+            total[0] += duration
+            total[1] += ended
+            total[2] = max(total[2], left_at)
+
+        async with self._acquire() as conn:
+            async with conn.transaction():
+                await conn.copy_records_to_table(
+                    "voice_sessions",
+                    records=[session[:6] for session in sessions],
+                    columns=("guild_id", "member_id", "channel_id", "joined_at", "left_at", "duration")
+                )
+                await self._run(
+                    conn, ADD_VOICE_STATS, "executemany",
+                    [(guild_id, member_id, *total) for (guild_id, member_id), total in totals.items()]
+                )
+
+    @single_flight
+    async def get_voice_stats(self, guild_id: int, limit: int = 10) -> Dict[str, Any]:
+        """Return guild voice totals and the members with the most voice time."""
+        await self._ensure_connection()
+        async with self._acquire() as conn:
+            summary = await self._run(conn, GET_VOICE_SUMMARY, "fetchrow", guild_id)
+            top = await self._run(conn, GET_VOICE_TOP, "fetch", guild_id, limit)
+        return {**dict(summary), "top": [dict(row) for row in top]}
+
+    async def set_retention(self, guild_id: int, retention_days: Optional[int],
+                            redact_after_days: Optional[int]) -> None:
+        """Override how long a guild's archived events and message bodies are kept (``None`` = default)."""
+        await self._ensure_connection()
+        async with self._acquire() as conn:
+            await self._execute(conn, SET_RETENTION, guild_id, retention_days, redact_after_days)
+        self.invalidate(guild_id)
+
+    async def get_retention_overrides(self) -> List[Dict[str, Any]]:
+        """Return the guilds with their own retention or redaction age (``None`` where they use the default)."""
+        await self._ensure_connection()
+        async with self._acquire() as conn:
+            return [dict(row) for row in await self._run(conn, GET_RETENTION_OVERRIDES, "fetch")]
+
+    async def create_log_partitions(self, days: Iterable[date]) -> None:
+        """Create daily ``log_events`` partitions ahead of time."""
+        await self._ensure_connection()
+        async with self._acquire() as conn:
+            await self.ensure_log_partitions(conn, days)
+
+    async def drop_log_partitions(self, before: date) -> List[str]:
+        """Drop every daily ``log_events`` partition that ends on or before ``before``; return their names."""
+        await self._ensure_connection()
+        dropped = []
+        async with self._acquire() as conn:
+            for row in await self._run(conn, LIST_LOG_PARTITIONS, "fetch"):
+                try:
+                    day = datetime.strptime(row['name'], "log_events_%Y%m%d").date()
+                except ValueError:
+                    continue
+                if day + timedelta(days=1) <= before:
+                    await conn.execute(f"DROP TABLE IF EXISTS {row['name']}")
+                    self._partitions.discard(day)
+                    dropped.append(row['name'])
+        return dropped
+
+    async def _maintain_log_events(self, guild_statement: Query, statement: Query, before: datetime, limit: int,
+                                   after: Tuple[datetime, int], guild_id: Optional[int],
+                                   exclude: Iterable[int]) -> List[Tuple[datetime, int]]:
+        await self._ensure_connection()
+        async with self._acquire() as conn:
+            if guild_id is not None:
+                rows = await self._run(conn, guild_statement, "fetch", guild_id, before, *after, limit)
+            else:
+                rows = await self._run(conn, statement, "fetch", list(exclude), before, *after, limit)
+        return [(row['created_at'], row['id']) for row in rows]
+
+    async def purge_log_events(self, before: datetime, limit: int, after: Tuple[datetime, int],
+                               guild_id: Optional[int] = None,
+                               exclude: Iterable[int] = ()) -> List[Tuple[datetime, int]]:
+        """Delete the next ``limit`` events older than ``before`` after the ``(created_at, id)`` cursor.
+
+        Only ``guild_id``'s events if given, else those of every guild not in ``exclude``. Returns
+        the keys of the deleted rows.
+        """
+        return await self._maintain_log_events(PURGE_GUILD_LOG_EVENTS, PURGE_LOG_EVENTS, before, limit, after,
+                                               guild_id, exclude)
+
+    async def redact_log_events(self, before: datetime, limit: int, after: Tuple[datetime, int],
+                                guild_id: Optional[int] = None,
+                                exclude: Iterable[int] = ()) -> List[Tuple[datetime, int]]:
+        """Blank the next ``limit`` message bodies older than ``before``, like ``purge_log_events``."""
+        return await self._maintain_log_events(REDACT_GUILD_LOG_EVENTS, REDACT_LOG_EVENTS, before, limit, after,
+                                               guild_id, exclude)
+
+    async def add_log_events(self, events: List[tuple]) -> None:
+        """Copy a batch of archived events into ``log_events``, creating their daily partitions first.
+
+        Each item is ``(created_at, guild_id, log_type, event, user_id, channel_id, content)``.
+        """
+        await self._ensure_connection()
+        async with self._acquire() as conn:
+            await self.ensure_log_partitions(conn, {created_at.date() for created_at, *_ in events})
+            await conn.copy_records_to_table(
+                "log_events",
+                records=events,
+                columns=("created_at", "guild_id", "log_type", "event", "user_id", "channel_id", "content")
+            )
+
+    async def search_log_events(self, guild_id: int, limit: int, before: Optional[Tuple[datetime, int]] = None,
+                                until: Optional[datetime] = None, **filters) -> List[Dict[str, Any]]:
+        """Return up to ``limit`` archived events, newest first, older than the ``before`` cursor.
+
+        ``before`` is the ``(created_at, id)`` of the last row of the previous page; ``filters``
+        are any of ``SEARCH_FILTERS`` (``None`` values are ignored).
+        """
+        await self._ensure_connection()
+        filters = {key: value for key, value in filters.items() if value is not None}
+        statement = search_query(tuple(key for key in SEARCH_FILTERS if key in filters))
+        created_at, event_id = before or (until or datetime.now(timezone.utc), 2 ** 63 - 1)
+        with tracer.span("db.search_log_events"):
+            async with self._acquire() as conn:
+                rows = await self._run(
+                    conn, statement, "fetch",
+                    guild_id, created_at, event_id, *(filters[key] for key in SEARCH_FILTERS if key in filters), limit
+                )
+        return [dict(row) for row in rows]
+
+    async def iter_log_events(self, guild_id: int, since: Optional[datetime] = None, until: Optional[datetime] = None,
+                              prefetch: int = 1000) -> AsyncIterator[asyncpg.Record]:
+        """Stream a guild's archived events, oldest first, through a server-side cursor.
+
+        Rows arrive ``prefetch`` at a time, so memory stays flat however long the history is.
+        The pool connection is held until the iteration ends.
+        """
+        await self._ensure_connection()
+        since = since or datetime(1970, 1, 1, tzinfo=timezone.utc)
+        until = until or datetime.now(timezone.utc)
+        # The cursor stays open while the consumer works, so only the call is counted, not its time.
+        EXPORT_LOG_EVENTS.calls += 1
+        async with self._acquire() as conn:
+            async with conn.transaction(readonly=True):
+                async for row in conn.cursor(EXPORT_LOG_EVENTS.sql, guild_id, since, until, prefetch=prefetch):
+                    yield row
@@ -0,0 +1,173 @@
+from enum import Enum
+from typing import Any, Callable, Collection, List, Optional, Sequence, Tuple
+
+from disnake.utils import format_dt
+
+from config import messages
+
+_MISSING = object()
+MAX_VALUE_LENGTH = 256
+
+
+class Field:
+    """An attribute worth reporting when it changes, and how to show its values."""
+
+    __slots__ = ("attr", "render", "compare")
+
+    def __init__(self, attr: str, render: Optional[Callable[[Any], str]] = None,
+                 compare: Optional[Callable[[Any], Any]] = None):
+        self.attr = attr
+        self.render = render or render_value
+        self.compare = compare
+
+    def key(self, value):
+        return self.compare(value) if self.compare and value is not None else value
+
+
+def render_value(value) -> str:
+    if value is None or value == "":
+        return "—"
+    if isinstance(value, bool):
+        return "✅" if value else "❌"
+    if isinstance(value, Enum):
+        return value.name
+    mention = getattr(value, "mention", None)
+    if mention:
+        return mention
+    url = getattr(value, "url", None)
+    if url:
+        return f"[link]({url})"
+    text = str(value)
+    return text if len(text) <= MAX_VALUE_LENGTH else text[:MAX_VALUE_LENGTH - 1] + "…"
+
+
+def render_seconds(value) -> str:
+    return f"{value}s" if value else "—"
+
+
+def render_timestamp(value) -> str:
+    return format_dt(value, "f") if value else "—"
+
+
+def _overwrite_key(overwrites) -> dict:
+    return {target.id: overwrite.pair() for target, overwrite in overwrites.items()}
+
+
+def _overwrite_values(overwrite) -> dict:
+    return dict(iter(overwrite)) if overwrite is not None else {}
+
+
+def render_overwrite_changes(before, after) -> List[str]:
+    """One line per permission target whose overwrite was added, removed or edited."""
+    before = {target.id: (target, overwrite) for target, overwrite in (before or {}).items()}
+    after = {target.id: (target, overwrite) for target, overwrite in (after or {}).items()}
+    symbols = {True: "+", False: "−", None: "/"}
+    lines = []
+    for target_id in before.keys() | after.keys():
+        target, old = before.get(target_id, (None, None))
+        target, new = after.get(target_id, (target, None))
+        old_values, new_values = _overwrite_values(old), _overwrite_values(new)
+        changed = [
+            f"{symbols[new_values.get(name)]}{name}"
+            for name in sorted(old_values.keys() | new_values.keys())
+            if old_values.get(name) != new_values.get(name)
+        ]
+        if changed:
+            lines.append(f"{getattr(target, 'mention', target_id)}: {' '.join(changed)}")
+    return lines
+
+
+CHANNEL_FIELDS = (
+    Field("name"),
+    Field("topic"),
+    Field("nsfw"),
+    Field("slowmode_delay", render_seconds),
+    Field("category", compare=lambda category: category.id),
+    Field("overwrites", compare=_overwrite_key),
+    Field("bitrate"),
+    Field("user_limit"),
+    Field("rtc_region"),
+    Field("video_quality_mode"),
+    Field("default_auto_archive_duration"),
+)
+
+GUILD_FIELDS = (
+    Field("name"),
+    Field("description"),
+    Field("owner", compare=lambda owner: owner.id),
+    Field("icon", compare=lambda asset: asset.key),
+    Field("banner", compare=lambda asset: asset.key),
+    Field("splash", compare=lambda asset: asset.key),
+    Field("verification_level"),
+    Field("explicit_content_filter"),
+    Field("default_notifications"),
+    Field("mfa_level"),
+    Field("afk_channel", compare=lambda channel: channel.id),
+    Field("afk_timeout", render_seconds),
+    Field("system_channel", compare=lambda channel: channel.id),
+    Field("rules_channel", compare=lambda channel: channel.id),
+    Field("public_updates_channel", compare=lambda channel: channel.id),
+    Field("vanity_url_code"),
+    Field("preferred_locale"),
+    Field("premium_progress_bar_enabled"),
+)
+
+MEMBER_FIELDS = (
+    Field("nick"),
+    Field("display_avatar", compare=lambda asset: asset.key),
+    Field("pending"),
+    Field("current_timeout", render_timestamp),
+)
+
+
+def role_ids(member) -> Collection[int]:
+    """The member's role ids without building Role objects (disnake keeps them as a sorted id array)."""
+    ids = getattr(member, "_roles", None)
+    if ids is None:
+        ids = frozenset(role.id for role in member.roles)
+    return ids
+
+
+def diff_roles(before, after) -> Tuple[set, set]:
+    """Return the ids of roles added to and removed from a member."""
+    old, new = role_ids(before), role_ids(after)
+    if old == new:
+        return set(), set()
+    old, new = set(old), set(new)
+    return new - old, old - new
+
+
+def diff_attributes(before, after, fields: Sequence[Field]) -> List[Tuple[Field, Any, Any]]:
+    """Return ``(field, old, new)`` for every declared field whose value changed."""
+    changes = []
+    for field in fields:
+        old = getattr(before, field.attr, _MISSING)
+        new = getattr(after, field.attr, _MISSING)
+        if old is _MISSING or new is _MISSING:
+            continue
+        if field.key(old) != field.key(new):
+            changes.append((field, old, new))
+    return changes
+
+
+def render_changes(changes: List[Tuple[Field, Any, Any]], lang: str) -> str:
+    labels = messages[lang]['fields']
+    lines = []
+    for field, old, new in changes:
+        label = labels.get(field.attr, field.attr.replace('_', ' ').capitalize())
+        if field.attr == "overwrites":
+            lines.append(f"**{label}:**")
+            lines.extend(f"• {line}" for line in render_overwrite_changes(old, new))
+        else:
+            lines.append(f"**{label}:** {field.render(old)} → {field.render(new)}")
+    return "\n".join(lines)
+
+
+def render_role_changes(added: Collection[int], removed: Collection[int], lang: str) -> str:
+    labels = messages[lang]['member_update']
+    lines = []
+    if added:
+        lines.append(f"**{labels['roles_added']}:** " + ", ".join(f"<@&{role_id}>" for role_id in sorted(added)))
+    if removed:
+        lines.append(f"**{labels['roles_removed']}:** " + ", ".join(f"<@&{role_id}>" for role_id in sorted(removed)))
+    return "\n".join(lines)
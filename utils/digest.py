@@ -0,0 +1,65 @@
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from config import digest as digest_settings
+from utils import metrics
+
+
+class DigestEntry:
+    __slots__ = ("log_type", "count", "users", "channels")
+
+    def __init__(self, log_type: str):
+        self.log_type = log_type
+        self.count = 0
+        self.users: Counter = Counter()
+        self.channels: Counter = Counter()
+
+
+class DigestBuffer:
+    """Counts events delivered in ``digest`` mode until the next summary is posted.
+
+    Only counters are kept, per destination channel and event, so memory depends on how
+    many distinct users and channels were active in the interval, not on the event volume.
+    """
+
+    def __init__(self, top: int = digest_settings['top']):
+        self.top = top
+        self.pending: Dict[Tuple[int, int], Dict[str, DigestEntry]] = {}
+
+    def add(self, guild_id: int, channel_id: int, log_type: str, event: str, user_id: Optional[int] = None,
+            source_channel_id: Optional[int] = None) -> None:
+        events = self.pending.setdefault((guild_id, channel_id), {})
+        entry = events.get(event)
+        if entry is None:
+            entry = events[event] = DigestEntry(log_type)
+        entry.count += 1
+        if user_id is not None:
+            entry.users[user_id] += 1
+        if source_channel_id is not None:
+            entry.channels[source_channel_id] += 1
+        metrics.events_digested.inc(log_type)
+
+    def forget(self, guild_id: int) -> None:
+        for key in [key for key in self.pending if key[0] == guild_id]:
+            del self.pending[key]
+
+    def drain(self) -> List[Tuple[int, int, Dict[str, DigestEntry]]]:
+        """Take everything collected so far as ``(guild_id, channel_id, events)`` summaries."""
+        pending, self.pending = self.pending, {}
+        return [(guild_id, channel_id, events) for (guild_id, channel_id), events in pending.items()]
+
+    def render(self, events: Dict[str, DigestEntry], titles: Dict[str, str], limit: int = 4000) -> str:
+        """One line per event, busiest first, with the most active users and channels."""
+        lines, length = [], 0
+        for event, entry in sorted(events.items(), key=lambda item: -item[1].count):
+            line = f"**{titles.get(event, event.replace('_', ' ').title())}:** {entry.count}"
+            top = [f"<@{user_id}> ({count})" for user_id, count in entry.users.most_common(self.top)]
+            top += [f"<#{channel_id}> ({count})" for channel_id, count in entry.channels.most_common(self.top)]
+            if top:
+                line += " — " + ", ".join(top)
+            length += len(line) + 1
+            if length > limit:
+                lines.append("…")
+                break
+            lines.append(line)
+        return "\n".join(lines)
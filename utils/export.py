@@ -0,0 +1,117 @@
+import asyncio
+import csv
+import io
+import json
+import zlib
+from typing import AsyncIterator, List, Mapping, Optional, Tuple
+
+from config import export as export_settings
+
+try:
+    import zstandard
+except ImportError:  # optional: zstd output is only offered when it is installed
+    zstandard = None
+
+COLUMNS = ("created_at", "guild_id", "log_type", "event", "user_id", "channel_id", "content")
+FORMATS = ("jsonl", "csv")
+COMPRESSIONS = ("gzip", "zstd", "none") if zstandard else ("gzip", "none")
+EXTENSIONS = {"gzip": ".gz", "zstd": ".zst", "none": ""}
+FINISH_HEADROOM = 256 * 1024
+
+
+class _Identity:
+    def compress(self, data: bytes) -> bytes:
+        return data
+
+    def flush(self) -> bytes:
+        return b""
+
+
+def _compressor(compression: str):
+    if compression == "gzip":
+        return zlib.compressobj(6, zlib.DEFLATED, 31)
+    if compression == "zstd":
+        if zstandard is None:
+            raise ValueError("zstd compression needs the zstandard package")
+        return zstandard.ZstdCompressor().compressobj()
+    if compression == "none":
+        return _Identity()
+    raise ValueError(f"Unknown compression: {compression}")
+
+
+class PartEncoder:
+    """Encodes rows into one self-contained output part (a complete gzip/zstd stream).
+
+    ``encode`` and ``finish`` are CPU-bound and meant to run in a worker thread.
+    """
+
+    def __init__(self, fmt: str, compression: str):
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown format: {fmt}")
+        self.fmt = fmt
+        self.compressor = _compressor(compression)
+        self.header = fmt == "csv"
+
+    def encode(self, rows: List[Mapping]) -> bytes:
+        text = io.StringIO()
+        if self.fmt == "jsonl":
+            for row in rows:
+                text.write(json.dumps({column: row[column] for column in COLUMNS}, default=str, ensure_ascii=False))
+                text.write("\n")
+        else:
+            writer = csv.writer(text)
+            if self.header:
+                writer.writerow(COLUMNS)
+                self.header = False
+            writer.writerows([row[column] for column in COLUMNS] for row in rows)
+        return self.compressor.compress(text.getvalue().encode("utf-8"))
+
+    def finish(self) -> bytes:
+        return self.compressor.flush()
+
+
+def file_name(guild_id: int, fmt: str, compression: str, part: Optional[int] = None) -> str:
+    suffix = f"-{part + 1:03d}" if part is not None else ""
+    return f"{guild_id}-events{suffix}.{fmt}{EXTENSIONS[compression]}"
+
+
+async def export_chunks(rows: AsyncIterator[Mapping], fmt: str = export_settings['format'],
+                        compression: str = export_settings['compression'], part_size: Optional[int] = None,
+                        batch_rows: int = export_settings['batch_rows']) -> AsyncIterator[Tuple[int, bytes, bool]]:
+    """Stream ``rows`` as compressed ``(part, chunk, last_chunk_of_part)`` tuples.
+
+    Rows are encoded and compressed ``batch_rows`` at a time in a worker thread, so only
+    one batch is in memory at once. With ``part_size``, a part is closed as soon as its
+    compressed size gets within a batch (plus headroom) of the limit; every part decompresses on its own.
+    """
+    part, size = 0, 0
+    encoder = PartEncoder(fmt, compression)
+    batch: List[Mapping] = []
+    largest = 0
+
+    async def encode():
+        nonlocal size, largest
+        data = await asyncio.to_thread(encoder.encode, batch)
+        size += len(data)
+        largest = max(largest, len(data))
+        return data
+
+    full = False
+    async for row in rows:
+        # Only close a full part once another row arrives, so the export never ends with an empty part.
+        if full:
+            yield part, await asyncio.to_thread(encoder.finish), True
+            part, size, full = part + 1, 0, False
+            encoder = PartEncoder(fmt, compression)
+        batch.append(row)
+        if len(batch) < batch_rows:
+            continue
+        data = await encode()
+        batch = []
+        # The compressor may still hold output that ``finish`` will emit; keep room for it.
+        full = bool(part_size) and size + max(2 * largest, FINISH_HEADROOM) >= part_size
+        if data:
+            yield part, data, False
+
+    data = await encode() if batch else b""
+    yield part, data + await asyncio.to_thread(encoder.finish), True
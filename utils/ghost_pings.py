@@ -0,0 +1,74 @@
+import time
+from collections import deque
+from typing import Deque, Dict, FrozenSet, Iterable, Optional, Tuple
+
+from config import ghost_pings as ghost_ping_settings
+
+
+class Mentions:
+    __slots__ = ("at", "users", "roles", "everyone")
+
+    def __init__(self, at: float, users: FrozenSet[int], roles: FrozenSet[int], everyone: bool):
+        self.at = at
+        self.users = users
+        self.roles = roles
+        self.everyone = everyone
+
+    def __bool__(self) -> bool:
+        return bool(self.users or self.roles or self.everyone)
+
+
+class GhostPingBuffer:
+    """Mentions of recent messages, kept just long enough to catch ghost pings.
+
+    Only messages that mention someone are stored, as their id and mention sets (no
+    content). Lookups go through a dict and expiry pops from the front of a deque in
+    arrival order, so each message costs O(1) to add, look up and expire.
+    """
+
+    def __init__(self, window: float = ghost_ping_settings['window'],
+                 max_messages: int = ghost_ping_settings['max_messages']):
+        self.window = window
+        self.max_messages = max_messages
+        self.messages: Dict[int, Mentions] = {}
+        self.order: Deque[Tuple[float, int]] = deque()
+
+    def add(self, message_id: int, users: Iterable[int], roles: Iterable[int], everyone: bool,
+            now: Optional[float] = None) -> None:
+        now = now or time.time()
+        self._evict(now - self.window)
+        mentions = Mentions(now, frozenset(users), frozenset(roles), everyone)
+        if not mentions:
+            return
+        if len(self.order) >= self.max_messages:
+            self.messages.pop(self.order.popleft()[1], None)
+        self.messages[message_id] = mentions
+        self.order.append((now, message_id))
+
+    def deleted(self, message_id: int, now: Optional[float] = None) -> Optional[Mentions]:
+        """Mentions of a message deleted within the window, if it had any."""
+        mentions = self.messages.pop(message_id, None)
+        if mentions is None or (now or time.time()) - mentions.at > self.window:
+            return None
+        return mentions
+
+    def edited(self, message_id: int, users: Iterable[int], roles: Iterable[int], everyone: bool,
+               now: Optional[float] = None) -> Optional[Mentions]:
+        """Mentions an edit within the window removed, if any; the stored mentions follow the edit."""
+        mentions = self.messages.get(message_id)
+        if mentions is None or (now or time.time()) - mentions.at > self.window:
+            return None
+        users, roles = frozenset(users), frozenset(roles)
+        removed = Mentions(mentions.at, mentions.users - users, mentions.roles - roles,
+                           mentions.everyone and not everyone)
+        mentions.users, mentions.roles, mentions.everyone = users, roles, everyone
+        return removed if removed else None
+
+    def forget(self, message_ids: Iterable[int]) -> None:
+        for message_id in message_ids:
+            self.messages.pop(message_id, None)
+
+    def _evict(self, before: float) -> None:
+        order = self.order
+        while order and order[0][0] < before:
+            self.messages.pop(order.popleft()[1], None)
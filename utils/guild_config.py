@@ -0,0 +1,132 @@
+from typing import Any, Dict, FrozenSet, Iterable, Mapping, Optional, Pattern, Tuple
+
+from utils.watchlist import compile_watchlist
+
+LOG_CATEGORIES = ('message', 'invite', 'server', 'voice', 'automod', 'user')
+IGNORE_KINDS = ('channel', 'category', 'role', 'user', 'bots')
+# How a category or event reaches Discord: one embed per event, a periodic summary, or only the archive.
+DELIVERY_MODES = ('realtime', 'digest', 'archive', 'off')
+# ``log_types`` predates delivery modes; on/off are still stored as 1/0 so older builds can read them.
+_STORED_MODES = {'1': 'realtime', '0': 'off'}
+_MODE_VALUES = {mode: value for value, mode in _STORED_MODES.items()}
+# Event modes of guilds with a watchlist, unless set explicitly: matches are the alerts, the rest is only archived.
+WATCHLIST_MODES = {'message_new': 'archive'}
+
+
+def parse_log_types(value: Optional[str]) -> Dict[str, str]:
+    """Parse the ``bot_settings.log_types`` string (``'message:1,voice:0,...'``)."""
+    log_types = {}
+    for item in (value or "").split(','):
+        if ':' in item:
+            typ, val = item.split(':', 1)
+            log_types[typ.strip()] = val.strip()
+    return log_types
+
+
+def format_log_types(log_types: Mapping[str, Any]) -> str:
+    return ','.join(f"{k}:{v}" for k, v in log_types.items())
+
+
+def parse_delivery_modes(value: Optional[str]) -> Dict[str, str]:
+    """Delivery mode per category or event; like the old on/off flags, anything unknown is ``off``."""
+    modes = {}
+    for target, stored in parse_log_types(value).items():
+        mode = _STORED_MODES.get(stored, stored)
+        modes[target] = mode if mode in DELIVERY_MODES else 'off'
+    return modes
+
+
+def format_delivery_modes(modes: Mapping[str, str]) -> str:
+    return format_log_types({target: _MODE_VALUES.get(mode, mode) for target, mode in modes.items()})
+
+
+class GuildConfig:
+    """Everything the listeners need about a guild, compiled for O(1) lookups.
+
+    Built from the ``bot_settings`` row plus the guild's ``log_routes``, ``log_ignores``
+    and ``watch_terms`` rows, and cached by ``Database`` until a setting changes.
+    """
+
+    __slots__ = ("guild_id", "exists", "log_channel_id", "logging_enabled", "log_types", "modes", "language",
+                 "routes", "ignored_channels", "ignored_categories", "ignored_roles", "ignored_users", "ignore_bots",
+                 "retention_days", "redact_after_days", "watch_terms", "watchlist")
+
+    def __init__(self, guild_id: int, settings: Optional[Mapping[str, Any]] = None,
+                 routes: Iterable[Mapping[str, Any]] = (), ignores: Iterable[Mapping[str, Any]] = (),
+                 watch_terms: Iterable[Mapping[str, Any]] = ()):
+        self.guild_id = guild_id
+        self.exists = settings is not None
+        settings = settings or {}
+        self.log_channel_id: int = settings.get("log_channel_id") or 0
+        # A guild without a settings row has never been configured; like before, nothing is filtered
+        # for it, it simply has no log channel to deliver to.
+        self.logging_enabled: bool = bool(settings.get("logging_enabled", True)) if self.exists else True
+        # Delivery mode per category or event; ``log_types`` is the category on/off view the panels toggle.
+        self.modes: Dict[str, str] = parse_delivery_modes(settings.get("log_types"))
+        self.log_types: Dict[str, bool] = {k: mode != "off" for k, mode in self.modes.items()}
+        self.language: str = settings.get("language") or "en"
+        # Archive retention overrides; None means the ARCHIVE_* defaults.
+        self.retention_days: Optional[int] = settings.get("retention_days")
+        self.redact_after_days: Optional[int] = settings.get("redact_after_days")
+        self.routes: Dict[str, int] = {row["target"]: row["channel_id"] for row in routes}
+
+        ignored = {kind: set() for kind in IGNORE_KINDS}
+        for row in ignores:
+            ignored[row["kind"]].add(row["target_id"])
+        self.ignored_channels: FrozenSet[int] = frozenset(ignored["channel"])
+        self.ignored_categories: FrozenSet[int] = frozenset(ignored["category"])
+        self.ignored_roles: FrozenSet[int] = frozenset(ignored["role"])
+        self.ignored_users: FrozenSet[int] = frozenset(ignored["user"])
+        self.ignore_bots: bool = bool(ignored["bots"])
+
+        self.watch_terms: Tuple[Tuple[str, bool], ...] = tuple(
+            sorted((row["term"], row["is_regex"]) for row in watch_terms)
+        )
+        # One pattern for the whole list, shared by every config built from the same terms.
+        self.watchlist: Optional[Pattern] = compile_watchlist(self.watch_terms) if self.watch_terms else None
+
+    def is_type_enabled(self, log_type: str) -> bool:
+        return self.logging_enabled and self.log_types.get(log_type, True)
+
+    def delivery_mode(self, log_type: str, event: Optional[str] = None) -> str:
+        """Mode for an event: its own mode, else its category's (or ``WATCHLIST_MODES``), else ``realtime``."""
+        modes = self.modes
+        mode = modes.get(event)
+        if mode is None:
+            mode = modes.get(log_type, "realtime")
+            if self.watchlist is not None and mode != "off":
+                mode = WATCHLIST_MODES.get(event, mode)
+        return mode
+
+    def destination(self, log_type: str, event: Optional[str] = None) -> int:
+        """Channel id for an event: an event route, else a category route, else the default log channel."""
+        routes = self.routes
+        if routes:
+            channel_id = routes.get(event) or routes.get(log_type)
+            if channel_id:
+                return channel_id
+        return self.log_channel_id
+
+    def ignores(self, channel=None, user=None) -> bool:
+        """Whether traffic in ``channel`` or from ``user`` is excluded from logging."""
+        if channel is not None:
+            if channel.id in self.ignored_channels:
+                return True
+            # Threads are covered by their parent channel, and every channel by its category.
+            parent_id = getattr(channel, "parent_id", None)
+            if parent_id is not None and parent_id in self.ignored_channels:
+                return True
+            if self.ignored_categories and getattr(channel, "category_id", None) in self.ignored_categories:
+                return True
+        if user is not None:
+            if self.ignore_bots and getattr(user, "bot", False):
+                return True
+            if user.id in self.ignored_users:
+                return True
+            if self.ignored_roles:
+                role_ids = getattr(user, "_roles", None)
+                if role_ids is None:
+                    role_ids = [role.id for role in getattr(user, "roles", ())]
+                if not self.ignored_roles.isdisjoint(role_ids):
+                    return True
+        return False
@@ -0,0 +1,116 @@
+import asyncio
+import logging
+from typing import Dict, List, Optional
+
+import disnake
+
+from config import invites as invite_settings
+
+
+class CachedInvite:
+    __slots__ = ("code", "uses", "max_uses", "inviter")
+
+    def __init__(self, invite: disnake.Invite):
+        self.code = invite.code
+        self.uses = invite.uses or 0
+        self.max_uses = invite.max_uses or 0
+        self.inviter = invite.inviter
+
+
+class InviteTracker:
+    """Per-guild invite use counts, diffed to find which invite a new member used.
+
+    A join does not fetch invites itself: it waits on the guild's pending
+    refresh, which starts ``debounce`` seconds after the first join of a burst,
+    so a raid of simultaneous joins costs one ``guild.invites()`` call.
+    """
+
+    def __init__(self, concurrency: int = invite_settings['warmup_concurrency'],
+                 debounce: float = invite_settings['debounce']):
+        self.concurrency = concurrency
+        self.debounce = debounce
+        self.cache: Dict[int, Dict[str, CachedInvite]] = {}
+        self._pending: Dict[int, asyncio.Future] = {}
+
+    @staticmethod
+    def can_track(guild) -> bool:
+        me = getattr(guild, "me", None)
+        return me is not None and me.guild_permissions.manage_guild
+
+    async def _load(self, guild) -> Optional[Dict[str, CachedInvite]]:
+        try:
+            invites = await guild.invites()
+        except (disnake.Forbidden, disnake.HTTPException) as e:
+            logging.warning(f"Failed to fetch invites for guild {guild.id}: {e}")
+            return None
+        return {invite.code: CachedInvite(invite) for invite in invites}
+
+    async def warm(self, guilds) -> None:
+        """Fill the cache for every guild, at most ``concurrency`` requests at a time."""
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def warm_guild(guild):
+            async with semaphore:
+                invites = await self._load(guild)
+                if invites is not None:
+                    self.cache[guild.id] = invites
+
+        await asyncio.gather(*(warm_guild(guild) for guild in guilds if self.can_track(guild)))
+        logging.info(f"Invite cache warmed for {len(self.cache)} guilds")
+
+    def add(self, invite: disnake.Invite) -> None:
+        guild = getattr(invite, "guild", None)
+        if guild is not None and guild.id in self.cache:
+            self.cache[guild.id][invite.code] = CachedInvite(invite)
+
+    def remove(self, invite: disnake.Invite) -> None:
+        guild = getattr(invite, "guild", None)
+        if guild is not None and guild.id in self.cache:
+            self.cache[guild.id].pop(invite.code, None)
+
+    def forget(self, guild_id: int) -> None:
+        """Drop a guild's counts so the next refresh re-baselines instead of diffing."""
+        self.cache.pop(guild_id, None)
+
+    async def used_invites(self, guild) -> List[CachedInvite]:
+        """Return the invites whose use count went up since the last refresh."""
+        if not self.can_track(guild):
+            return []
+        future = self._pending.get(guild.id)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = self._pending[guild.id] = loop.create_future()
+            loop.create_task(self._refresh(guild, future))
+        return await asyncio.shield(future)
+
+    async def _refresh(self, guild, future: asyncio.Future) -> None:
+        await asyncio.sleep(self.debounce)
+        # Joins from here on start a new window and diff against the counts below.
+        self._pending.pop(guild.id, None)
+        used = []
+        try:
+            invites = await self._load(guild)
+            previous = self.cache.get(guild.id)
+            if invites is not None:
+                if previous is not None:
+                    for code, invite in invites.items():
+                        old = previous.get(code)
+                        if invite.uses > (old.uses if old else 0):
+                            used.append(invite)
+                    # A limited invite that vanished most likely hit max_uses with this join.
+                    for code, old in previous.items():
+                        if code not in invites and old.max_uses and old.uses + 1 >= old.max_uses:
+                            old.uses += 1
+                            used.append(old)
+                self.cache[guild.id] = invites
+        finally:
+            future.set_result(used)
+
+    def describe(self, used: List[CachedInvite]) -> str:
+        if not used:
+            return ""
+        if len(used) == 1:
+            invite = used[0]
+            inviter = invite.inviter.mention if invite.inviter else "N/A"
+            return f"\n**Invite:** `{invite.code}` ({invite.uses} uses)\n**Inviter:** {inviter}"
+        return "\n**Invite:** one of " + ", ".join(f"`{invite.code}`" for invite in used)
@@ -0,0 +1,240 @@
+import bisect
+import functools
+import logging
+from typing import Dict, Optional, Sequence, Tuple
+
+from aiohttp import web
+
+from config import metrics as metrics_settings
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        REGISTRY.register(self)
+
+    def _key(self, labels: Tuple) -> Tuple[str, ...]:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {labels}")
+        return tuple(str(label) for label in labels)
+
+    def samples(self):
+        return []
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for suffix, labels, extra, value in self.samples():
+            lines.append(f"{self.name}{suffix}{_format_labels(self.labelnames, labels, extra)} {value}")
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels, amount: float = 1.0) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def get(self, *labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self):
+        return [("", key, "", value) for key, value in self._values.items()]
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def set(self, value: float, *labels) -> None:
+        self._values[self._key(labels)] = value
+
+    def inc(self, *labels, amount: float = 1.0) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, *labels, amount: float = 1.0) -> None:
+        self.inc(*labels, amount=-amount)
+
+    def get(self, *labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self):
+        return [("", key, "", value) for key, value in self._values.items()]
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._counts: Dict[Tuple[str, ...], list] = {}
+        self._sums: Dict[Tuple[str, ...], float] = {}
+
+    def observe(self, value: float, *labels) -> None:
+        key = self._key(labels)
+        counts = self._counts.get(key)
+        if counts is None:
+            counts = self._counts[key] = [0] * (len(self.buckets) + 1)
+            self._sums[key] = 0.0
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        self._sums[key] += value
+
+    def samples(self):
+        result = []
+        for key, counts in self._counts.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                result.append(("_bucket", key, f'le="{bound}"', cumulative))
+            cumulative += counts[-1]
+            result.append(("_bucket", key, 'le="+Inf"', cumulative))
+            result.append(("_sum", key, "", self._sums[key]))
+            result.append(("_count", key, "", cumulative))
+        return result
+
+
+class CacheRatioGauge(Metric):
+    """Hit ratio per cache, derived from the hit/miss counter at scrape time."""
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, lookups: Counter):
+        super().__init__(name, documentation, ("cache",))
+        self.lookups = lookups
+
+    def samples(self):
+        totals: Dict[str, list] = {}
+        for (cache, result), value in self.lookups._values.items():
+            counts = totals.setdefault(cache, [0.0, 0.0])
+            counts[1] += value
+            if result == "hit":
+                counts[0] += value
+        return [("", (cache,), "", hits / total) for cache, (hits, total) in totals.items() if total]
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric: Metric) -> None:
+        self._metrics.append(metric)
+
+    def render(self) -> str:
+        return "\n".join(metric.render() for metric in self._metrics) + "\n"
+
+
+REGISTRY = Registry()
+
+events_received = Counter(
+    "logger_events_received_total", "Gateway events received per listener", ("listener",))
+events_delivered = Counter(
+    "logger_events_delivered_total", "Log embeds delivered to Discord per category", ("category",))
+events_dropped = Counter(
+    "logger_events_dropped_total", "Log embeds that could not be delivered", ("category", "reason"))
+events_digested = Counter(
+    "logger_events_digested_total", "Events counted into a periodic digest instead of a log embed", ("category",))
+events_suppressed = Counter(
+    "logger_events_suppressed_total", "Events not logged because of guild settings", ("category", "reason"))
+send_log_embed_seconds = Histogram(
+    "logger_send_log_embed_seconds", "send_log_embed latency split by phase", ("phase",))
+db_pool_acquire_seconds = Histogram(
+    "logger_db_pool_acquire_seconds", "Time spent waiting for a database pool connection")
+db_query_seconds = Histogram(
+    "logger_db_query_seconds", "Registered database query latency", ("query",))
+db_query_errors = Counter(
+    "logger_db_query_errors_total", "Registered database queries that raised", ("query",))
+db_coalesced = Counter(
+    "logger_db_coalesced_total", "Database lookups answered by an identical query already in flight", ("query",))
+cache_lookups = Counter(
+    "logger_cache_lookups_total", "Cache lookups by result", ("cache", "result"))
+cache_hit_ratio = CacheRatioGauge(
+    "logger_cache_hit_ratio", "Cache hit ratio", cache_lookups)
+outbound_queue_depth = Gauge(
+    "logger_outbound_queue_depth", "Outbound requests waiting to complete", ("queue",))
+archive_backlog = Gauge(
+    "logger_archive_backlog", "Logged events waiting to be written to the archive")
+archive_written = Counter(
+    "logger_archive_written_total", "Logged events written to the archive")
+rate_limited = Counter(
+    "logger_rate_limited_total", "HTTP 429 responses received from Discord", ("scope",))
+
+
+def count_event(func):
+    """Count every invocation of a listener under its event name."""
+    name = func.__name__
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        events_received.inc(name)
+        return await func(*args, **kwargs)
+
+    return wrapper
+
+
+class RateLimitFilter(logging.Filter):
+    """Counts the 429 warnings disnake's HTTP client logs before it retries."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if isinstance(record.msg, str):
+            if record.msg.startswith("We are being rate limited"):
+                rate_limited.inc("bucket")
+            elif record.msg.startswith("Global rate limit"):
+                rate_limited.inc("global")
+        return True
+
+
+class MetricsServer:
+    def __init__(self, host: str = metrics_settings['host'], port: int = metrics_settings['port']):
+        self.host = host
+        self.port = port
+        self.runner: Optional[web.AppRunner] = None
+        self.rate_limit_filter = RateLimitFilter()
+
+    async def handle_metrics(self, request: web.Request) -> web.Response:
+        return web.Response(body=REGISTRY.render().encode(),
+                            headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"})
+
+    async def start(self) -> None:
+        """Start serving /metrics and counting rate limits."""
+        if self.runner is not None:
+            return
+        logging.getLogger("disnake.http").addFilter(self.rate_limit_filter)
+        app = web.Application()
+        app.router.add_get("/metrics", self.handle_metrics)
+        self.runner = web.AppRunner(app, access_log=None)
+        await self.runner.setup()
+        await web.TCPSite(self.runner, self.host, self.port).start()
+        logging.info(f"Metrics server listening on {self.host}:{self.port}")
+
+    async def stop(self) -> None:
+        """Stop the HTTP server."""
+        logging.getLogger("disnake.http").removeFilter(self.rate_limit_filter)
+        if self.runner is not None:
+            await self.runner.cleanup()
+            self.runner = None
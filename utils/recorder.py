@@ -0,0 +1,173 @@
+import asyncio
+import gzip
+import hashlib
+import json
+import logging
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from config import recorder as recorder_settings
+
+FLAG_MUTE = 1
+FLAG_DEAF = 2
+
+
+def _voice_flags(state) -> int:
+    return (FLAG_MUTE if state.self_mute else 0) | (FLAG_DEAF if state.self_deaf else 0)
+
+
+class EventRecorder:
+    """Records the shape of listener traffic to a gzip-compressed JSON lines file.
+
+    Only what the replayer needs is kept: event type, time offset, anonymized
+    ids, bot flags, role sets and message lengths. Message content is never
+    written. Ids are replaced by a keyed hash whose key lives only in memory,
+    so they stay consistent within one recording but cannot be reversed.
+    """
+
+    def __init__(self, path: str = recorder_settings['path'], flush_every: int = recorder_settings['flush_every']):
+        self.path = path.format(timestamp=time.strftime("%Y%m%d-%H%M%S"))
+        self.flush_every = flush_every
+        self.started = time.monotonic()
+        self._key = os.urandom(16)
+        self._buffer: List[str] = []
+        self._file: Optional[gzip.GzipFile] = None
+        self._flushing: Optional[asyncio.Task] = None
+        self._listeners: List[tuple] = []
+        self.recorded = 0
+
+    def anonymize(self, object_id: Optional[int]) -> Optional[int]:
+        if object_id is None:
+            return None
+        # Recomputed every time: caching would keep every message id seen for the life of the recording.
+        digest = hashlib.blake2b(object_id.to_bytes(8, "little"), key=self._key, digest_size=8).digest()
+        return int.from_bytes(digest, "little") >> 1
+
+    def _id(self, obj) -> Optional[int]:
+        return self.anonymize(getattr(obj, "id", None)) if obj is not None else None
+
+    def _message(self, message) -> Dict[str, Any]:
+        author = message.author
+        return {
+            "g": self._id(message.guild),
+            "c": self._id(message.channel),
+            "u": self._id(author),
+            "m": self._id(message),
+            "b": int(bool(getattr(author, "bot", False))),
+            "n": len(message.content or ""),
+            "mu": [self._id(user) for user in getattr(message, "mentions", ())],
+            "mr": [self._id(role) for role in getattr(message, "role_mentions", ())],
+        }
+
+    def _member(self, member) -> Dict[str, Any]:
+        return {"g": self._id(member.guild), "u": self._id(member), "b": int(bool(getattr(member, "bot", False)))}
+
+    def _reaction(self, reaction, user) -> Dict[str, Any]:
+        payload = self._message(reaction.message)
+        payload["em"] = str(reaction.emoji) if isinstance(reaction.emoji, str) else ":custom:"
+        payload["r"] = self._id(user)
+        payload["rb"] = int(bool(getattr(user, "bot", False)))
+        return payload
+
+    def _channel(self, channel) -> Dict[str, Any]:
+        return {"g": self._id(channel.guild), "c": self._id(channel), "k": str(getattr(channel, "type", ""))}
+
+    def encoders(self) -> Dict[str, Callable[..., Dict[str, Any]]]:
+        return {
+            "on_message": self._message,
+            "on_message_edit": lambda before, after: {**self._message(after), "n0": len(before.content or "")},
+            "on_message_delete": self._message,
+            "on_bulk_message_delete": lambda messages: {
+                **(self._message(messages[0]) if messages else {}), "k": len(messages)},
+            "on_member_join": self._member,
+            "on_member_remove": self._member,
+            "on_member_update": lambda before, after: {
+                **self._member(after),
+                "r0": [self._id(role) for role in before.roles],
+                "r1": [self._id(role) for role in after.roles],
+                "d": int(before.display_name != after.display_name),
+            },
+            "on_member_ban": lambda guild, user: {"g": self._id(guild), "u": self._id(user),
+                                                  "b": int(bool(getattr(user, "bot", False)))},
+            "on_member_unban": lambda guild, user: {"g": self._id(guild), "u": self._id(user),
+                                                    "b": int(bool(getattr(user, "bot", False)))},
+            "on_voice_state_update": lambda member, before, after: {
+                **self._member(member),
+                "c0": self._id(before.channel), "c1": self._id(after.channel),
+                "f0": _voice_flags(before), "f1": _voice_flags(after),
+            },
+            "on_reaction_add": self._reaction,
+            "on_reaction_remove": self._reaction,
+            "on_reaction_clear": lambda message, reactions: {**self._message(message), "k": len(reactions)},
+            "on_typing": lambda channel, user, when: {
+                "g": self._id(getattr(channel, "guild", None)), "c": self._id(channel), "u": self._id(user),
+                "b": int(bool(getattr(user, "bot", False)))},
+            "on_guild_channel_create": self._channel,
+            "on_guild_channel_delete": self._channel,
+            "on_guild_channel_update": lambda before, after: self._channel(after),
+            "on_thread_create": self._channel,
+            "on_thread_delete": self._channel,
+            "on_automod_action": lambda execution: {
+                "g": self._id(execution.guild), "c": self._id(execution.channel),
+                "u": self._id(execution.member), "n": len(execution.content or ""),
+                "k": len(execution.actions)},
+        }
+
+    def record(self, event: str, payload: Dict[str, Any]) -> None:
+        payload["e"] = event[3:]
+        payload["t"] = int((time.monotonic() - self.started) * 1000)
+        self._buffer.append(json.dumps(payload, separators=(",", ":")))
+        self.recorded += 1
+        if len(self._buffer) >= self.flush_every and (self._flushing is None or self._flushing.done()):
+            self._flushing = asyncio.get_running_loop().create_task(self.flush())
+
+    def _make_listener(self, event: str, encoder: Callable[..., Dict[str, Any]]):
+        async def listener(*args):
+            try:
+                self.record(event, encoder(*args))
+            except Exception as e:
+                logging.debug(f"Failed to record {event}: {e}")
+        return listener
+
+    def attach(self, bot) -> None:
+        """Start recording every supported event dispatched by ``bot``."""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._file = gzip.open(self.path, "at", encoding="utf-8")
+        for event, encoder in self.encoders().items():
+            listener = self._make_listener(event, encoder)
+            bot.add_listener(listener, event)
+            self._listeners.append((listener, event))
+        logging.info(f"Recording gateway events to {self.path}")
+
+    def _write(self, lines: List[str]) -> None:
+        self._file.write("\n".join(lines) + "\n")
+        self._file.flush()
+
+    async def flush(self) -> None:
+        """Compress and write buffered records in a worker thread."""
+        if not self._buffer or self._file is None:
+            return
+        lines, self._buffer = self._buffer, []
+        await asyncio.to_thread(self._write, lines)
+
+    async def detach(self, bot) -> None:
+        """Stop recording and close the file."""
+        for listener, event in self._listeners:
+            bot.remove_listener(listener, event)
+        self._listeners.clear()
+        if self._flushing is not None:
+            await self._flushing
+        await self.flush()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        logging.info(f"Recorded {self.recorded} events to {self.path}")
+
+
+def read_recording(path: str):
+    """Yield recorded events in order as dicts."""
+    with gzip.open(path, "rt", encoding="utf-8") as file:
+        for line in file:
+            if line.strip():
+                yield json.loads(line)
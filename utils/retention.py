@@ -0,0 +1,92 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, List, Tuple
+
+from config import archive as archive_settings
+from utils import metrics
+from utils.archive import EventArchive
+
+
+# Keyset cursor every maintenance pass starts from; archived events are all newer.
+_START = (datetime(1970, 1, 1, tzinfo=timezone.utc), 0)
+
+
+class RetentionJob:
+    """Keeps the event archive within its retention limits without competing with live logging.
+
+    Days past the longest retention are dropped a whole partition at a time. Guilds with their
+    own retention or redaction age are then purged and redacted one by one over their own
+    ``(guild_id, created_at)`` range, and the rest in one pass at the defaults. Every pass
+    walks forward in small batches that wait while the archive backlog or the outbound
+    send queue is high.
+    """
+
+    def __init__(self, archive: EventArchive, retention_days: int = archive_settings['retention_days'],
+                 redact_after_days: int = archive_settings['redact_after_days'],
+                 batch_size: int = archive_settings['maintenance_batch_size'],
+                 max_backlog: int = archive_settings['maintenance_max_backlog'], pause: float = 5.0):
+        self.archive = archive
+        self.retention_days = retention_days
+        self.redact_after_days = redact_after_days
+        self.batch_size = batch_size
+        self.max_backlog = max_backlog
+        self.pause = pause
+
+    @property
+    def busy(self) -> bool:
+        return (self.archive.backlog > self.max_backlog
+                or metrics.outbound_queue_depth.get("channel_send") > self.max_backlog)
+
+    async def wait_until_quiet(self) -> None:
+        while self.busy:
+            await asyncio.sleep(self.pause)
+
+    async def run(self, db) -> None:
+        started = time.perf_counter()
+        now = datetime.now(timezone.utc)
+        await db.create_log_partitions([now.date(), now.date() + timedelta(days=1)])
+
+        overrides = await db.get_retention_overrides()
+        retention = {row['guild_id']: row['retention_days'] for row in overrides if row['retention_days'] is not None}
+        redaction = {row['guild_id']: row['redact_after_days'] for row in overrides
+                     if row['redact_after_days'] is not None}
+        # Partitions are shared by all guilds, so one is dropped only once the longest retention has passed.
+        longest = max([self.retention_days, *retention.values()])
+        await self.wait_until_quiet()
+        dropped = await db.drop_log_partitions((now - timedelta(days=longest)).date())
+
+        purged = 0
+        for guild_id, days in retention.items():
+            if days < longest:
+                purged += await self._in_batches(db.purge_log_events, now - timedelta(days=days), guild_id=guild_id)
+        if self.retention_days < longest:
+            purged += await self._in_batches(db.purge_log_events, now - timedelta(days=self.retention_days),
+                                             exclude=list(retention))
+
+        # A redaction age of 0 keeps message bodies.
+        redacted = 0
+        for guild_id, days in redaction.items():
+            if days:
+                redacted += await self._in_batches(db.redact_log_events, now - timedelta(days=days), guild_id=guild_id)
+        if self.redact_after_days:
+            redacted += await self._in_batches(db.redact_log_events, now - timedelta(days=self.redact_after_days),
+                                               exclude=list(redaction))
+
+        if dropped or purged or redacted:
+            logging.info(
+                f"Archive maintenance: dropped {len(dropped)} partitions, purged {purged} events, "
+                f"redacted {redacted} message bodies in {time.perf_counter() - started:.1f}s"
+            )
+
+    async def _in_batches(self, step: Callable[..., Awaitable[List[Tuple[datetime, int]]]], before: datetime,
+                          **target) -> int:
+        total, after = 0, _START
+        while True:
+            await self.wait_until_quiet()
+            keys = await step(before, self.batch_size, after, **target)
+            total += len(keys)
+            if len(keys) < self.batch_size:
+                return total
+            after = max(keys)
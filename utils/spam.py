@@ -0,0 +1,157 @@
+import hashlib
+import time
+from array import array
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import spam as spam_settings
+
+
+def content_hash(content: str) -> int:
+    """64-bit hash of a message, ignoring case and whitespace differences."""
+    normalized = " ".join(content.lower().split())
+    return int.from_bytes(hashlib.blake2b(normalized.encode("utf-8"), digest_size=8).digest(), "big", signed=True)
+
+
+class UserHistory:
+    """A user's recent messages as three parallel arrays, oldest first (about 24 bytes per message)."""
+
+    __slots__ = ("hashes", "times", "channels")
+
+    def __init__(self):
+        self.hashes = array("q")
+        self.times = array("d")
+        self.channels = array("q")
+
+    def evict(self, before: float, keep: int) -> None:
+        drop = 0
+        times = self.times
+        while drop < len(times) and (times[drop] < before or len(times) - drop >= keep):
+            drop += 1
+        if drop:
+            del self.hashes[:drop], self.times[:drop], self.channels[:drop]
+
+    def append(self, digest: int, now: float, channel_id: int) -> None:
+        self.hashes.append(digest)
+        self.times.append(now)
+        self.channels.append(channel_id)
+
+
+class SpamBurst:
+    """Copies of one message by one user.
+
+    It becomes ``confirmed`` once ``threshold`` copies are seen. Until then, copies after
+    the first are kept in ``held`` so they can be logged one by one if it never does.
+    """
+
+    __slots__ = ("guild_id", "user_id", "digest", "preview", "count", "channels", "started", "last",
+                 "confirmed", "held")
+
+    def __init__(self, guild_id: int, user_id: int, digest: int, preview: str, started: float):
+        self.guild_id = guild_id
+        self.user_id = user_id
+        self.digest = digest
+        self.preview = preview
+        self.count = 0
+        self.channels: Dict[int, int] = {}
+        self.started = started
+        self.last = started
+        self.confirmed = False
+        self.held: List[Any] = []
+
+    def add(self, channel_id: int, now: float) -> None:
+        self.count += 1
+        self.channels[channel_id] = self.channels.get(channel_id, 0) + 1
+        self.last = now
+
+
+class DuplicateTracker:
+    """Spots a user posting the same content again and again, across any channels.
+
+    Each user keeps at most ``history`` hashes from the last ``window`` seconds, and at
+    most ``max_users`` users are tracked (least recently active are dropped first). The
+    first copy of a message is logged as usual. Later copies in the window are held until
+    the hash is seen ``threshold`` times, which confirms the burst and drops them. A burst
+    ends after ``window`` seconds without a copy. A confirmed burst is then reported once,
+    and the copies held by a burst that was never confirmed are logged on their own.
+    """
+
+    def __init__(self, threshold: int = spam_settings['duplicates'], window: float = spam_settings['window'],
+                 history: int = spam_settings['history'], max_users: int = spam_settings['max_users']):
+        self.threshold = threshold
+        self.window = window
+        self.history = history
+        self.max_users = max_users
+        self.users: "OrderedDict[Tuple[int, int], UserHistory]" = OrderedDict()
+        self.bursts: Dict[Tuple[int, int, int], SpamBurst] = {}
+
+    def check(self, guild_id: int, user_id: int, channel_id: int, content: str, message: Any = None,
+              now: Optional[float] = None) -> Optional[SpamBurst]:
+        """Record a message; returns the burst it belongs to, in which case it should not be logged now.
+
+        ``message`` is what gets held until the burst is confirmed or ends.
+        """
+        if not content:
+            return None
+        now = now or time.time()
+        digest = content_hash(content)
+        burst = self.bursts.get((guild_id, user_id, digest))
+        if burst is not None:
+            burst.add(channel_id, now)
+            self._hold(burst, message)
+            return burst
+
+        key = (guild_id, user_id)
+        history = self.users.get(key)
+        if history is None:
+            history = self.users[key] = UserHistory()
+            if len(self.users) > self.max_users:
+                self.users.popitem(last=False)
+        else:
+            self.users.move_to_end(key)
+        history.evict(now - self.window, self.history)
+        history.append(digest, now, channel_id)
+
+        copies = [index for index, value in enumerate(history.hashes) if value == digest]
+        if len(copies) < min(self.threshold, 2):
+            return None
+        burst = self.bursts[(guild_id, user_id, digest)] = SpamBurst(
+            guild_id, user_id, digest, content[:spam_settings['preview_length']], history.times[copies[0]]
+        )
+        for index in copies:
+            burst.add(history.channels[index], history.times[index])
+        self._hold(burst, message)
+        return burst
+
+    def _hold(self, burst: SpamBurst, message: Any) -> None:
+        if burst.confirmed:
+            return
+        if burst.count >= self.threshold:
+            burst.confirmed = True
+            burst.held.clear()
+        elif message is not None:
+            burst.held.append(message)
+
+    def expire(self, now: Optional[float] = None) -> List[SpamBurst]:
+        """End bursts with no copy in the last window and drop idle users; returns the ended bursts.
+
+        Bursts that were never confirmed are returned too, so their held copies can be logged.
+        """
+        now = now or time.time()
+        before = now - self.window
+        ended = [burst for burst in self.bursts.values() if burst.last < before]
+        for burst in ended:
+            del self.bursts[(burst.guild_id, burst.user_id, burst.digest)]
+        # ``users`` is ordered by last activity, so idle users are at the front.
+        while self.users:
+            key, history = next(iter(self.users.items()))
+            if history.times and history.times[-1] >= before:
+                break
+            del self.users[key]
+        return ended
+
+    def forget(self, guild_id: int) -> None:
+        for key in [key for key in self.users if key[0] == guild_id]:
+            del self.users[key]
+        for key in [key for key in self.bursts if key[0] == guild_id]:
+            del self.bursts[key]
@@ -0,0 +1,93 @@
+import time
+from collections import deque
+from typing import Deque, Dict
+
+from config import tracing as tracing_settings
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class _Span:
+    __slots__ = ("tracer", "name", "started")
+
+    def __init__(self, tracer: "Tracer", name: str):
+        self.tracer = tracer
+        self.name = name
+        self.started = 0.0
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.tracer.record(self.name, time.perf_counter() - self.started)
+        return False
+
+
+def _percentile(ordered, fraction: float) -> float:
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class Tracer:
+    """Keeps the most recent stage timings in per-stage ring buffers."""
+
+    def __init__(self, enabled: bool = False, capacity: int = 1024):
+        self.enabled = enabled
+        self.capacity = capacity
+        self._samples: Dict[str, Deque[float]] = {}
+
+    def span(self, name: str):
+        """Time the enclosed block under ``name``; a shared no-op when tracing is off."""
+        if not self.enabled:
+            return _NOOP_SPAN
+        return _Span(self, name)
+
+    def record(self, name: str, seconds: float) -> None:
+        samples = self._samples.get(name)
+        if samples is None:
+            samples = self._samples[name] = deque(maxlen=self.capacity)
+        samples.append(seconds)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Return count and p50/p95/p99/max (in milliseconds) for every stage."""
+        result = {}
+        for name, samples in sorted(self._samples.items()):
+            if not samples:
+                continue
+            ordered = sorted(samples)
+            result[name] = {
+                "count": len(ordered),
+                "p50": _percentile(ordered, 0.50) * 1000,
+                "p95": _percentile(ordered, 0.95) * 1000,
+                "p99": _percentile(ordered, 0.99) * 1000,
+                "max": ordered[-1] * 1000,
+            }
+        return result
+
+    def format_summary(self) -> str:
+        """Render the summary as a fixed-width table."""
+        lines = [f"{'stage':<28}{'n':>6}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}"]
+        for name, stats in self.summary().items():
+            lines.append(
+                f"{name:<28}{stats['count']:>6}{stats['p50']:>9.1f}{stats['p95']:>9.1f}"
+                f"{stats['p99']:>9.1f}{stats['max']:>9.1f}"
+            )
+        return "\n".join(lines)
+
+    def clear(self) -> None:
+        self._samples.clear()
+
+
+tracer = Tracer(tracing_settings['enabled'], tracing_settings['buffer_size'])
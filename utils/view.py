@@ -1,409 +1,472 @@
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
 import disnake
-from disnake.ext import commands
-from disnake.ui import StringSelect, ChannelSelect, View
+from disnake.ui import Button, StringSelect, ChannelSelect, RoleSelect, UserSelect, View
 
-from config import messages, log_colors, bot_settings
+from config import messages, log_colors, bot_settings, archive as archive_settings
 from utils.database import Database
-
-
-class BaseButton(disnake.ui.Button):
-    def __init__(self, db: Database, guild: disnake.Guild):
-        self.db = db
-        self.guild = guild
-        self.lang = "en"
-        super().__init__()
-
-    async def initialize(self):
-        self.lang = await self.db.get_language(self.guild.id) or "en"
-        self._update_labels()
-
-    def _update_labels(self):
-        pass
-
-
-class BaseSelect:
-    def __init__(self, db: Database, guild: disnake.Guild):
-        self.db = db
-        self.guild = guild
-        self.lang = "en"
-
-    async def initialize(self):
-        self.lang = await self.db.get_language(self.guild.id) or "en"
-        self._update_labels()
-
-    def _update_labels(self):
-        pass
-
-
-class ToggleLoggingButton(BaseButton):
-    def __init__(self, db: Database, guild: disnake.Guild, is_enabled: bool):
-        self.is_enabled = is_enabled
-        super().__init__(db, guild)
-
-    def _update_labels(self):
-        self.label = messages[self.lang]['buttons']['logging_disable'] if self.is_enabled else \
-            messages[self.lang]['buttons']['logging_enable']
-        self.style = disnake.ButtonStyle.red if self.is_enabled else disnake.ButtonStyle.green
-
-    async def callback(self, inter: disnake.MessageInteraction):
-        await self.initialize()
-        new_status = not self.is_enabled
-        await self.db.set_logging_enabled(self.guild.id, new_status)
-
-        embed = disnake.Embed(
-            title=messages[self.lang]['logging']['status_changed'],
-            color=log_colors["success"]
-        )
-
-        view = View()
-
-        channel_select = LogChannelSelect(self.db, self.guild)
-        toggle_btn = ToggleLoggingButton(self.db, inter.guild, new_status)
-        back_btn = BackButton(self.db, self.guild)
-
-        await channel_select.initialize()
-        await toggle_btn.initialize()
-        await back_btn.initialize()
-
-        view.add_item(channel_select)
-        view.add_item(toggle_btn)
-
-        if new_status:
-            detailed_btn = DetailedSettingsButton(self.db, inter.guild)
-            await detailed_btn.initialize()
-            view.add_item(detailed_btn)
-
-        view.add_item(back_btn)
-        await inter.response.edit_message(embed=embed, view=view)
-
-
-class DetailedSettingsButton(BaseButton):
-    def _update_labels(self):
-        self.label = messages[self.lang]['buttons']['detailed_settings']
-        self.style = disnake.ButtonStyle.grey
-
-    async def callback(self, inter: disnake.MessageInteraction):
-        await self.initialize()
-        settings = await self.db.get_log_settings(inter.guild.id) or {}
-
-        log_types = {}
-        if settings.get("log_types"):
-            for item in settings["log_types"].split(','):
-                if ':' in item:
-                    typ, val = item.split(':')
-                    log_types[typ.strip()] = val.strip() == '1'
-
-        embed = disnake.Embed(
-            title=messages[self.lang]['logging']['detailed_title'],
-            description=messages[self.lang]['logging']['detailed_description'],
-            color=log_colors["info"]
-        )
-
-        for log_type, data in messages[self.lang]['logging']['categories'].items():
-            status = messages[self.lang]['logging']['status_enabled'] if log_types.get(log_type, False) else \
-                messages[self.lang]['logging']['status_disabled']
-
-            embed.add_field(
-                name=f"{data['name']} ({status})",
-                value=data['description'],
-                inline=True
-            )
-
-        view = View()
-        for log_type in messages[self.lang]['logging']['categories'].keys():
-            is_enabled = log_types.get(log_type, False)
-            btn = LogTypeToggleButton(
-                messages[self.lang]['log_categories'][log_type],
-                log_type,
-                is_enabled,
-                self.db,
-                self.guild
-            )
-            await btn.initialize()
-            view.add_item(btn)
-
-        back_btn = BackButton(self.db, self.guild, back_to="settings")
-        await back_btn.initialize()
-        view.add_item(back_btn)
-
-        await inter.response.edit_message(embed=embed, view=view)
-
-
-class LogTypeToggleButton(BaseButton):
-    def __init__(self, label: str, log_type: str, is_enabled: bool, db: Database, guild: disnake.Guild):
-        self.label_text = label
-        self.log_type = log_type
-        self.is_enabled = is_enabled
-        super().__init__(db, guild)
-
-    def _update_labels(self):
-        self.label = f"{self.label_text}"
-        self.style = disnake.ButtonStyle.green if self.is_enabled else disnake.ButtonStyle.red
-
-    async def callback(self, inter: disnake.MessageInteraction):
-        await self.initialize()
-        settings = await self.db.get_log_settings(inter.guild.id) or {}
-
-        log_types = {}
-        if settings.get("log_types"):
-            for item in settings["log_types"].split(','):
-                if ':' in item:
-                    typ, val = item.split(':')
-                    log_types[typ.strip()] = val.strip() == '1'
-
-        current_value = log_types.get(self.log_type, False)
-        new_value = not current_value
-
-        await self.db.update_log_type(inter.guild.id, self.log_type, new_value)
-
-        self.is_enabled = new_value
-        self._update_labels()
-        await inter.response.edit_message(view=self.view)
-
-
-class LanguageSelect(StringSelect):
-    def __init__(self, db: Database, guild: disnake.Guild):
-        self.db = db
-        self.guild = guild
-        self.lang = "en"
-
-        options = [
-            disnake.SelectOption(label="English", emoji="🇬🇧", value="en"),
-            disnake.SelectOption(label="Русский", emoji="🇷🇺", value="ru")
-        ]
-        super().__init__(
-            placeholder="Select language",
-            min_values=1,
-            max_values=1,
-            options=options
-        )
-
-    async def initialize(self):
-        self.lang = await self.db.get_language(self.guild.id) or "en"
-        self._update_labels()
-
-    def _update_labels(self):
-        """Обновляет текст селектора согласно текущему языку"""
-        self.placeholder = messages[self.lang]['language']['select']
-
-    async def callback(self, inter: disnake.MessageInteraction):
-        lang = self.values[0]
-        await self.db.set_language(self.guild.id, lang)
-
-        embed = disnake.Embed(
-            title=messages[lang]['language']['success'].format(lang=lang.upper()),
-            description=messages[lang]['language']['success'].format(lang=lang),
-            color=log_colors["success"]
-        )
-
-        view = View()
-        back_btn = BackButton(self.db, self.guild)
-        await back_btn.initialize()
-        view.add_item(back_btn)
-
-        await inter.response.edit_message(embed=embed, view=view)
-
-
-class LogChannelSelect(ChannelSelect):
-    def __init__(self, db: Database, guild: disnake.Guild):
-        self.db = db
-        self.guild = guild
-        self.lang = "en"
-        super().__init__(
-            placeholder="Select channel",
+from utils.guild_config import GuildConfig, LOG_CATEGORIES
+
+# Settings panels are stateless: every component's custom_id is "logger:<action>:<guild_id>[:<args>]", and a single
+# dispatcher rebuilds whatever the action needs from the cached guild config. Nothing is kept per open panel, and
+# panels sent before a restart keep working after it.
+PREFIX = "logger"
+
+Panel = Tuple[disnake.Embed, list]
+Action = Callable[..., Awaitable[None]]
+ACTIONS: Dict[str, Action] = {}
+
+
+def action(name: str):
+    """Register a handler for components whose custom_id carries ``name`` as the action."""
+    def register(handler: Action) -> Action:
+        ACTIONS[name] = handler
+        return handler
+    return register
+
+
+def custom_id(action_name: str, guild_id: int, *args) -> str:
+    return ":".join((PREFIX, action_name, str(guild_id), *map(str, args)))
+
+
+def encode_staged(staged: Dict[str, bool]) -> str:
+    """Pack staged log type toggles into one short custom_id argument: ``-`` unchanged, ``1`` on, ``0`` off."""
+    return "".join("-" if log_type not in staged else "1" if staged[log_type] else "0" for log_type in LOG_CATEGORIES)
+
+
+def decode_staged(value: str) -> Dict[str, bool]:
+    return {log_type: flag == "1" for log_type, flag in zip(LOG_CATEGORIES, value) if flag != "-"}
+
+
+async def dispatch(db: Database, inter: disnake.MessageInteraction) -> bool:
+    """Route a component interaction to its settings action; returns False if it isn't a settings component."""
+    parts = (inter.component.custom_id or "").split(":")
+    if len(parts) < 3 or parts[0] != PREFIX or parts[1] not in ACTIONS:
+        return False
+    if inter.guild is None or parts[2] != str(inter.guild.id):
+        return False
+
+    config = await db.get_guild_config(inter.guild.id)
+    await ACTIONS[parts[1]](db, inter, config, *parts[3:])
+    return True
+
+
+def is_logging_enabled(config: GuildConfig) -> bool:
+    # The panel shows a guild that never saved settings as disabled, as it always has.
+    return config.exists and config.logging_enabled
+
+
+def back_button(guild: disnake.Guild, to: str = "main") -> Button:
+    return Button(emoji="⬅️", style=disnake.ButtonStyle.grey, custom_id=custom_id(to, guild.id))
+
+
+def settings_embed(bot, guild: disnake.Guild, lang: str) -> disnake.Embed:
+    embed = disnake.Embed(
+        title=messages[lang]['settings']['title'],
+        description=messages[lang]['settings']['description'],
+        color=0x2b2d31
+    )
+    embed.add_field(
+        name=messages[lang]['settings']['developer'],
+        value=f"`{bot_settings['bot_author']}`",
+        inline=True
+    )
+    embed.add_field(
+        name=messages[lang]['settings']['version'],
+        value=bot_settings['bot_version'],
+        inline=True
+    )
+    embed.set_footer(text=messages[lang]['settings']['footer'])
+    embed.set_author(
+        icon_url=guild.icon.url if guild.icon else None,
+        name=guild.name
+    )
+    embed.set_thumbnail(
+        url=bot.user.avatar.url if bot.user.avatar else None
+    )
+    return embed
+
+
+def settings_panel(bot, guild: disnake.Guild, config: GuildConfig) -> Panel:
+    components = [
+        Button(emoji="⚙️", style=disnake.ButtonStyle.grey, custom_id=custom_id("logging", guild.id)),
+        Button(emoji="🌐", style=disnake.ButtonStyle.grey, custom_id=custom_id("language", guild.id)),
+        Button(emoji="🚫", style=disnake.ButtonStyle.grey, custom_id=custom_id("ignore", guild.id)),
+        Button(label="GitHub", style=disnake.ButtonStyle.link, url="https://github.com/agzatre/discord-logger-bot"),
+    ]
+    return settings_embed(bot, guild, config.language), components
+
+
+def logging_embed(guild: disnake.Guild, config: GuildConfig) -> disnake.Embed:
+    lang = config.language
+    embed = disnake.Embed(
+        title=messages[lang]['logging']['title'],
+        description=messages[lang]['logging']['description'],
+        color=log_colors["info"]
+    )
+
+    status = messages[lang]['logging']['status_enabled'] if is_logging_enabled(config) else \
+        messages[lang]['logging']['status_disabled']
+    embed.add_field(
+        name=messages[lang]['logging']['status_label'],
+        value=status,
+        inline=False
+    )
+
+    log_channel = messages[lang]['logging']['channel_not_set']
+    if config.log_channel_id:
+        channel = guild.get_channel(config.log_channel_id)
+        log_channel = channel.mention if channel else messages[lang]['logging']['channel_not_found']
+    embed.add_field(
+        name=messages[lang]['logging']['channel_label'],
+        value=log_channel,
+        inline=False
+    )
+    return embed
+
+
+def logging_components(guild: disnake.Guild, config: GuildConfig) -> list:
+    lang = config.language
+    enabled = is_logging_enabled(config)
+    components = [
+        ChannelSelect(
+            placeholder=messages[lang]['logging']['select_channel'],
             channel_types=[disnake.ChannelType.text],
             min_values=1,
-            max_values=1
-        )
-
-    async def initialize(self):
-        """Инициализирует селектор с актуальным языком из БД"""
-        self.lang = await self.db.get_language(self.guild.id) or "en"
-        self._update_labels()
-
-    def _update_labels(self):
-        """Обновляет текст селектора согласно текущему языку"""
-        self.placeholder = messages[self.lang]['logging']['select_channel']
-
-    async def callback(self, inter: disnake.MessageInteraction):
-        await self.initialize()
-        channel_id = self.values[0].id
-        await self.db.set_log_channel(self.guild.id, channel_id)
-
-        embed = disnake.Embed(
-            # title=messages[self.lang]['logging']['channel_set'].format(channel=self.values[0].mention),
-            description=messages[self.lang]['logging']['channel_set'].format(channel=self.values[0].mention),
-            color=log_colors["success"]
-        )
-
-        await inter.response.edit_message(embed=embed)
-
-
-class BackButton(BaseButton):
-    def __init__(self, db: Database, guild: disnake.Guild, back_to: str = "main"):
-        self.back_to = back_to
-        super().__init__(db, guild)
-
-    def _update_labels(self):
-        # self.label = messages[self.lang]['buttons']['back']
-        self.emoji = "⬅️"
-        self.style = disnake.ButtonStyle.grey
-
-    async def callback(self, inter: disnake.MessageInteraction):
-        await self.initialize()
-
-        if self.back_to == "main":
-            embed = disnake.Embed(
-                title=messages[self.lang]['settings']['title'],
-                description=messages[self.lang]['settings']['description'],
-                color=log_colors["info"]
-            )
-            embed.add_field(
-                name=messages[self.lang]['settings']['developer'],
-                value=f"`{bot_settings['bot_author']}`",
-                inline=True
-            )
-            embed.add_field(
-                name=messages[self.lang]['settings']['version'],
-                value=bot_settings['bot_version'],
-                inline=True
-            )
-            embed.set_author(
-                icon_url=inter.guild.icon.url if inter.guild.icon else None,
-                name=inter.guild.name
-            )
-
-            view = BotSettingsView(inter.bot, self.db, inter.guild)
-            await inter.response.edit_message(embed=embed, view=view)
-
-        elif self.back_to == "settings":
-            settings = await self.db.get_log_settings(inter.guild.id) or {}
-            lang = await self.db.get_language(inter.guild.id) or "en"
-
-            embed = disnake.Embed(
-                title=messages[lang]['logging']['title'],
-                description=messages[lang]['logging']['description'],
-                color=log_colors["info"]
-            )
-
-            status = messages[lang]['logging']['status_enabled'] if settings.get("logging_enabled", False) else \
-                messages[lang]['logging']['status_disabled']
-            embed.add_field(
-                name=messages[lang]['logging']['status_label'],
-                value=status,
-                inline=False
-            )
-
-            log_channel = messages[lang]['logging']['channel_not_set']
-            if settings.get("log_channel_id"):
-                channel = inter.guild.get_channel(settings["log_channel_id"])
-                log_channel = channel.mention if channel else messages[lang]['logging']['channel_not_found']
-            embed.add_field(
-                name=messages[lang]['logging']['channel_label'],
-                value=log_channel,
-                inline=False
-            )
-
-            view = View()
-            channel_select = LogChannelSelect(self.db, inter.guild)
-            toggle_btn = ToggleLoggingButton(self.db, inter.guild, settings.get("logging_enabled", False))
-            back_btn = BackButton(self.db, inter.guild)
-
-            await channel_select.initialize()
-            await toggle_btn.initialize()
-            await back_btn.initialize()
-
-            view.add_item(channel_select)
-            view.add_item(toggle_btn)
-
-            if settings.get("logging_enabled", False):
-                detailed_btn = DetailedSettingsButton(self.db, inter.guild)
-                await detailed_btn.initialize()
-                view.add_item(detailed_btn)
-
-            view.add_item(back_btn)
-            await inter.response.edit_message(embed=embed, view=view)
-
-
-class BotSettingsView(View):
-    def __init__(self, bot: commands.Bot, db: Database, guild: disnake.Guild):
-        super().__init__(timeout=None)
-        self.bot = bot
-        self.db = db
-        self.guild = guild
-
-    async def create_button(self, button_class, *args):
-        btn = button_class(self.db, self.guild, *args)
-        if isinstance(btn, BaseButton):
-            await btn.initialize()
-        return btn
-
-    @disnake.ui.button(emoji="⚙️", style=disnake.ButtonStyle.grey, row=0)
-    async def settings_button(self, button: disnake.ui.Button, inter: disnake.MessageInteraction):
-        settings = await self.db.get_log_settings(inter.guild.id) or {}
-        lang = await self.db.get_language(inter.guild.id) or "en"
-
-        embed = disnake.Embed(
-            title=messages[lang]['logging']['title'],
-            description=messages[lang]['logging']['description'],
-            color=log_colors["info"]
-        )
-
-        status = messages[lang]['logging']['status_enabled'] if settings.get("logging_enabled", False) else \
+            max_values=1,
+            custom_id=custom_id("log_channel", guild.id)
+        ),
+        Button(
+            label=messages[lang]['buttons']['logging_disable'] if enabled else
+            messages[lang]['buttons']['logging_enable'],
+            style=disnake.ButtonStyle.red if enabled else disnake.ButtonStyle.green,
+            custom_id=custom_id("toggle_logging", guild.id)
+        ),
+    ]
+    if enabled:
+        components.append(Button(
+            label=messages[lang]['buttons']['detailed_settings'],
+            style=disnake.ButtonStyle.grey,
+            custom_id=custom_id("detailed", guild.id)
+        ))
+    components.append(back_button(guild))
+    return components
+
+
+def detailed_panel(guild: disnake.Guild, config: GuildConfig, staged: Optional[Dict[str, bool]] = None,
+                   title: Optional[str] = None) -> Panel:
+    """Detailed panel; toggles are staged in the components' custom_ids until they are saved in one write."""
+    lang = config.language
+    staged = staged or {}
+
+    def is_enabled(log_type: str) -> bool:
+        return staged.get(log_type, config.log_types.get(log_type, False))
+
+    description = messages[lang]['logging']['detailed_description']
+    if staged:
+        description += "\n\n" + messages[lang]['logging']['unsaved_changes']
+    embed = disnake.Embed(
+        title=title or messages[lang]['logging']['detailed_title'],
+        description=description,
+        color=log_colors["warning"] if staged else log_colors["info"]
+    )
+
+    components = []
+    for log_type, data in messages[lang]['logging']['categories'].items():
+        status = messages[lang]['logging']['status_enabled'] if is_enabled(log_type) else \
             messages[lang]['logging']['status_disabled']
-        embed.add_field(
-            name=messages[lang]['logging']['status_label'],
-            value=status,
-            inline=False
-        )
+        mode = config.modes.get(log_type)
+        if is_enabled(log_type) and mode in ("digest", "archive"):
+            status += f", {messages[lang]['delivery_modes'][mode]}"
+        marker = "*" if log_type in staged else ""
 
-        log_channel = messages[lang]['logging']['channel_not_set']
-        if settings.get("log_channel_id"):
-            channel = inter.guild.get_channel(settings["log_channel_id"])
-            log_channel = channel.mention if channel else messages[lang]['logging']['channel_not_found']
         embed.add_field(
-            name=messages[lang]['logging']['channel_label'],
-            value=log_channel,
-            inline=False
+            name=f"{data['name']} ({status}){marker}",
+            value=data['description'],
+            inline=True
         )
+        components.append(Button(
+            label=messages[lang]['log_categories'][log_type],
+            style=disnake.ButtonStyle.green if is_enabled(log_type) else disnake.ButtonStyle.red,
+            custom_id=custom_id("log_type", guild.id, log_type, encode_staged(staged))
+        ))
+
+    if staged:
+        components.append(Button(
+            label=messages[lang]['buttons']['save'],
+            style=disnake.ButtonStyle.green,
+            custom_id=custom_id("save_log_types", guild.id, encode_staged(staged))
+        ))
+        components.append(Button(
+            label=messages[lang]['buttons']['cancel'],
+            style=disnake.ButtonStyle.grey,
+            custom_id=custom_id("detailed", guild.id)
+        ))
+    components.append(back_button(guild, "logging"))
+    return embed, components
+
+
+def language_panel(guild: disnake.Guild, config: GuildConfig) -> Panel:
+    lang = config.language
+    embed = disnake.Embed(
+        title=messages[lang]['language']['current'].format(lang=lang.upper()),
+        description=messages[lang]['language']['available'].format(languages="🇬🇧 English, 🇷🇺 Русский"),
+        color=log_colors["info"]
+    )
+
+    options = [
+        disnake.SelectOption(label="English", emoji="🇬🇧", value="en"),
+        disnake.SelectOption(label="Русский", emoji="🇷🇺", value="ru")
+    ]
+    components = [
+        StringSelect(
+            placeholder=messages[lang]['language']['select'],
+            min_values=1,
+            max_values=1,
+            options=options,
+            custom_id=custom_id("set_language", guild.id)
+        ),
+        back_button(guild),
+    ]
+    return embed, components
+
+
+def ignore_panel(guild: disnake.Guild, config: GuildConfig) -> Panel:
+    """Embed and components listing what the guild excludes from message, reaction and typing logs."""
+    lang = config.language
+    text = messages[lang]['ignore']
+
+    def mentions(ids, prefix):
+        return ", ".join(f"<{prefix}{target_id}>" for target_id in ids) or text['none']
+
+    def defaults(ids) -> List[disnake.Object]:
+        return [disnake.Object(target_id) for target_id in ids]
+
+    embed = disnake.Embed(title=text['title'], description=text['description'], color=log_colors["info"])
+    embed.add_field(name=text['channels'], value=mentions(config.ignored_channels, "#"), inline=False)
+    embed.add_field(name=text['categories'], value=mentions(config.ignored_categories, "#"), inline=False)
+    embed.add_field(name=text['roles'], value=mentions(config.ignored_roles, "@&"), inline=False)
+    embed.add_field(name=text['users'], value=mentions(config.ignored_users, "@"), inline=False)
+    embed.add_field(
+        name=text['bots'],
+        value=text['bots_ignored'] if config.ignore_bots else text['bots_logged'],
+        inline=False
+    )
+
+    components = [
+        ChannelSelect(
+            placeholder=text['select_channels'],
+            channel_types=[disnake.ChannelType.text, disnake.ChannelType.news, disnake.ChannelType.voice,
+                           disnake.ChannelType.stage_voice, disnake.ChannelType.forum],
+            min_values=0,
+            max_values=25,
+            default_values=defaults(config.ignored_channels),
+            custom_id=custom_id("ignore", guild.id, "channel")
+        ),
+        ChannelSelect(
+            placeholder=text['select_categories'],
+            channel_types=[disnake.ChannelType.category],
+            min_values=0,
+            max_values=25,
+            default_values=defaults(config.ignored_categories),
+            custom_id=custom_id("ignore", guild.id, "category")
+        ),
+        RoleSelect(
+            placeholder=text['select_roles'],
+            min_values=0,
+            max_values=25,
+            default_values=defaults(config.ignored_roles),
+            custom_id=custom_id("ignore", guild.id, "role")
+        ),
+        UserSelect(
+            placeholder=text['select_users'],
+            min_values=0,
+            max_values=25,
+            default_values=defaults(config.ignored_users),
+            custom_id=custom_id("ignore", guild.id, "user")
+        ),
+        Button(
+            label=text['bots_ignored'] if config.ignore_bots else text['bots_logged'],
+            style=disnake.ButtonStyle.red if config.ignore_bots else disnake.ButtonStyle.green,
+            custom_id=custom_id("ignore_bots", guild.id)
+        ),
+        back_button(guild),
+    ]
+    return embed, components
+
+
+@action("main")
+async def show_main(db: Database, inter: disnake.MessageInteraction, config: GuildConfig):
+    embed, components = settings_panel(inter.bot, inter.guild, config)
+    await inter.response.edit_message(embed=embed, components=components)
+
+
+@action("logging")
+async def show_logging(db: Database, inter: disnake.MessageInteraction, config: GuildConfig):
+    await inter.response.edit_message(
+        embed=logging_embed(inter.guild, config),
+        components=logging_components(inter.guild, config)
+    )
+
+
+@action("toggle_logging")
+async def toggle_logging(db: Database, inter: disnake.MessageInteraction, config: GuildConfig):
+    await db.set_logging_enabled(inter.guild.id, not is_logging_enabled(config))
+    config = await db.get_guild_config(inter.guild.id)
+
+    embed = disnake.Embed(
+        title=messages[config.language]['logging']['status_changed'],
+        color=log_colors["success"]
+    )
+    await inter.response.edit_message(embed=embed, components=logging_components(inter.guild, config))
+
+
+@action("log_channel")
+async def set_log_channel(db: Database, inter: disnake.MessageInteraction, config: GuildConfig):
+    channel_id = int(inter.values[0])
+    await db.set_log_channel(inter.guild.id, channel_id)
+
+    embed = disnake.Embed(
+        description=messages[config.language]['logging']['channel_set'].format(channel=f"<#{channel_id}>"),
+        color=log_colors["success"]
+    )
+    await inter.response.edit_message(embed=embed)
+
+
+@action("detailed")
+async def show_detailed(db: Database, inter: disnake.MessageInteraction, config: GuildConfig):
+    embed, components = detailed_panel(inter.guild, config)
+    await inter.response.edit_message(embed=embed, components=components)
+
+
+@action("log_type")
+async def stage_log_type(db: Database, inter: disnake.MessageInteraction, config: GuildConfig,
+                         log_type: str, staged: str):
+    """Flip one staged toggle and re-render; toggling back to the saved value unstages it. Nothing is written."""
+    staged = decode_staged(staged)
+    enabled = not staged.get(log_type, config.log_types.get(log_type, False))
+    if enabled == config.log_types.get(log_type, False):
+        staged.pop(log_type, None)
+    else:
+        staged[log_type] = enabled
+
+    embed, components = detailed_panel(inter.guild, config, staged)
+    await inter.response.edit_message(embed=embed, components=components)
+
+
+@action("save_log_types")
+async def save_log_types(db: Database, inter: disnake.MessageInteraction, config: GuildConfig, staged: str):
+    await db.update_log_types(inter.guild.id, decode_staged(staged))
+    config = await db.get_guild_config(inter.guild.id)
+
+    embed, components = detailed_panel(inter.guild, config, title=messages[config.language]['logging']['types_saved'])
+    await inter.response.edit_message(embed=embed, components=components)
+
+
+@action("language")
+async def show_language(db: Database, inter: disnake.MessageInteraction, config: GuildConfig):
+    embed, components = language_panel(inter.guild, config)
+    await inter.response.edit_message(embed=embed, components=components)
+
+
+@action("set_language")
+async def set_language(db: Database, inter: disnake.MessageInteraction, config: GuildConfig):
+    lang = inter.values[0]
+    await db.set_language(inter.guild.id, lang)
+
+    embed = disnake.Embed(
+        title=messages[lang]['language']['success'].format(lang=lang.upper()),
+        description=messages[lang]['language']['success'].format(lang=lang),
+        color=log_colors["success"]
+    )
+    await inter.response.edit_message(embed=embed, components=[back_button(inter.guild)])
+
 
-        view = View()
-        channel_select = LogChannelSelect(self.db, inter.guild)
-        toggle_btn = await self.create_button(ToggleLoggingButton, settings.get("logging_enabled", False))
-        back_btn = await self.create_button(BackButton)
+@action("ignore")
+async def set_ignores(db: Database, inter: disnake.MessageInteraction, config: GuildConfig,
+                      kind: Optional[str] = None):
+    """Show the ignore panel, or replace one kind of ignore rule with the select's current values."""
+    if kind is not None:
+        await db.set_ignores(inter.guild.id, kind, [int(value) for value in inter.values])
+        config = await db.get_guild_config(inter.guild.id)
 
-        await channel_select.initialize()
-        view.add_item(channel_select)
-        view.add_item(toggle_btn)
+    embed, components = ignore_panel(inter.guild, config)
+    await inter.response.edit_message(embed=embed, components=components)
 
-        if settings.get("logging_enabled", False):
-            detailed_btn = await self.create_button(DetailedSettingsButton)
-            view.add_item(detailed_btn)
 
-        view.add_item(back_btn)
-        await inter.response.edit_message(embed=embed, view=view)
+@action("ignore_bots")
+async def toggle_ignore_bots(db: Database, inter: disnake.MessageInteraction, config: GuildConfig):
+    if config.ignore_bots:
+        await db.remove_ignore(inter.guild.id, "bots")
+    else:
+        await db.add_ignore(inter.guild.id, "bots")
 
-    @disnake.ui.button(emoji="🌐", style=disnake.ButtonStyle.grey, row=0)
-    async def language_button(self, button: disnake.ui.Button, inter: disnake.MessageInteraction):
-        lang = await self.db.get_language(inter.guild.id) or "en"
+    embed, components = ignore_panel(inter.guild, await db.get_guild_config(inter.guild.id))
+    await inter.response.edit_message(embed=embed, components=components)
 
-        embed = disnake.Embed(
-            title=messages[lang]['language']['current'].format(lang=lang.upper()),
-            description=messages[lang]['language']['available'].format(languages="🇬🇧 English, 🇷🇺 Русский"),
-            color=log_colors["info"]
-        )
 
-        view = View()
-        lang_select = LanguageSelect(self.db, inter.guild)
-        back_btn = await self.create_button(BackButton)
+class LogSearchView(View):
+    """Paged results of ``/logs search``.
 
-        await lang_select.initialize()
-        view.add_item(lang_select)
-        view.add_item(back_btn)
+    Pages are fetched with keyset pagination: each page remembers the ``(created_at, id)``
+    cursor it started from, so moving in either direction is one indexed query no matter
+    how deep the page is.
+    """
 
-        await inter.response.edit_message(embed=embed, view=view)
-
-    @disnake.ui.button(label="GitHub", style=disnake.ButtonStyle.link, row=0,
-                       url="https://github.com/agzatre/discord-logger-bot")
-    async def github_button(self, button: disnake.ui.Button, inter: disnake.MessageInteraction):
-        pass
+    def __init__(self, db: Database, author_id: int, guild_id: int, lang: str, filters: Dict[str, Any],
+                 until: Optional[datetime] = None, page_size: int = archive_settings['search_page_size']):
+        super().__init__(timeout=300)
+        self.db = db
+        self.author_id = author_id
+        self.guild_id = guild_id
+        self.lang = lang
+        self.filters = filters
+        self.until = until
+        self.page_size = page_size
+        self.cursors: List[Optional[Tuple[datetime, int]]] = [None]
+        self.rows: List[Dict[str, Any]] = []
+        self.has_next = False
+
+    async def interaction_check(self, inter: disnake.MessageInteraction) -> bool:
+        return inter.author.id == self.author_id
+
+    async def load(self) -> disnake.Embed:
+        rows = await self.db.search_log_events(
+            self.guild_id, self.page_size + 1, before=self.cursors[-1], until=self.until, **self.filters
+        )
+        self.rows, self.has_next = rows[:self.page_size], len(rows) > self.page_size
+        self.previous_button.disabled = len(self.cursors) == 1
+        self.next_button.disabled = not self.has_next
+        return self.embed()
+
+    def embed(self) -> disnake.Embed:
+        text = messages[self.lang]['archive']
+        embed = disnake.Embed(title=text['title'], color=0x2b2d31)
+        if not self.rows:
+            embed.description = text['empty']
+            return embed
+
+        lines = []
+        for row in self.rows:
+            header = f"{disnake.utils.format_dt(row['created_at'], 'f')} `{row['event']}`"
+            if row['user_id']:
+                header += f" <@{row['user_id']}>"
+            if row['channel_id']:
+                header += f" <#{row['channel_id']}>"
+            content = " ".join((row['content'] or "—").split())
+            lines.append(f"{header}\n> {content[:200] + '…' if len(content) > 200 else content}")
+        embed.description = "\n".join(lines)[:4096]
+        embed.set_footer(text=text['page'].format(page=len(self.cursors)))
+        return embed
+
+    @disnake.ui.button(emoji="⬅️", style=disnake.ButtonStyle.grey)
+    async def previous_button(self, button: disnake.ui.Button, inter: disnake.MessageInteraction):
+        self.cursors.pop()
+        await inter.response.edit_message(embed=await self.load(), view=self)
+
+    @disnake.ui.button(emoji="➡️", style=disnake.ButtonStyle.grey)
+    async def next_button(self, button: disnake.ui.Button, inter: disnake.MessageInteraction):
+        last = self.rows[-1]
+        self.cursors.append((last['created_at'], last['id']))
+        await inter.response.edit_message(embed=await self.load(), view=self)
@@ -0,0 +1,153 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from config import voice_sessions as voice_settings
+
+
+def format_duration(seconds: float) -> str:
+    seconds = int(seconds)
+    hours, remainder = divmod(seconds, 3600)
+    minutes, seconds = divmod(remainder, 60)
+    if hours:
+        return f"{hours}h {minutes:02d}m {seconds:02d}s"
+    if minutes:
+        return f"{minutes}m {seconds:02d}s"
+    return f"{seconds}s"
+
+
+def _timestamp(value: float) -> datetime:
+    return datetime.fromtimestamp(value, tz=timezone.utc)
+
+
+class VoiceSessionTracker:
+    """In-memory index of who is in which voice channel and since when.
+
+    ``sessions`` maps ``(guild_id, member_id)`` to ``[channel_id, channel_joined_at,
+    session_started_at]`` (unix timestamps). Every time a member leaves or moves
+    out of a channel the finished segment is queued and written to Postgres in
+    batches, flagged with whether it ended the session so moves are not counted
+    as extra sessions; the open sessions are snapshotted to disk so a restart can resume
+    them instead of losing their join time. While Postgres is down at most ``max_pending``
+    segments are kept, dropping the oldest first.
+    """
+
+    def __init__(self, snapshot_path: str = voice_settings['snapshot_path'],
+                 batch_size: int = voice_settings['batch_size'], max_pending: int = voice_settings['max_pending']):
+        self.snapshot_path = snapshot_path
+        self.batch_size = batch_size
+        self.max_pending = max_pending
+        self.sessions: Dict[Tuple[int, int], List] = {}
+        self.completed: List[tuple] = []
+        self.restored_at: Optional[float] = None
+
+    def join(self, guild_id: int, member_id: int, channel_id: int, now: Optional[float] = None) -> None:
+        now = now or time.time()
+        self.sessions[(guild_id, member_id)] = [channel_id, now, now]
+
+    def move(self, guild_id: int, member_id: int, channel_id: int, now: Optional[float] = None) -> Optional[float]:
+        """Close the segment in the previous channel; return how long it lasted."""
+        now = now or time.time()
+        session = self.sessions.get((guild_id, member_id))
+        if session is None:
+            self.join(guild_id, member_id, channel_id, now)
+            return None
+        duration = self._complete(guild_id, member_id, session, now, ended=False)
+        session[0], session[1] = channel_id, now
+        return duration
+
+    def leave(self, guild_id: int, member_id: int, now: Optional[float] = None) -> Optional[float]:
+        """End the session; return its total length across all channels."""
+        now = now or time.time()
+        session = self.sessions.pop((guild_id, member_id), None)
+        if session is None:
+            return None
+        self._complete(guild_id, member_id, session, now, ended=True)
+        return now - session[2]
+
+    def _complete(self, guild_id: int, member_id: int, session: List, now: float, ended: bool) -> float:
+        channel_id, joined_at, _ = session
+        duration = max(0.0, now - joined_at)
+        self.completed.append(
+            (guild_id, member_id, channel_id, _timestamp(joined_at), _timestamp(now), int(duration), ended)
+        )
+        return duration
+
+    @property
+    def batch_ready(self) -> bool:
+        return len(self.completed) >= self.batch_size
+
+    async def flush(self, db) -> None:
+        """Write completed segments to Postgres in one batch."""
+        if not self.completed:
+            return
+        batch, self.completed = self.completed, []
+        try:
+            await db.add_voice_sessions(batch)
+        except Exception as e:
+            logging.error(f"Failed to store {len(batch)} voice sessions: {e}")
+            self.completed[:0] = batch
+            excess = len(self.completed) - self.max_pending
+            if excess > 0:
+                del self.completed[:excess]
+                logging.warning(f"Dropped the {excess} oldest voice sessions; at most {self.max_pending} are kept")
+
+    def reconcile(self, guilds) -> None:
+        """Align the index with the voice states the gateway reports after (re)connecting.
+
+        Sessions whose member is gone are closed at the last moment we knew
+        about them: the snapshot time right after a restart, now otherwise.
+        """
+        now = time.time()
+        closed_at = self.restored_at or now
+        self.restored_at = None
+
+        present = {}
+        for guild in guilds:
+            for channel in guild.voice_channels:
+                for member in channel.members:
+                    if not member.bot:
+                        present[(guild.id, member.id)] = channel.id
+
+        for key in list(self.sessions):
+            if key not in present:
+                self.leave(*key, now=closed_at)
+            elif self.sessions[key][0] != present[key]:
+                self.move(*key, present[key], now=closed_at)
+        for (guild_id, member_id), channel_id in present.items():
+            if (guild_id, member_id) not in self.sessions:
+                self.join(guild_id, member_id, channel_id, now)
+
+    def _write_snapshot(self, data: dict) -> None:
+        os.makedirs(os.path.dirname(self.snapshot_path) or ".", exist_ok=True)
+        temporary = f"{self.snapshot_path}.tmp"
+        with open(temporary, "w", encoding="utf-8") as file:
+            json.dump(data, file, separators=(",", ":"))
+        os.replace(temporary, self.snapshot_path)
+
+    async def snapshot(self) -> None:
+        """Persist open sessions atomically in a worker thread."""
+        data = {
+            "saved_at": time.time(),
+            "sessions": [[guild_id, member_id, *session] for (guild_id, member_id), session in self.sessions.items()],
+        }
+        await asyncio.to_thread(self._write_snapshot, data)
+
+    def load_snapshot(self) -> None:
+        """Restore open sessions saved before the last shutdown."""
+        try:
+            with open(self.snapshot_path, encoding="utf-8") as file:
+                data = json.load(file)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logging.error(f"Failed to load voice session snapshot: {e}")
+            return
+        for guild_id, member_id, channel_id, joined_at, started_at in data.get("sessions", []):
+            self.sessions[(guild_id, member_id)] = [channel_id, joined_at, started_at]
+        self.restored_at = data.get("saved_at")
+        logging.info(f"Restored {len(self.sessions)} open voice sessions")
@@ -0,0 +1,125 @@
+import functools
+import re
+from typing import Dict, Iterable, Optional, Pattern, Tuple
+
+from config import watchlist as watchlist_settings
+
+
+# A quantifier, with its lazy or possessive suffix; ``{m,n}`` only repeats when ``n`` is missing or above 1.
+_QUANTIFIER = re.compile(r"(?:[*+?]|\{(\d*)(?:(,)(\d*))?\})[?+]?")
+
+
+def _repeats_at(pattern: str, position: int) -> Tuple[int, bool]:
+    """Skip a quantifier at ``position``; returns where it ends and whether it can repeat its atom."""
+    match = _QUANTIFIER.match(pattern, position)
+    if match is None:
+        return position, False
+    if match.group(0)[0] in "*+":
+        return match.end(), True
+    if match.group(0)[0] == "?":
+        return match.end(), False
+    low, comma, high = match.groups()
+    if not comma:
+        return match.end(), int(low or 0) > 1
+    return match.end(), not high or int(high) > 1
+
+
+def _nested_quantifier(pattern: str) -> bool:
+    """Whether a repeated group contains a repeat itself, like ``(a+)+`` or ``(?:a*b)*``.
+
+    Such patterns can backtrack exponentially on a near-miss, so one message could stall
+    the event loop. ``pattern`` must already compile.
+    """
+    # For each open group: whether something inside it repeats.
+    groups = [False]
+    position = 0
+    while position < len(pattern):
+        char = pattern[position]
+        inner = False
+        if char == "(":
+            groups.append(False)
+            position += 1
+            continue
+        if char == ")":
+            inner = groups.pop()
+            position += 1
+        elif char == "\\":
+            position += 2
+        elif char == "[":
+            position += 1
+            if pattern.startswith("^", position):
+                position += 1
+            # A ``]`` first in a class is a literal.
+            if pattern.startswith("]", position):
+                position += 1
+            while pattern[position] != "]":
+                position += 2 if pattern[position] == "\\" else 1
+            position += 1
+        else:
+            position += 1
+        position, repeats = _repeats_at(pattern, position)
+        if repeats and inner:
+            return True
+        groups[-1] = groups[-1] or repeats or inner
+    return False
+
+
+def validate_term(term: str, is_regex: bool) -> Optional[str]:
+    """Return why a term cannot be watched, or None if it can.
+
+    ``"length"`` and ``"nested"`` are reasons of their own; other strings are ``re`` errors.
+    """
+    limit = watchlist_settings['max_regex_length'] if is_regex else watchlist_settings['max_term_length']
+    if not term.strip() or len(term) > limit:
+        return "length"
+    if is_regex:
+        try:
+            re.compile(term)
+        except re.error as e:
+            return str(e)
+        if _nested_quantifier(term):
+            return "nested"
+    return None
+
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    """Regex for a set of literal words built from their trie, so shared prefixes are matched once.
+
+    ``cat``, ``car`` and ``cart`` become ``ca(?:t|rt?)``: at each position the regex engine follows
+    a single path instead of trying every word, which keeps thousands of terms cheap to match.
+    """
+    trie: Dict = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = True
+
+    def build(node: Dict) -> str:
+        end = "" in node
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        if len(branches) == 1 and not end:
+            return branches[0]
+        group = "(?:" + "|".join(branches) + ")"
+        return group + "?" if end else group
+
+    return build(trie)
+
+
+@functools.lru_cache(maxsize=watchlist_settings['cache_size'])
+def compile_watchlist(terms: Tuple[Tuple[str, bool], ...]) -> Optional[Pattern]:
+    """Compile a guild's ``(term, is_regex)`` pairs into one case-insensitive pattern.
+
+    Words match whole words only; regex terms are used as written. Configs are rebuilt on
+    every settings change, so compiled patterns are cached by their terms and only
+    recompiled when the watchlist itself changes.
+    """
+    words = {term.lower() for term, is_regex in terms if not is_regex}
+    parts = [f"(?:{term})" for term, is_regex in terms if is_regex]
+    if words:
+        parts.insert(0, r"(?<!\w)" + _trie_pattern(words) + r"(?!\w)")
+    if not parts:
+        return None
+    return re.compile("|".join(parts), re.IGNORECASE)